@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+from Agent.lsnmp_agent import LSNMPAgent
+from Agent.udp_server import open_request, build_response, handle_message
+from Protocol.protocol import CryptoSession
+
+
+def reads_sensors(iid_list):
+    """True if a GET reads sensor values (2.3.x), which may be slow"""
+    return any(str(iid).startswith("2.3.") for iid in iid_list)
+
+
+class AsyncUDPServer(asyncio.DatagramProtocol):
+    """
+    Agent server on one asyncio event loop (create_datagram_endpoint) instead
+    of a blocking recvfrom loop plus beacon and sampling threads. Requests,
+    beacons and sensor notifications are all scheduled on the loop, the sensor
+    reads (GETs of 2.3.x and the sampling passes) run in a small thread pool,
+    so a slow sensor never holds up the other managers and the number of
+    threads does not grow with them.
+
+    Requests are answered by the same LSNMPAgent handlers as UDPServer.
+    """
+
+    def __init__(self, host='localhost', port=1161, shared_key="default_key_12345678", crypto_mode="ecb",
+                 notification_window=0.0, read_workers=4):
+        self.host = host
+        self.port = port
+        # the agent does not start its sampling thread, _notification_loop samples it
+        self.agent = LSNMPAgent(notification_window, start_loop=False)
+        self.key = hashlib.sha256(shared_key.encode()).digest()[:16]
+        # "ecb" (legacy) or "aead" (authenticated), must match the managers
+        self.crypto = CryptoSession(self.key, crypto_mode)
+        self.executor = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="sensor-read")
+        self.transport = None
+        self.beacon_transport = None
+        self._loop = None
+        self._task = None
+        self._reschedule = None
+
+    async def serve(self):
+        """Serves until stop() (or the task is cancelled)"""
+        loop = self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._reschedule = asyncio.Event()
+        # sampling rate changes (SETs, reset) wake the sampling task up
+        self.agent.sensor_bank.on_reschedule = lambda: loop.call_soon_threadsafe(self._reschedule.set)
+        self.agent.set_notification_callback(self.handle_sensor_notification)
+
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: self, local_addr=(self.host, self.port))
+        #Socket para enviar beacons
+        self.beacon_transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, family=socket.AF_INET, allow_broadcast=True)
+        print(f"UDP Server running on {self.host}:{self.port} (asyncio)")
+        try:
+            await asyncio.gather(self._beacon_loop(), self._notification_loop())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.agent.sensor_bank.on_reschedule = None
+            self.transport.close()
+            self.beacon_transport.close()
+            self.executor.shutdown(wait=False)
+
+    def stop(self):
+        """Stops serve(), from any thread"""
+        self.agent.running = False
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+
+    # --- requests --------------------------------------------------------------
+
+    def datagram_received(self, data, addr):
+        request_data = open_request(self.crypto, data, addr)
+        if request_data is None:
+            return
+        if request_data['type'] != 'set-request' and reads_sensors(request_data['iid_list']):
+            # only the agent's handler runs in the thread pool, the response is
+            # encoded and sealed on the loop (one CryptoSession, one thread)
+            future = self._loop.run_in_executor(self.executor, handle_message, self.agent, request_data, addr)
+            future.add_done_callback(lambda done: done.cancelled() or self._respond_message(done, addr))
+        else:
+            self._respond(build_response(self.agent, self.crypto, request_data, addr), addr)
+
+    def _respond_message(self, done, addr):
+        try:
+            response_data = self.crypto.seal(done.result().encode_protocol())
+        except Exception as e:
+            print(f"Error handling request: {e}")
+            return
+        self._respond(response_data, addr)
+
+    def _respond(self, response_data, addr):
+        if response_data is not None and not self.transport.is_closing():
+            self.transport.sendto(response_data, addr)
+
+    def error_received(self, exc):
+        print(f"Error handling request: {exc}")
+
+    # --- beacons and notifications -----------------------------------------------
+
+    async def _beacon_loop(self):
+        while self.agent.running:
+            beacon_rate = self.agent.beacon_rate
+
+            if beacon_rate > 0:
+                try:
+                    # Beacon PDU is rendered from the agent's pre-encoded template
+                    encoded_beacon = self.agent.generate_beacon().encode_protocol()
+                    self.beacon_transport.sendto(encoded_beacon, ('<broadcast>', 1163))
+                    print(f"Beacon enviado (rate: {beacon_rate}s)")
+                except Exception as e:
+                    print(f" Erro no beacon loop: {e}")
+            await asyncio.sleep(beacon_rate if beacon_rate > 0 else 1)
+
+    async def _notification_loop(self):
+        """Sleeps until the next sensor is due (or a rate changes), samples in the thread pool"""
+        bank = self.agent.sensor_bank
+        while self.agent.running:
+            self._reschedule.clear()
+            deadline = bank.next_deadline()
+            delay = None if deadline is None else deadline - bank.clock()
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._reschedule.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._loop.run_in_executor(self.executor, self.agent.sample_due_sensors)
+
+    def handle_sensor_notification(self, notification_msg):
+        """Agent callback (thread pool): the datagrams are sent from the loop"""
+        try:
+            # the templates reuse their buffer, each datagram is copied before leaving the thread
+            datagrams = [bytes(datagram) for datagram in notification_msg.encode_datagrams()]
+            self._loop.call_soon_threadsafe(self._broadcast, datagrams)
+        except Exception as e:
+            print(f"X Error in sensor notification callback: {e}")
+
+    def _broadcast(self, datagrams):
+        if self.beacon_transport.is_closing():
+            return
+        for datagram in datagrams:
+            self.beacon_transport.sendto(datagram, ('<broadcast>', 1163))
+
+
+if __name__ == "__main__":
+    server = AsyncUDPServer()
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
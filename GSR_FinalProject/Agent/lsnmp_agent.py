@@ -1,60 +1,308 @@
 import random
+from contextlib import nullcontext
+from functools import partial
 import threading
 import json
 import time
 from pyexpat.errors import messages
 
-from Agent.VirtualSensor import VirtualSensor
+import numpy as np
+
+from Agent.sensor_bank import SensorBank
+from Agent.mib import MibRegistry
+from Agent.shared import HEADER, MibSegment, read_unshared
 from datetime import datetime
-from Protocol.protocol import encode_complete_pdu, decode_complete_pdu
+from Protocol.protocol import (encode_complete_pdu, decode_complete_pdu, encode_split_pdus, PDUTemplate,
+                               BEACON_IIDS, EMPTY_SEQUENCE, Timestamp, Uptime)
 
 
 class LSNMPAgent:
-    def __init__(self):
+    def __init__(self, notification_window=0.0, max_notification_size=1024, start_loop=True, shared=False,
+                 segment_name=None):
+        """
+        notification_window: seconds, > 0 packs every sample due within the
+        window into one multi-entry notification instead of one per sample.
+        max_notification_size: a coalesced notification larger than this is
+        split in several datagrams (1024, the managers' receive buffer).
+        start_loop: False leaves the sampling to the caller (an event loop
+        server calls sample_due_sensors at the scheduler's next_deadline).
+        shared: device group and sensor table in a shared memory segment
+        (Agent.shared, named segment_name or a generated name), for worker
+        processes forked after the agent is created (Agent.multicore) and for
+        MibReaders in other processes.
+        """
         self.sampling_rates = {}
+        self.segment = MibSegment.create(name=segment_name) if shared else None
+        self._writing = self.segment.writing if shared else nullcontext
+        self._snapshot = self.segment.snapshot if shared else read_unshared
+        # device group fields (header of the segment when shared)
+        self._device = self.segment.header if shared else np.zeros((), HEADER)
+        with self._writing():
+            self._device["lmib_id"] = 123
+            self._device["device_id"] = b"Agent_001"
+            self._device["device_type"] = b"Sensing Hub"
+            self._device["op_status"] = 1
         self.beacon_rate = 30
-        self.sensors = {
-            # Sensores básicos (já tens)
-            "1": VirtualSensor(0, 100, sampling_rate=0.1, sensor_type="Temperatura"),
-            "2": VirtualSensor(-50, 50, sampling_rate=0.1, sensor_type="Humidade"),
-
-            # Novos sensores para testar
-            "3": VirtualSensor(0, 1000, sampling_rate=0.05, sensor_type="Luz"),
-            "4": VirtualSensor(980, 1020, sampling_rate=0.2, sensor_type="Pressão"),
-            "5": VirtualSensor(0, 100, sampling_rate=0.15, sensor_type="Qualidade do Ar"),
-            "6": VirtualSensor(-20, 60, sampling_rate=0.08, sensor_type="Temperatura Externa"),
-            "7": VirtualSensor(0, 500, sampling_rate=0.25, sensor_type="Ruído"),
-            "8": VirtualSensor(0, 100, sampling_rate=0.3, sensor_type="Bateria")
-        }
+        # another process may change the sampling rates without waking this
+        # one up, the sampling loop then checks the deadlines every 0.1s
+        self._wait_timeout = 0.1 if shared else None
+        # IID -> getter/setter, the sensor table rows are added with the sensors
+        self.mib = MibRegistry(shared=shared)
+        self._register_mib()
+        # Sensor state in columns (SensorBank), self.sensors maps index -> sensor view
+        self.sensor_bank = SensorBank(segment=self.segment)
+        self.notification_window = notification_window
+        self.max_notification_size = max_notification_size
+        if notification_window > 0:
+            # sensors due within the window are popped (and sampled) in the same pass
+            self.sensor_bank.slack = max(self.sensor_bank.slack, notification_window)
+        self.sensors = self.sensor_bank.sensors
+        # Sensores básicos (já tens)
+        self.add_sensor("1", 0, 100, sampling_rate=0.1, sensor_type="Temperatura")
+        self.add_sensor("2", -50, 50, sampling_rate=0.1, sensor_type="Humidade")
+
+        # Novos sensores para testar
+        self.add_sensor("3", 0, 1000, sampling_rate=0.05, sensor_type="Luz")
+        self.add_sensor("4", 980, 1020, sampling_rate=0.2, sensor_type="Pressão")
+        self.add_sensor("5", 0, 100, sampling_rate=0.15, sensor_type="Qualidade do Ar")
+        self.add_sensor("6", -20, 60, sampling_rate=0.08, sensor_type="Temperatura Externa")
+        self.add_sensor("7", 0, 500, sampling_rate=0.25, sensor_type="Ruído")
+        self.add_sensor("8", 0, 100, sampling_rate=0.3, sensor_type="Bateria")
         self.notification_callback = None
+        # The bank also keeps the next sampling deadline of every sensor,
+        # the loop sleeps until the earliest one
+        self.scheduler = self.sensor_bank
+        # PDUs pre-encoded once, only timestamp/msg-id/values change per message
+        self._beacon_template = PDUTemplate("notification", BEACON_IIDS)
+        self._notification_templates = {}
         self.running = True
-        self._start_notification_loop()
+        if start_loop:
+            self._start_notification_loop()
         self.start_time = time.time()
 
+    def _device_field(self, name):
+        """Device group field (a seqlock read of the segment when shared)"""
+        return self._snapshot(lambda: self._device[name].item())
+
+    @property
+    def beacon_rate(self):
+        return int(self._device_field("beacon_rate"))
+
+    @beacon_rate.setter
+    def beacon_rate(self, rate):
+        with self._writing():
+            self._device["beacon_rate"] = rate
+
+    @property
+    def start_time(self):
+        return float(self._device_field("start_time"))
+
+    @start_time.setter
+    def start_time(self, start_time):
+        with self._writing():
+            self._device["start_time"] = start_time
+
     def _start_notification_loop(self):
         """Start the notification loop in a backgroup thread"""
         thread = threading.Thread(target=self._notification_loop)
-        thread.deamon = True
+        thread.daemon = True
         thread.start()
         print(" Sensor notification loop started")
 
     def _notification_loop(self):
         while self.running:
-            current_time = time.time()
-
-            for sensor_iid, sensor in self.sensors.items():
-                if sensor.should_sample(current_time):
-                    value = sensor.read()
-                    sensor.update_last_sample(current_time)
-
-                    if self.notification_callback:
-                        notification_msg = LSNMPMessage(
-                            msg_type="notification",
-                            iid_list=[f"2.3.{sensor_iid}"],
-                            value_list=[value]
-                        )
-                        self.notification_callback(notification_msg)
-            time.sleep(0.01)
+            # Sleeps until the next sensor is due (or a sampling rate changes)
+            self.scheduler.wait(self._wait_timeout)
+            self.sample_due_sensors()
+
+    def add_sensor(self, sensor_iid, min_val=0, max_val=100, sampling_rate=1, sensor_type="Standard"):
+        """Adds a virtual sensor (2.x.<sensor_iid>), sampled from now on"""
+        self.sensor_bank.add_sensor(sensor_iid, min_val, max_val, sampling_rate, sensor_type)
+        self.mib.add_row("2", sensor_iid)
+        self.mib.add_row("3", sensor_iid)
+        self.mib.invalidate("1.5")
+
+    def _register_mib(self):
+        """Binds every L-MIB object to its getter/setter (static: encoded once, until it changes)"""
+        mib = self.mib
+        # device group (1.1 a 1.9)
+        mib.register("1.1", lambda: int(self._device_field("lmib_id")), static=True)  # device.lMibId - ID do L-MIB
+        mib.register("1.2", lambda: self._device_field("device_id").decode(), static=True)  # device.id - ID do dispositivo
+        mib.register("1.3", lambda: self._device_field("device_type").decode(), static=True)  # device.type - Tipo de dispositivo
+        mib.register("1.4", lambda: self.beacon_rate, self._set_beacon_rate, static=True)  # device.beaconRate - Beacon rate em segundos
+        mib.register("1.5", lambda: len(self.sensors), static=True)  # device.nSensors - Número de sensores
+        mib.register("1.6", self._get_current_timestamp)  # device.dateAndTime
+        mib.register("1.7", self._get_uptime)  # device.upTime
+        mib.register("1.8", lambda: int(self._device_field("op_status")), static=True)  # device.opStatus (0=standby, 1=normal, 2=erro)
+        mib.register("1.9", lambda: 0, self._set_reset, static=True)  # device.reset (0=normal, 1=reset)
+
+        # sensors table (2.<object>.<sensor index>)
+        mib.add_table("2", {
+            "1": (lambda index: f"Sensor_{index}", None, True),  # sensors.id
+            "2": (lambda index: self.sensors[index].type, None, True),  # sensors.type
+            # max age in ms in the GET's V-List, the sampling period without it
+            "3": (self._read_sensor, None, False, True),  # sensors.sampleValue
+            "4": (lambda index: self.sensors[index].min, None, True),  # sensors.minValue
+            "5": (lambda index: self.sensors[index].max, None, True),  # sensors.maxValue
+            "6": (self._get_last_sampling_time, None),  # sensors.lastSamplingTime
+            "7": (lambda index: int(self.sensors[index].sampling_rate * 10),
+                  self._set_sensor_sampling_rate, True),  # sensors.samplingRate
+            # reporting policy (0=every sample, 1=deadband/heartbeat)
+            "8": (lambda index: self.sensors[index].report_mode,
+                  partial(self._set_report_policy, "mode"), True),  # sensors.reportMode
+            "9": (lambda index: self.sensors[index].deadband,
+                  partial(self._set_report_policy, "deadband"), True),  # sensors.deadband (unidades do valor)
+            "10": (lambda index: int(self.sensors[index].deadband_pct),
+                   partial(self._set_report_policy, "deadband_pct"), True),  # sensors.deadbandPct (% da gama)
+            "11": (lambda index: int(self.sensors[index].max_silence),
+                   partial(self._set_report_policy, "max_silence"), True),  # sensors.maxSilence (segundos)
+            "12": (lambda index: self.sensors[index].suppressed, None),  # sensors.suppressedSamples
+            "13": (lambda index: self.sensors[index].block_size,
+                   self._set_sensor_block_size, True),  # sensors.blockSize (0 = uma notificação por amostra)
+        })
+
+        # sample history (3.<object>.<sensor index>), the V-List entry sent with
+        # the IID selects the samples: N (the last N) or a Timestamp (since then)
+        mib.add_table("3", {
+            "1": (partial(self._get_sensor_history, 1), None, False, True),  # history.values
+            "2": (partial(self._get_sensor_history, 0), None, False, True),  # history.times (epoch ms)
+        })
+
+    def sample_due_sensors(self):
+        """Samples the sensors whose deadline has passed and notifies them, returns how many"""
+        # Due sensors selected and read in one pass over the bank columns
+        due_rows = self.sensor_bank.pop_due_rows()
+        if not due_rows.size:
+            return 0
+        values = self.sensor_bank.read_many(due_rows)
+        sampled = len(values)
+        keys = self.sensor_bank.keys
+
+        # High-rate sensors: samples go to their block, notified when it is full
+        batched = self.sensor_bank.block_size[due_rows] > 0
+        if batched.any():
+            for block in self.sensor_bank.append_blocks(due_rows[batched]):
+                self._notify_block(*block)
+            due_rows = due_rows[~batched]
+            values = self.sensor_bank.current_value[due_rows].tolist()
+
+        # Reporting policy: only the samples that have to be notified
+        report = self.sensor_bank.select_reports(due_rows)
+        if not report.all():
+            due_rows = due_rows[report]
+            values = self.sensor_bank.current_value[due_rows].tolist()
+
+        if self.notification_callback and self.notification_window > 0 and values:
+            # One notification with an entry per sample (2.3.x -> value)
+            iid_list = [self._get_notification_template(keys[row]).iid_list[0] for row in due_rows.tolist()]
+            notification_msg = LSNMPMessage(
+                msg_type="notification",
+                iid_list=iid_list,
+                value_list=values
+            )
+            notification_msg.max_size = self.max_notification_size
+            self.notification_callback(notification_msg)
+        elif self.notification_callback:
+            for row, value in zip(due_rows.tolist(), values):
+                template = self._get_notification_template(keys[row])
+                notification_msg = LSNMPMessage(
+                    msg_type="notification",
+                    iid_list=template.iid_list,
+                    value_list=[value],
+                    template=template
+                )
+                self.notification_callback(notification_msg)
+        return sampled
+
+    def stop(self):
+        """Stops the notification loop"""
+        self.running = False
+        self.scheduler.wake()
+
+    def set_sensor_sampling_rate(self, sensor_iid, rate):
+        """Changes a sensor sampling rate (Hz) and reschedules it, rate 0 stops sampling it"""
+        sensor = self.sensors.get(sensor_iid)
+        if sensor is None:
+            return False
+        # a block holds samples of a single interval, the collected ones go first
+        partial_block = self.sensor_bank.flush_block(sensor_iid)
+        if partial_block is not None:
+            self._notify_block(*partial_block)
+        # re-keys the sensor in the bank schedule too
+        sensor.set_sampling_rate(rate)
+        self.mib.invalidate(f"2.7.{sensor_iid}")
+        return True
+
+    def set_sensor_block_size(self, sensor_iid, block_size):
+        """
+        High-rate mode: the sensor samples are sent in blocks of block_size
+        (one integer sequence per notification), 0 sends every sample
+        """
+        if sensor_iid not in self.sensor_bank:
+            return False
+        partial_block = self.sensor_bank.set_block_size(sensor_iid, block_size)
+        if partial_block is not None:
+            self._notify_block(*partial_block)
+        self.mib.invalidate(f"2.13.{sensor_iid}")
+        return True
+
+    def _notify_block(self, row, start_ms, samples):
+        """
+        Notification of a block of samples: V-List with the samples as an integer
+        sequence, T-List with the first sample time and the block duration
+        (samples x sampling interval, whole ms over the block instead of per
+        sample, so rates of hundreds of Hz do not drift)
+        """
+        if not self.notification_callback:
+            return
+        bank = self.sensor_bank
+        notification_msg = LSNMPMessage(
+            msg_type="notification",
+            iid_list=self._get_notification_template(bank.keys[row]).iid_list,
+            value_list=[samples]
+        )
+        span_ms = round(len(samples) * float(bank.intervals[row]) * 1000)
+        notification_msg.t_list = [start_ms, Uptime.from_ms(span_ms)]
+        self.notification_callback(notification_msg)
+
+    def set_report_policy(self, sensor_iid, mode=None, deadband=None, deadband_pct=None, max_silence=None):
+        """Changes a sensor reporting policy (see SensorBank.set_report_policy), False if unknown"""
+        if sensor_iid not in self.sensor_bank:
+            return False
+        self.sensor_bank.set_report_policy(sensor_iid, mode, deadband, deadband_pct, max_silence)
+        for column in ("8", "9", "10", "11"):
+            self.mib.invalidate(f"2.{column}.{sensor_iid}")
+        return True
+
+    def get_reporting_stats(self):
+        """Notified/suppressed samples, total and per sensor (to tune the deadbands)"""
+        bank = self.sensor_bank
+        return {
+            "reported": bank.reported,
+            "suppressed": bank.suppressed_total,
+            "suppressed_by_sensor": {key: int(bank.suppressed[row]) for row, key in enumerate(bank.keys)},
+        }
+
+    def get_read_stats(self):
+        """GETs of 2.3.x answered with the last sample or by another GET's read (no new read)"""
+        return {
+            "fresh_reads": self.sensor_bank.fresh_reads,
+            "coalesced_reads": self.sensor_bank.coalesced_reads,
+        }
+
+    def get_scheduler_stats(self):
+        """Lateness/jitter of the sensor sampling"""
+        stats = self.scheduler.stats.snapshot()
+        stats["sensors_scheduled"] = len(self.scheduler)
+        return stats
+
+    def _get_notification_template(self, sensor_iid):
+        """Template for the notifications of one sensor (2.3.x)"""
+        template = self._notification_templates.get(sensor_iid)
+        if template is None:
+            template = PDUTemplate("notification", [f"2.3.{sensor_iid}"])
+            self._notification_templates[sensor_iid] = template
+        return template
 
     def set_notification_callback(self, callback):
         """Set the callback for sending notifications to server"""
@@ -64,13 +312,10 @@ class LSNMPAgent:
         """Gera a mensagem beacon"""
         return LSNMPMessage(
             msg_type="notification",
-            iid_list=["1.1", "1.2", "1.5", "1.8"],
-            value_list=[
-                self._get_device_value("1.1"),  # lMibId
-                self._get_device_value("1.2"),  # device.id
-                self._get_device_value("1.5"),  # nSensors
-                self._get_device_value("1.8")   # opStatus
-        ]
+            iid_list=self._beacon_template.iid_list,
+            # lMibId, device.id, nSensors, opStatus (cached encoded values)
+            value_list=self.mib.get_many(BEACON_IIDS, encoded=True),
+            template=self._beacon_template
         )
 
     def get_value(self, iid):
@@ -81,36 +326,46 @@ class LSNMPAgent:
 
     def _get_device_value(self, iid):
         """Obtem valores do device group (1.1 a 1.9)"""
-        device_values = {
-            "1.1": 123,  # device.lMibId - ID do L-MIB
-            "1.2": "Agent_001",  # device.id - ID do dispositivo
-            "1.3": "Sensing Hub",  # device.type - Tipo de dispositivo
-            "1.4": self.beacon_rate,  # device.beaconRate - Beacon rate em segundos
-            "1.5": len(self.sensors),  # device.nSensors - Número de sensores
-            "1.6": self._get_current_timestamp(),  # device.dateAndTime
-            "1.7": self._get_uptime(),  # device.upTime
-            "1.8": 1,  # device.opStatus (0=standby, 1=normal, 2=erro)
-            "1.9": 0  # device.reset (0=normal, 1=reset)
-        }
-        return device_values.get(iid)
+        return self.mib.get(iid)
+
+    def _set_beacon_rate(self, value):
+        old_rate = self.beacon_rate
+        self.beacon_rate = value
+        print(f"    Beacon rate atualizado: {old_rate}s -> {self.beacon_rate}s")
+
+    def _set_reset(self, value):
+        if value == 1:
+            self._reset_device()
+
+    def _set_sensor_sampling_rate(self, sensor_index, value):
+        # sensors.samplingRate em décimas de Hz, o mesmo formato do GET
+        sensor_id = f"2.7.{sensor_index}"
+        self.sampling_rates[sensor_id] = value
+        if self.set_sensor_sampling_rate(sensor_index, value / 10):
+            print(f"    Sampling rate {sensor_id}: {value / 10}Hz")
+
+    def _set_sensor_block_size(self, sensor_index, value):
+        try:
+            if self.set_sensor_block_size(sensor_index, value):
+                print(f"    Block size 2.13.{sensor_index}: {value}")
+        except (TypeError, ValueError) as e:
+            print(f"    Invalid block size {sensor_index}: {e}")
+
+    def _set_report_policy(self, field, sensor_index, value):
+        try:
+            self.set_report_policy(sensor_index, **{field: value})
+            print(f"    Report policy {sensor_index}: {field}={value}")
+        except (TypeError, ValueError) as e:
+            print(f"    Invalid report policy {sensor_index}: {e}")
 
     def _handle_set_request(self, request_data, addr):
         """Processa SET request"""
         iid_list = request_data['iid_list']
         value_list = request_data['v_list']
 
-        if iid_list == ["1.4"]:
-            old_rate = self.beacon_rate
-            self.beacon_rate = value_list[0]
-            print(f"    Beacon rate atualizado: {old_rate}s -> {self.beacon_rate}s")
-        elif iid_list == ["1.9"]:
-            if value_list[0] == 1:
-                self._reset_device()
-        elif iid_list[0].startswith("2.7."):
-            #esta mal, alterar depois
-            sensor_id = iid_list[0]
-            self.sampling_rates[sensor_id] = value_list[0]
-            print(f"    Sampling rate {sensor_id}: {value_list[0]}Hz")
+        # Unknown and read-only IIDs are ignored
+        for iid, value in zip(iid_list, value_list):
+            self.mib.set(iid, value)
 
         return LSNMPMessage(
             msg_type="response",
@@ -120,22 +375,10 @@ class LSNMPAgent:
 
     def _handle_get_request(self, data, addr):
         iid_list = data["iid_list"]
-        values = []
-
-        #Processa cada IID individualmente
-        for iid in iid_list:
-            if iid.startswith("1."):
-                value = self._get_device_value(iid)
-            elif iid.startswith("2.3."):
-                sensor_index = iid.split('.')[2]
-                sensor = self.sensors.get(sensor_index)  # ⬅️ Agora procura pelo índice correto
-                value = sensor.read() if sensor else None
-            elif iid.startswith("2."):
-                value = self._get_sensor_table_value(iid)
-            else:
-                value = None
-
-            values.append(value)
+
+        # One registry lookup per IID, unknown IIDs give None. Static objects
+        # come already encoded, the response just concatenates them
+        values = self.mib.get_many(iid_list, encoded=True, arguments=data["v_list"])
 
         message = LSNMPMessage(
             msg_type="response",
@@ -146,119 +389,56 @@ class LSNMPAgent:
 
     def _get_sensor_table_value(self, iid):
         """Obtem valores da sensor table"""
-        #Extrai o indice do sensor e o objeto
-        parts = iid.split('.')
-        if len(parts) != 3:
-            return None
-
-        structure, object_type, sensor_index = parts
-
-        sensor_value_iid = f"{sensor_index}"
-        sensor = self.sensors.get(sensor_index)
-        if sensor_value_iid not in self.sensors:
-            return None
-
-        # Retorna o valor beaseado no tipo de objeto
-        if object_type == "1":
-            return f"Sensor_{sensor_index}"
-
-        elif object_type == "2":
-            if sensor_index in self.sensors:
-                sensor = self.sensors[sensor_index]
-                return sensor.type
-            else:
-                return None
-
-        elif object_type == "4":
-            sensor = self.sensors.get(sensor_value_iid)
-            return sensor.min if sensor else None
-
-        elif object_type == "5":
-            sensor = self.sensors.get(sensor_value_iid)
-            return sensor.max if sensor else None
-
-        elif object_type == "6":
-            if hasattr(sensor, 'last_sample_time') and sensor.last_sample_time > 0:
-                elapsed_time = time.time() - sensor.last_sample_time
-                # Constrói o timestamp Type 1 manualmente: days:hours:mins:secs:ms
-                days = int(elapsed_time // 86400)
-                hours = int((elapsed_time % 86400) // 3600)
-                minutes = int((elapsed_time % 3600) // 60)
-                seconds = int(elapsed_time % 60)
-                milliseconds = int((elapsed_time * 1000) % 1000)
-                return f"{days}:{hours}:{minutes}:{seconds}:{milliseconds}"
-            else:
-                return "0:0:0:0:0"
-
-        elif object_type == "7":
-            sensor = self.sensors.get(sensor_value_iid)
-            return int(sensor.sampling_rate * 10) if sensor else None
+        return self.mib.get(iid)
+
+    def _read_sensor(self, sensor_index, max_age_ms=None):
+        """sensors.sampleValue: the last sample while it is fresh, a (shared) new read otherwise"""
+        max_age = max_age_ms / 1000 if isinstance(max_age_ms, int) and max_age_ms >= 0 else None
+        return self.sensor_bank.read_fresh(sensor_index, max_age)
+
+    def _get_sensor_history(self, column, sensor_index, selector=None):
+        """Samples stored for the sensor as one integer sequence, selected by the GET's V-List entry"""
+        if isinstance(selector, Timestamp):
+            samples = self.sensor_bank.history(sensor_index, since_ms=selector.to_epoch_ms())
+        elif isinstance(selector, int) and selector > 0:
+            samples = self.sensor_bank.history(sensor_index, last=selector)
         else:
-            return None
-
-    def _get_sensor_table_values(self, iid):
-        """Obtem valores de sensores table (2.1, 2.2, 2.4, 2.5, etc.)"""
-        #Estrai o indice do sensor e o objecto
-        parts = iid.split('.')
-        if len(parts) != 3:
-            return None
-
-        structure, object_type, sensor_index = parts
-
-        #Verifica se o sensor existe
-        sensor_value_iid = f"2.3.{sensor_index}"
-        if sensor_value_iid not in self.sensors:
-            return None
-
-        sensor = self.sensors[sensor_value_iid]
-
-        #Retorna o valor baseado no tipo de objeto
-        if object_type == "1":
-            return f"Sensor_{sensor_index}"
-        elif object_type == "2":
-            return "Virtual Sensor"
-        elif object_type == "4":
-            return sensor.min
-        elif object_type == "5":
-            return sensor.max
-        elif object_type == "6":
-            return self._get_current_timestamp()
-        elif object_type == "7":
-            return int(sensor.sampling_rate * 10)
+            samples = self.sensor_bank.history(sensor_index)
+        return samples[column] or EMPTY_SEQUENCE
+
+    def _get_last_sampling_time(self, sensor_index):
+        """sensors.lastSamplingTime: tempo desde a última amostra (Timestamp Type 1)"""
+        sensor = self.sensors[sensor_index]
+        if sensor.last_sample_time > 0:
+            elapsed_time = time.time() - sensor.last_sample_time
+            # Timestamp Type 1 (days:hours:mins:secs:ms) straight from the elapsed ms
+            return Uptime.from_ms(elapsed_time * 1000)
         else:
-            return None
+            return Uptime(0, 0, 0)
 
     def _reset_device(self):
         """Reset the device to default values"""
         print(" Device reset excuted")
         self.beacon_rate = 30
+        self.mib.invalidate("1.4")
         self.start_time = time.time()
         for sensor_iid, sensor in self.sensors.items():
             if "2.3.1" in sensor_iid:
-                sensor.sampling_rate = 1
+                self.set_sensor_sampling_rate(sensor_iid, 1)
             elif "2.3.2" in sensor_iid:
-                sensor.sampling_rate = 0.001
+                self.set_sensor_sampling_rate(sensor_iid, 0.001)
 
     def _get_current_timestamp(self):
-        """Retorna timestamp atual no formato day:month:year:hours:mins:secs:ms"""
-        now = datetime.now()
-        return f"{now.day}:{now.month}:{now.year}:{now.hour}:{now.minute}:{now.second}:{now.microsecond // 1000}"
+        """Retorna timestamp atual (Timestamp, str() da day:month:year:hours:mins:secs:ms)"""
+        return Timestamp.now()
 
     def _get_uptime(self):
-        """Retorna uptime no formato hours:mins:secs:ms"""
+        """Retorna uptime (Uptime, str() da days:hours:mins:secs:ms)"""
         uptime_seconds = time.time() - self.start_time
-
-        #Converte para horas, minutes, segundos, millissegundos
-        days = int(uptime_seconds // 86400)
-        hours = int((uptime_seconds % 86400) // 3600)
-        minutes = int((uptime_seconds % 3600) // 60)
-        seconds = int(uptime_seconds % 60)
-        milliseconds = int((uptime_seconds * 1000) % 1000)
-
-        return f"{days}:{hours}:{minutes}:{seconds}:{milliseconds}"
+        return Uptime.from_ms(uptime_seconds * 1000)
 
 class LSNMPMessage:
-    def __init__(self, msg_type, iid_list, value_list):
+    def __init__(self, msg_type, iid_list, value_list, template=None):
         self.tag = "LSNMPv2"
         self.type = msg_type
         self.timestamp = self._get_current_timestamp()
@@ -267,13 +447,20 @@ class LSNMPMessage:
         self.v_list = value_list
         self.t_list = []
         self.e_list = []
+        # Optional PDUTemplate with the same type/IID-List, used by encode_protocol
+        self.template = template
+        # Datagram size limit of encode_datagrams
+        self.max_size = None
 
     def _get_current_timestamp(self):
-        now = datetime.now()
-        return f"{now.day}:{now.month}:{now.year}:{now.hour}:{now.minute}:{now.second}:{now.microsecond//1000}"
+        # epoch ms, encoded by the codec without formatting/parsing text
+        return time.time_ns() // 1000000
 
     def encode_protocol(self):
         """Encoding with protocol"""
+        if self.template is not None:
+            # Returns a view of the template buffer, valid until the next render
+            return self.template.render(self.timestamp, self.msg_id, self.v_list)
         return encode_complete_pdu(
         msg_type=self.type,
         timestamp=self.timestamp,
@@ -284,6 +471,16 @@ class LSNMPMessage:
         e_list=self.e_list
         )
 
+    def encode_datagrams(self):
+        """
+        Encoded message as a list of datagrams, split at max_size when the
+        IID/V-Lists do not fit in one (coalesced notifications)
+        """
+        if self.template is not None or self.t_list or self.e_list:
+            return [self.encode_protocol()]
+        return encode_split_pdus(self.type, self.timestamp, self.msg_id, self.iid_list, self.v_list,
+                                 self.max_size)
+
     @classmethod
     def decode_protocol(cls, data):
         """Decoding with protocol"""
@@ -0,0 +1,185 @@
+import multiprocessing
+from functools import partial
+
+from Protocol.protocol import encode_static_value
+
+
+class MibTable:
+    """
+    Table of the L-MIB (IIDs structure.object.index). columns maps each object
+    id to (getter(key), setter(key, value) or None[, static[, query]]), rows
+    holds the indexes. The getters of query objects also take the argument the
+    manager sent with the IID, getter(key, argument).
+    """
+
+    def __init__(self, structure, columns):
+        self.structure = structure
+        self.columns = columns
+        self.rows = set()
+
+
+class MibRegistry:
+    """
+    IID -> bound (getter, setter) index of the agent's L-MIB.
+
+    Scalar objects (device group) are registered once at startup. Table cells
+    are bound the first time their IID is requested and cached, so a GET costs
+    one dict lookup per IID and the index only grows with the IIDs the
+    managers actually use. add_row/remove_row keep it in sync with the
+    sensors.
+
+    Objects registered as static (values that only change through a SET or a
+    reconfiguration of the agent) also keep their encoded V-List entry, so
+    get_many(..., encoded=True) hands out the cached bytes instead of encoding
+    them again. set() drops the entry it changes, invalidate() the others.
+
+    Query objects are read with an argument, the V-List entry that came with
+    their IID in the GET (None if there is none).
+
+    A shared registry (worker processes forked from one agent) counts its
+    changes in shared memory, each process drops its encoded values when
+    another one changed the MIB.
+    """
+
+    def __init__(self, cache_limit=65536, shared=False):
+        self.cache_limit = cache_limit
+        self._version = multiprocessing.Value('q', 0) if shared else None
+        self._seen_version = 0
+        self._entries = {}      # iid -> (getter() or getter(argument), setter(value) or None, static, query)
+        self._encoded = {}      # iid -> EncodedValue of the static objects
+        self._tables = {}       # structure -> MibTable
+        self._cached = 0
+
+    def register(self, iid, getter, setter=None, static=False):
+        """Scalar object, getter() returns its value, setter(value) changes it"""
+        self._entries[iid] = (getter, setter, static, False)
+        self._encoded.pop(iid, None)
+
+    def add_table(self, structure, columns):
+        self._tables[structure] = MibTable(structure, columns)
+
+    def add_row(self, structure, key):
+        self._tables[structure].rows.add(key)
+
+    def remove_row(self, structure, key):
+        table = self._tables[structure]
+        table.rows.discard(key)
+        for column in table.columns:
+            iid = f"{structure}.{column}.{key}"
+            self._encoded.pop(iid, None)
+            if self._entries.pop(iid, None) is not None:
+                self._cached -= 1
+
+    def resolve(self, iid):
+        """(getter, setter, static, query) bound to iid, None for an unknown IID"""
+        entry = self._entries.get(iid)
+        if entry is None:
+            entry = self._bind_cell(iid)
+            if entry is not None and self._cached < self.cache_limit:
+                self._entries[iid] = entry
+                self._cached += 1
+        return entry
+
+    def _bind_cell(self, iid):
+        parts = str(iid).split('.')
+        if len(parts) != 3:
+            return None
+        table = self._tables.get(parts[0])
+        if table is None:
+            return None
+        column = table.columns.get(parts[1])
+        key = parts[2]
+        if column is None or key not in table.rows:
+            return None
+        getter, setter, *flags = column
+        static = bool(flags and flags[0])
+        query = bool(flags[1:] and flags[1])
+        return partial(getter, key), (partial(setter, key) if setter else None), static and not query, query
+
+    def get(self, iid, argument=None):
+        """Value of iid, None if it is unknown"""
+        entry = self._entries.get(iid) or self.resolve(iid)
+        if entry is None:
+            return None
+        return entry[0](argument) if entry[3] else entry[0]()
+
+    def get_many(self, iid_list, encoded=False, arguments=()):
+        """
+        Values of the IIDs (None if unknown). With encoded=True the static
+        objects come as EncodedValue, ready for encode_v_list. arguments
+        (the request V-List) is matched by position with iid_list, for the
+        query objects.
+        """
+        entries = self._entries
+        values = []
+        if not encoded:
+            for i, iid in enumerate(iid_list):
+                entry = entries.get(iid) or self.resolve(iid)
+                if entry is None:
+                    values.append(None)
+                elif entry[3]:
+                    values.append(entry[0](arguments[i] if i < len(arguments) else None))
+                else:
+                    values.append(entry[0]())
+            return values
+
+        if self._version is not None and self._version.value != self._seen_version:
+            self._seen_version = self._version.value
+            self._encoded.clear()
+        cache = self._encoded
+        for i, iid in enumerate(iid_list):
+            value = cache.get(iid)
+            if value is None:
+                entry = entries.get(iid) or self.resolve(iid)
+                if entry is None:
+                    value = None
+                elif entry[2]:
+                    value = self._encode(iid, entry)
+                elif entry[3]:
+                    value = entry[0](arguments[i] if i < len(arguments) else None)
+                else:
+                    value = entry[0]()
+            values.append(value)
+        return values
+
+    def get_encoded(self, iid):
+        """Cached EncodedValue of a static object, the plain value for the others"""
+        return self.get_many((iid,), encoded=True)[0]
+
+    def _encode(self, iid, entry):
+        value = entry[0]()
+        try:
+            encoded = encode_static_value(value)
+        except ValueError:
+            return value    # encode_v_list reports it as before
+        if len(self._encoded) < self.cache_limit:
+            self._encoded[iid] = encoded
+        return encoded
+
+    def invalidate(self, iid):
+        """Drops the encoded value of iid (its value changed outside set())"""
+        self._encoded.pop(iid, None)
+        self._changed()
+
+    def invalidate_row(self, structure, key):
+        for column in self._tables[structure].columns:
+            self._encoded.pop(f"{structure}.{column}.{key}", None)
+        self._changed()
+
+    def _changed(self):
+        if self._version is not None:
+            with self._version.get_lock():
+                self._version.value += 1
+
+    def set(self, iid, value):
+        """Changes iid, False if it is unknown or read-only"""
+        entry = self._entries.get(iid) or self.resolve(iid)
+        if entry is None or entry[1] is None:
+            return False
+        entry[1](value)
+        self._encoded.pop(iid, None)
+        self._changed()
+        return True
+
+    def __contains__(self, iid):
+        return self.resolve(iid) is not None
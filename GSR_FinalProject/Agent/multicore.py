@@ -0,0 +1,86 @@
+"""
+Multi-core agent: N worker processes serve the same UDP port with
+SO_REUSEPORT, the kernel spreads the requests among them, so decrypting,
+decoding, handling, encoding and encrypting use every core.
+
+The agent is created once, before forking, with its device group and sensor
+table in a shared memory segment (LSNMPAgent(shared=True), Agent.shared):
+every worker reads the same values and sees the SETs handled by the others,
+and MibReaders can attach to the segment by name. Only worker 0 samples the
+sensors and sends the beacons and notifications.
+
+Linux (fork and SO_REUSEPORT). Run from GSR_FinalProject:
+    python -m Agent.multicore --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+
+from Agent.lsnmp_agent import LSNMPAgent
+from Agent.udp_server import UDPServer
+from Protocol.protocol import CryptoSession
+
+
+def _reseed(agent):
+    """The RNG states were forked with the agent, every worker would read the same "sensor" values"""
+    random.seed()
+    agent.sensor_bank.reseed()
+
+
+def _worker(index, agent, host, port, shared_key, crypto_mode, batch):
+    _reseed(agent)
+    emitter = index == 0
+    server = UDPServer(host, port, shared_key, crypto_mode, agent=agent, reuse_port=True, services=emitter,
+                       batch=batch)
+    if emitter:
+        agent._start_notification_loop()
+    server.start()
+
+
+def serve(workers=None, host='localhost', port=1161, shared_key="default_key_12345678", crypto_mode="ecb",
+          notification_window=0.0, segment_name=None, batch=False):
+    """Starts the workers (default: one per core) and waits for them"""
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise ValueError("SO_REUSEPORT is not available on this platform")
+    workers = workers or os.cpu_count() or 1
+    # no threads yet: the workers start theirs after the fork
+    agent = LSNMPAgent(notification_window, start_loop=False, shared=True, segment_name=segment_name)
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_worker, args=(index, agent, host, port, shared_key, crypto_mode, batch),
+                                 name=f"agent-worker-{index}", daemon=True)
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+    print(f"{workers} agent workers on {host}:{port}, L-MIB segment {agent.segment.name}")
+    # SIGTERM stops the workers too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        agent.segment.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m Agent.multicore", description="L-SNMPvS multi-core agent")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1161)
+    parser.add_argument("--crypto", choices=CryptoSession.MODES, default="ecb", help="must match the managers")
+    parser.add_argument("--notification-window", type=float, default=0.0,
+                        help="seconds, > 0 coalesces the samples due within it in one notification")
+    parser.add_argument("--segment", help="name of the shared memory segment (python -m Agent.shared <name> reads it)")
+    parser.add_argument("--batch", action="store_true",
+                        help="drain the ready requests in batches, without the per-request prints")
+    args = parser.parse_args()
+    serve(args.workers, args.host, args.port, crypto_mode=args.crypto, notification_window=args.notification_window,
+          segment_name=args.segment, batch=args.batch)
@@ -0,0 +1,63 @@
+import math
+
+
+class LatenessStats:
+    """Lateness of the samples (actual time - deadline, in seconds)"""
+
+    def __init__(self, late_threshold=0.005):
+        self.late_threshold = late_threshold
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.late = 0
+        self.max = 0.0
+        self.last = 0.0
+        # Welford running mean/variance, the jitter is the standard deviation
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def record(self, lateness):
+        self.count += 1
+        self.last = lateness
+        if lateness > self.max:
+            self.max = lateness
+        if lateness > self.late_threshold:
+            self.late += 1
+        delta = lateness - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (lateness - self._mean)
+
+    def record_many(self, latenesses):
+        """Records a batch (NumPy array), merged with Chan's parallel variance formula"""
+        count = len(latenesses)
+        if not count:
+            return
+        batch_mean = float(latenesses.mean())
+        batch_m2 = float(((latenesses - batch_mean) ** 2).sum())
+        total = self.count + count
+        delta = batch_mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += batch_m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.max = max(self.max, float(latenesses.max()))
+        self.late += int((latenesses > self.late_threshold).sum())
+        self.last = float(latenesses[-1])
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def jitter(self):
+        return math.sqrt(self._m2 / self.count) if self.count > 1 else 0.0
+
+    def snapshot(self):
+        return {
+            "samples": self.count,
+            "late": self.late,
+            "mean_ms": self._mean * 1000,
+            "max_ms": self.max * 1000,
+            "jitter_ms": self.jitter * 1000,
+            "last_ms": self.last * 1000,
+        }
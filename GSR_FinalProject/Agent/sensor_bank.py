@@ -0,0 +1,579 @@
+"""
+Columnar storage of the agent's virtual sensors (requires NumPy).
+
+Every sensor attribute is a column (one NumPy array per attribute, one row
+per sensor) instead of a VirtualSensor object per sensor. The due sensors
+come off a heap of (next due time, row), O(log n) per sample instead of a
+scan of every sensor per wakeup, and are rescheduled and sampled together
+with vectorized operations and one batched RNG call. SensorBank.sensors is a mapping of index -> SensorView, views with
+the VirtualSensor interface that read and write the bank's rows.
+
+Every sensor also has a reporting policy: REPORT_ALL notifies every sample,
+REPORT_DEADBAND only the samples that moved more than the deadband since the
+last reported one, or when the sensor has been silent for max_silence seconds
+(heartbeat). select_reports applies it to a batch of samples.
+
+Sensors with a block size (high-rate mode) collect their samples in an
+array instead, append_blocks hands out each block once it is full.
+
+Every read is also stored in the sensor's history: a ring buffer of the last
+history_size (time in epoch ms, value) samples, one row of two preallocated
+2-D arrays per sensor.
+
+read_fresh (the GETs) answers with the last sample while it is younger than
+the sampling period, and callers asking for the same stale sensor at the same
+time share one read, so many managers polling a slow sensor cost one read
+per period.
+"""
+import heapq
+import math
+from array import array
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import Future
+from contextlib import nullcontext
+
+import numpy as np
+
+from Agent.scheduler import LatenessStats
+from Agent.shared import SENSOR_COLUMNS, HISTORY_COLUMNS, read_unshared
+
+
+REPORT_ALL = 0
+REPORT_DEADBAND = 1
+
+
+class SensorBank:
+    """
+    Sensor state plus its sampling schedule (pop_due, wait, wake,
+    set_interval, remove, stats, len), keys are the sensor indexes
+    ("1", "2", ...). The next_due column is the schedule, the heap indexes
+    it: changing a rate pushes a new entry, the old one is skipped when it
+    reaches the top (its time no longer matches next_due).
+
+    pop_due takes every sensor due within `slack` seconds in the same pass, so
+    sensors with close deadlines are sampled together instead of waking the
+    loop once per sensor.
+
+    With a segment (Agent.shared.MibSegment) the columns are views of the
+    shared memory segment, fixed to its capacity, and the values the readers
+    see are written inside segment.writing(), reads of several fields go
+    through segment.snapshot() (seqlock). Sampling rates changed by
+    another process bump the segment's schedule counter, the heap is then
+    rebuilt from next_due.
+    """
+
+    def __init__(self, capacity=16, clock=time.monotonic, slack=0.001, late_threshold=0.005, seed=None,
+                 history_size=128, segment=None):
+        self.clock = clock
+        self.segment = segment
+        self._writing = segment.writing if segment is not None else nullcontext
+        self._snapshot = segment.snapshot if segment is not None else read_unshared
+        if segment is not None:
+            capacity, history_size = segment.capacity, segment.history_size
+        self.history_size = history_size
+        self.slack = slack
+        self.stats = LatenessStats(late_threshold)
+        self.sensors = SensorMapping(self)
+        self._rng = np.random.default_rng(seed)
+        self._condition = threading.Condition()
+        self._rows = {}         # sensor index -> row
+        self.keys = []          # row -> sensor index
+        self.type_names = []    # type code -> sensor type
+        self._type_codes = {}   # sensor type -> type code
+        self.count = 0
+        self.scheduled = 0
+        self.reported = 0
+        self.suppressed_total = 0
+        self.blocks = {}        # row -> [start time (epoch ms), array of samples]
+        self.fresh_reads = 0        # GETs answered with the last sample
+        self.coalesced_reads = 0    # GETs that waited for another caller's read
+        self._read_lock = threading.Lock()
+        self._in_flight = {}    # row -> Future of the read in progress
+        self._heap = []         # (next due time, row), may hold stale entries
+        self._schedule_seen = 0
+        # called (from any thread) when the next deadline may have changed,
+        # for loops that do not sleep in wait()
+        self.on_reschedule = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        if self.segment is not None:
+            if old:
+                raise ValueError(f"Shared sensor table is full ({old} sensors)")
+            for name, _ in SENSOR_COLUMNS + HISTORY_COLUMNS:
+                setattr(self, name, self.segment.column(name))
+        else:
+            for name, dtype in SENSOR_COLUMNS:
+                column = np.zeros(capacity, dtype=dtype)
+                if old:
+                    column[:old] = getattr(self, name)[:old]
+                setattr(self, name, column)
+            for name, dtype in HISTORY_COLUMNS:
+                ring = np.zeros((capacity, self.history_size), dtype=dtype)
+                if old:
+                    ring[:old] = getattr(self, name)[:old]
+                setattr(self, name, ring)
+        # rows that are not in use are never due
+        self.next_due[old:] = math.inf
+
+    # --- sensors -------------------------------------------------------------
+
+    def add_sensor(self, key, min_val=0, max_val=100, sampling_rate=1, sensor_type="Standard"):
+        """Adds a sensor (sampled from now on if sampling_rate > 0), returns its row"""
+        with self._condition:
+            if key in self._rows:
+                raise ValueError(f"Sensor already exists: {key}")
+            if self.count == len(self.min):
+                self._allocate(2 * len(self.min))
+            row = self.count
+            self.count += 1
+            self._rows[key] = row
+            self.keys.append(key)
+            type_code = self._type_codes.get(sensor_type)
+            if type_code is None:
+                type_code = self._type_codes[sensor_type] = len(self.type_names)
+                self.type_names.append(sensor_type)
+            with self._writing():
+                self.key[row] = key.encode()
+                self.type_name[row] = sensor_type.encode('utf-8')
+                self.type_code[row] = type_code
+                self.min[row] = min_val
+                self.max[row] = max_val
+                self.current_value[row] = self._rng.integers(min_val, max_val, endpoint=True)
+                # never reported: the first sample is always sent
+                self.last_report_time[row] = -math.inf
+                self._set_rate(row, sampling_rate, self.clock())
+                if self.segment is not None:
+                    self.segment.header["count"] = self.count
+            self._condition.notify()
+        if self.on_reschedule:
+            self.on_reschedule()
+        return row
+
+    def row(self, key):
+        return self._rows[key]
+
+    def reseed(self, seed=None):
+        """New RNG state (a forked process would otherwise repeat its parent's values)"""
+        self._rng = np.random.default_rng(seed)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def read(self, row):
+        """Reads one sensor (new random value between min and max)"""
+        value = int(self._rng.integers(self.min[row], self.max[row], endpoint=True))
+        with self._writing():
+            self.current_value[row] = value
+            self.last_sample_time[row] = now = time.time()
+            if self.history_size:
+                slot = self.history_count[row] % self.history_size
+                self.history_values[row, slot] = value
+                self.history_times[row, slot] = int(now * 1000)
+                self.history_count[row] += 1
+        return value
+
+    def read_many(self, rows):
+        """Reads several sensors with one RNG call, returns the values as ints"""
+        values = self._rng.integers(self.min[rows], self.max[rows], endpoint=True, dtype=np.int32)
+        with self._writing():
+            self.current_value[rows] = values
+            self.last_sample_time[rows] = now = time.time()
+            if self.history_size:
+                # rows are unique, one slot per row
+                slots = self.history_count[rows] % self.history_size
+                self.history_values[rows, slots] = values
+                self.history_times[rows, slots] = int(now * 1000)
+                self.history_count[rows] += 1
+        return values.tolist()
+
+    def read_fresh(self, key, max_age=None):
+        """
+        Value of a sensor at most max_age seconds old (default: its sampling
+        period), the last sample if it is recent enough, otherwise a new read
+        shared with every caller that asks for the sensor meanwhile
+        """
+        row = self._rows[key]
+        # value and sample time of the same sample (another process may be sampling)
+        limit, sample_time, value = self._snapshot(lambda: (
+            float(self.intervals[row]) if max_age is None else max_age,
+            float(self.last_sample_time[row]), int(self.current_value[row])))
+        if time.time() - sample_time < limit:
+            self.fresh_reads += 1
+            return value
+
+        with self._read_lock:
+            flight = self._in_flight.get(row)
+            waiting = flight is not None
+            if waiting:
+                self.coalesced_reads += 1
+            else:
+                flight = self._in_flight[row] = Future()
+        if waiting:
+            return flight.result()
+
+        try:
+            value = self.read(row)
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(value)
+        finally:
+            with self._read_lock:
+                del self._in_flight[row]
+        return value
+
+    def history(self, key, last=None, since_ms=None):
+        """
+        (times in epoch ms, values) of the sensor's stored samples, oldest first:
+        the last `last` ones and/or the ones taken at or after since_ms
+        """
+        row = self._rows[key]
+
+        def read_ring():
+            count = int(self.history_count[row])
+            stored = min(count, self.history_size)
+            slots = (np.arange(count - stored, count) % self.history_size) if stored else np.zeros(0, dtype=np.int64)
+            # fancy indexing copies, the ring may move on after the snapshot
+            return self.history_times[row, slots], self.history_values[row, slots]
+
+        times, values = self._snapshot(read_ring)
+        if since_ms is not None:
+            recent = times >= since_ms
+            times, values = times[recent], values[recent]
+        if last is not None:
+            start = max(len(times) - last, 0)
+            times, values = times[start:], values[start:]
+        return times.tolist(), values.tolist()
+
+    def set_sampling_rate(self, key, rate):
+        """Changes the sampling rate (Hz) and re-keys the sensor, rate 0 stops sampling it"""
+        with self._condition, self._writing():
+            self._set_rate(self._rows[key], rate, self.clock())
+            self._condition.notify()
+        if self.on_reschedule:
+            self.on_reschedule()
+
+    def _set_rate(self, row, rate, now):
+        was_scheduled = bool(self.next_due[row] != math.inf)
+        self.sampling_rate[row] = rate
+        if rate <= 0:
+            self.intervals[row] = 0
+            self.next_due[row] = math.inf
+        else:
+            interval = 1.0 / rate
+            if was_scheduled:
+                # next sample one new interval after the previous one, now if that already passed
+                self.next_due[row] = max(self.next_due[row] - self.intervals[row] + interval, now)
+            else:
+                self.next_due[row] = now
+            self.intervals[row] = interval
+        self.scheduled += int(rate > 0) - int(was_scheduled)
+        if self.segment is not None:
+            # every process sharing the segment (the sampling one included) rebuilds its heap
+            self.segment.header["schedule"] += 1
+            return
+        if rate > 0:
+            heapq.heappush(self._heap, (float(self.next_due[row]), row))
+        if len(self._heap) > 64 and len(self._heap) > 2 * self.scheduled:
+            # drop stale entries when they are the majority of the heap
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        next_due = self.next_due[:self.count]
+        rows = np.flatnonzero(next_due != math.inf)
+        self._heap = list(zip(next_due[rows].tolist(), rows.tolist()))
+        heapq.heapify(self._heap)
+
+    def _sync_schedule(self):
+        """Rebuilds the heap if a process sharing the segment changed a rate"""
+        if self.segment is not None:
+            schedule = int(self.segment.header["schedule"])
+            if schedule != self._schedule_seen:
+                self._schedule_seen = schedule
+                self._rebuild_heap()
+
+    # --- reporting policy ----------------------------------------------------
+
+    def set_report_policy(self, key, mode=None, deadband=None, deadband_pct=None, max_silence=None):
+        """
+        Changes the reporting policy of a sensor (None keeps a field):
+        mode REPORT_ALL or REPORT_DEADBAND, deadband in value units, deadband_pct
+        in percent of the sensor range (max - min), the larger of the two is
+        used, 0 for both reports any change. max_silence in seconds, 0 disables
+        the heartbeat.
+        """
+        row = self._rows[key]
+        if mode is not None and mode not in (REPORT_ALL, REPORT_DEADBAND):
+            raise ValueError(f"Invalid report mode: {mode}")
+        for name, value in (("deadband", deadband), ("deadband_pct", deadband_pct), ("max_silence", max_silence)):
+            if value is not None and value < 0:
+                raise ValueError(f"Invalid {name}: {value}")
+        with self._condition, self._writing():
+            if mode is not None:
+                self.report_mode[row] = mode
+            if deadband is not None:
+                self.deadband[row] = deadband
+            if deadband_pct is not None:
+                self.deadband_pct[row] = deadband_pct
+            if max_silence is not None:
+                self.max_silence[row] = max_silence
+
+    def select_reports(self, rows, now=None):
+        """
+        Applies the reporting policy to rows just read (read_many). Returns the
+        mask of the samples to notify, the others are counted as suppressed.
+        """
+        if now is None:
+            now = self.clock()
+        report = self.report_mode[rows] == REPORT_ALL
+        policy = ~report
+        if policy.any():
+            checked = rows[policy]
+            delta = np.abs(self.current_value[checked].astype(np.int64) - self.last_reported_value[checked])
+            span = self.max[checked].astype(np.int64) - self.min[checked]
+            threshold = np.maximum(self.deadband[checked], self.deadband_pct[checked] * span / 100)
+            silence = self.max_silence[checked]
+            last_report = self.last_report_time[checked]
+            report[policy] = ((delta > threshold) | (last_report == -math.inf)
+                              | ((silence > 0) & (now - last_report >= silence)))
+        reported_rows = rows[report]
+        suppressed_rows = rows[~report]
+        with self._writing():
+            self.last_reported_value[reported_rows] = self.current_value[reported_rows]
+            self.last_report_time[reported_rows] = now
+            self.suppressed[suppressed_rows] += 1
+        self.reported += len(reported_rows)
+        self.suppressed_total += len(suppressed_rows)
+        return report
+
+    # --- sample blocks (high-rate mode) ---------------------------------------
+
+    def set_block_size(self, key, block_size):
+        """
+        Samples per block, 0 notifies every sample. Returns the partial block
+        (row, start ms, samples) collected with the previous size, or None.
+        """
+        if not 0 <= block_size <= 65535:
+            raise ValueError(f"Invalid block size: {block_size}")
+        row = self._rows[key]
+        with self._writing():
+            self.block_size[row] = block_size
+        return self.flush_block(key)
+
+    def flush_block(self, key):
+        """Removes the block being collected, (row, start ms, samples) or None if empty"""
+        row = self._rows[key]
+        block = self.blocks.pop(row, None)
+        return None if block is None else (row, block[0], block[1])
+
+    def append_blocks(self, rows):
+        """
+        Adds the last sample of each row (read_many) to its block, returns the
+        blocks that became full as (row, start ms, samples)
+        """
+        blocks = self.blocks
+        block_sizes = self.block_size
+        full = []
+        for row, value, sample_time in zip(rows.tolist(), self.current_value[rows].tolist(),
+                                           self.last_sample_time[rows].tolist()):
+            block = blocks.get(row)
+            if block is None:
+                block = blocks[row] = [int(sample_time * 1000), array('i')]
+            samples = block[1]
+            samples.append(value)
+            if len(samples) >= block_sizes[row]:
+                full.append((row, block[0], samples))
+                del blocks[row]
+        return full
+
+    # --- scheduling ----------------------------------------------------------
+
+    def __len__(self):
+        return self.scheduled
+
+    def set_interval(self, key, interval):
+        self.set_sampling_rate(key, 1.0 / interval)
+
+    def remove(self, key):
+        self.set_sampling_rate(key, 0)
+
+    def interval(self, key):
+        return float(self.intervals[self._rows[key]]) or None
+
+    def next_deadline(self):
+        with self._condition:
+            return self._next_deadline()
+
+    def _next_deadline(self):
+        self._sync_schedule()
+        heap = self._heap
+        next_due = self.next_due
+        while heap:
+            due, row = heap[0]
+            if next_due[row] == due:
+                return due
+            heapq.heappop(heap)     # re-keyed or stopped
+        return None
+
+    def pop_due_rows(self, now=None):
+        """Rows of the due sensors (popped from the heap), each rescheduled"""
+        with self._condition:
+            if now is None:
+                now = self.clock()
+            self._sync_schedule()
+            heap = self._heap
+            next_due = self.next_due
+            limit = now + self.slack
+            popped = {}     # row -> due (a rate set twice to the same deadline leaves two valid entries)
+            while heap and heap[0][0] <= limit:
+                due, row = heapq.heappop(heap)
+                if next_due[row] == due:
+                    popped[row] = due
+            rows = np.array(sorted(popped), dtype=np.intp)
+            if rows.size:
+                with self._writing():
+                    # another process may have changed (or stopped) a rate since the pop
+                    due = np.array([popped[row] for row in rows.tolist()])
+                    rows = rows[next_due[rows] == due]
+                    due = next_due[rows]
+                    intervals = self.intervals[rows]
+                    following = due + intervals
+                    # more than one interval behind: restart from now instead of catching up
+                    behind = following <= now
+                    following[behind] = now + intervals[behind]
+                    next_due[rows] = following
+                self.stats.record_many(now - due)
+                for entry in zip(following.tolist(), rows.tolist()):
+                    heapq.heappush(heap, entry)
+        return rows
+
+    def pop_due(self, now=None):
+        keys = self.keys
+        return [keys[row] for row in self.pop_due_rows(now).tolist()]
+
+    def wait(self, timeout=None):
+        """Sleeps until the next deadline (at most timeout), woken by rate changes"""
+        with self._condition:
+            deadline = self._next_deadline()
+            delay = timeout if deadline is None else max(deadline - self.clock(), 0.0)
+            if timeout is not None and delay is not None:
+                delay = min(delay, timeout)
+            if delay is None or delay > 0:
+                self._condition.wait(delay)
+
+    def wake(self):
+        with self._condition:
+            self._condition.notify_all()
+        if self.on_reschedule:
+            self.on_reschedule()
+
+
+class SensorView:
+    """One row of a SensorBank with the VirtualSensor attributes and methods"""
+
+    __slots__ = ("bank", "row")
+
+    def __init__(self, bank, row):
+        self.bank = bank
+        self.row = row
+
+    @property
+    def min(self):
+        return int(self.bank.min[self.row])
+
+    @property
+    def max(self):
+        return int(self.bank.max[self.row])
+
+    @property
+    def type(self):
+        return self.bank.type_names[self.bank.type_code[self.row]]
+
+    @property
+    def current_value(self):
+        return int(self.bank.current_value[self.row])
+
+    @property
+    def last_sample(self):
+        # the bank samples and reads in the same pass, one time column for both
+        return float(self.bank.last_sample_time[self.row])
+
+    @property
+    def last_sample_time(self):
+        return float(self.bank.last_sample_time[self.row])
+
+    @property
+    def sampling_rate(self):
+        return float(self.bank.sampling_rate[self.row])
+
+    @sampling_rate.setter
+    def sampling_rate(self, new_rate):
+        self.set_sampling_rate(new_rate)
+
+    @property
+    def report_mode(self):
+        return int(self.bank.report_mode[self.row])
+
+    @property
+    def deadband(self):
+        return int(self.bank.deadband[self.row])
+
+    @property
+    def deadband_pct(self):
+        return float(self.bank.deadband_pct[self.row])
+
+    @property
+    def max_silence(self):
+        return float(self.bank.max_silence[self.row])
+
+    @property
+    def suppressed(self):
+        """Samples not notified because of the reporting policy"""
+        return int(self.bank.suppressed[self.row])
+
+    @property
+    def block_size(self):
+        return int(self.bank.block_size[self.row])
+
+    def read(self):
+        return self.bank.read(self.row)
+
+    def should_sample(self, current_time):
+        return current_time - self.last_sample >= (1.0 / self.sampling_rate)
+
+    def update_last_sample(self, current_time):
+        self.bank.last_sample_time[self.row] = current_time
+
+    def set_sampling_rate(self, new_rate):
+        self.bank.set_sampling_rate(self.bank.keys[self.row], new_rate)
+
+    def __repr__(self):
+        return f"SensorView({self.bank.keys[self.row]!r}, type={self.type!r})"
+
+
+class SensorMapping(Mapping):
+    """Read-only dict-like index -> SensorView, views are created on access"""
+
+    def __init__(self, bank):
+        self._bank = bank
+
+    def __getitem__(self, key):
+        return SensorView(self._bank, self._bank._rows[key])
+
+    def get(self, key, default=None):
+        row = self._bank._rows.get(key)
+        return default if row is None else SensorView(self._bank, row)
+
+    def __contains__(self, key):
+        return key in self._bank._rows
+
+    def __iter__(self):
+        return iter(self._bank.keys)
+
+    def __len__(self):
+        return self._bank.count
@@ -0,0 +1,256 @@
+"""
+Shared-memory L-MIB segment: the device group (1.x) and the sensor table
+(2.x) of an agent in a fixed-layout multiprocessing.shared_memory block.
+
+Layout: a header (layout magic, seqlock sequence, capacity, number of
+sensors, history size, device fields) followed by one array per sensor
+column (SENSOR_COLUMNS, `capacity` rows each, 8-byte aligned) and the two
+history rings (capacity x history_size). Everything is derived from the
+header, so another process attaches by name and maps the same arrays,
+without IPC or copies.
+
+The agent's SensorBank and device fields are views of the segment. Writers
+(the agent's processes, serialized by a lock) bump the sequence to an odd
+number before changing a group of fields and back to even after it, readers
+retry until they saw the same even sequence before and after reading
+(seqlock), so a snapshot never mixes two updates.
+
+Readers, from GSR_FinalProject:
+    python -m Agent.shared <segment name>
+"""
+import multiprocessing
+import sys
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+LAYOUT_MAGIC = b'LMIBSHM2'
+
+HEADER = np.dtype([
+    ("magic", "S8"), ("sequence", "<u8"),
+    # bumped when a sampling deadline changes, the sampling process rebuilds its heap
+    ("schedule", "<u8"),
+    ("capacity", "<u4"), ("count", "<u4"), ("history_size", "<u4"), ("op_status", "<u4"),
+    ("lmib_id", "<i8"), ("beacon_rate", "<f8"), ("start_time", "<f8"),
+    ("device_id", "S32"), ("device_type", "S32"),
+], align=True)
+
+# SensorBank columns, in segment order
+SENSOR_COLUMNS = [
+    ("key", "S16"), ("type_name", "S32"),
+    ("min", np.int32), ("max", np.int32), ("current_value", np.int32), ("type_code", np.uint16),
+    ("sampling_rate", np.float64), ("intervals", np.float64), ("next_due", np.float64),
+    ("last_sample_time", np.float64),
+    # reporting policy and its state
+    ("report_mode", np.uint8), ("deadband", np.int32), ("deadband_pct", np.float64),
+    ("max_silence", np.float64), ("last_reported_value", np.int32), ("last_report_time", np.float64),
+    ("suppressed", np.int64), ("block_size", np.uint16),
+    # samples written to the history ring (the next slot is history_count % history_size)
+    ("history_count", np.int64),
+]
+HISTORY_COLUMNS = [("history_values", np.int32), ("history_times", np.int64)]
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def _layout(capacity, history_size):
+    """name -> (offset, shape, dtype) of every array, and the segment size"""
+    arrays = {}
+    offset = _align(HEADER.itemsize)
+    for name, dtype in SENSOR_COLUMNS:
+        dtype = np.dtype(dtype)
+        arrays[name] = (offset, (capacity,), dtype)
+        offset = _align(offset + capacity * dtype.itemsize)
+    for name, dtype in HISTORY_COLUMNS:
+        dtype = np.dtype(dtype)
+        arrays[name] = (offset, (capacity, history_size), dtype)
+        offset = _align(offset + capacity * history_size * dtype.itemsize)
+    return arrays, offset
+
+
+def read_unshared(read):
+    """snapshot() of state that is not in a segment: read() as it is"""
+    return read()
+
+
+class MibSegment:
+    """
+    The segment of one agent. create() makes a new one (the agent), attach()
+    maps an existing one (readers). header is a 0-d structured array, column()
+    returns the sensor arrays.
+    """
+
+    def __init__(self, memory, lock=None):
+        self.memory = memory
+        self.name = memory.name
+        self.header = np.ndarray((), HEADER, buffer=memory.buf)
+        if self.header["magic"].item() != LAYOUT_MAGIC:
+            raise ValueError(f"Not an L-MIB segment: {memory.name}")
+        self.capacity = int(self.header["capacity"])
+        self.history_size = int(self.header["history_size"])
+        arrays, _ = _layout(self.capacity, self.history_size)
+        self._columns = {name: np.ndarray(shape, dtype, buffer=memory.buf, offset=offset)
+                         for name, (offset, shape, dtype) in arrays.items()}
+        self._lock = lock
+
+    @classmethod
+    def create(cls, capacity=64, history_size=128, name=None):
+        """New zeroed segment for `capacity` sensors (it does not grow)"""
+        _, size = _layout(capacity, history_size)
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), HEADER, buffer=memory.buf)
+        header["capacity"] = capacity
+        header["history_size"] = history_size
+        header["magic"] = LAYOUT_MAGIC
+        del header
+        # writers in forked processes share the lock
+        return cls(memory, multiprocessing.Lock())
+
+    @classmethod
+    def attach(cls, name):
+        """Maps the segment of a running agent (read only use)"""
+        # the creator owns the segment: this process must not unlink it when it exits
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:   # before Python 3.13 every attach is tracked
+            memory = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return cls(memory)
+
+    def column(self, name):
+        return self._columns[name]
+
+    @contextmanager
+    def writing(self):
+        """Changes of several fields, seen all together by the readers"""
+        header = self.header
+        with self._lock:
+            header["sequence"] += 1
+            try:
+                yield
+            finally:
+                header["sequence"] += 1
+
+    def snapshot(self, read):
+        """read() with every field it reads from the same version of the segment"""
+        header = self.header
+        while True:
+            start = int(header["sequence"])
+            if start & 1:
+                time.sleep(0)   # a writer is half way
+                continue
+            result = read()
+            if int(header["sequence"]) == start:
+                return result
+
+    def close(self):
+        # the arrays are views of the buffer, they go first
+        self.header = None
+        self._columns = {}
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+# sensors table objects: column, conversion (same values as the agent's GETs, 2.6 in seconds)
+_SENSOR_OBJECTS = {
+    "2.1": ("key", lambda key: f"Sensor_{key.decode()}"),
+    "2.2": ("type_name", lambda name: name.decode('utf-8')),
+    "2.3": ("current_value", int),
+    "2.4": ("min", int),
+    "2.5": ("max", int),
+    "2.6": ("last_sample_time", lambda last: time.time() - float(last) if last > 0 else 0.0),
+    "2.7": ("sampling_rate", lambda rate: int(rate * 10)),
+    "2.8": ("report_mode", int),
+    "2.9": ("deadband", int),
+    "2.10": ("deadband_pct", int),
+    "2.11": ("max_silence", int),
+    "2.12": ("suppressed", int),
+    "2.13": ("block_size", int),
+}
+
+
+class MibReader:
+    """
+    Reads an agent's L-MIB from its segment, in any process: get(iid) for
+    one object, device() and sensor(key) for consistent snapshots of a group.
+    """
+
+    def __init__(self, name):
+        self.segment = MibSegment.attach(name)
+        self._rows = {}
+
+    def device(self):
+        """Device group 1.1-1.9 (1.6 and 1.7 as epoch seconds and seconds of uptime)"""
+        header = self.segment.header
+
+        def read():
+            return {
+                "1.1": int(header["lmib_id"]),
+                "1.2": header["device_id"].item().decode(),
+                "1.3": header["device_type"].item().decode(),
+                "1.4": int(header["beacon_rate"]),
+                "1.5": int(header["count"]),
+                "1.6": time.time(),
+                "1.7": time.time() - float(header["start_time"]),
+                "1.8": int(header["op_status"]),
+                "1.9": 0,
+            }
+        return self.segment.snapshot(read)
+
+    def _row(self, key):
+        row = self._rows.get(key)
+        if row is None:
+            # sensors are only added, the rows already known never move
+            keys = self.segment.column("key")[:int(self.segment.header["count"])]
+            self._rows = {bytes(k).decode(): row for row, k in enumerate(keys.tolist())}
+            row = self._rows.get(key)
+            if row is None:
+                raise ValueError(f"Unknown sensor: {key}")
+        return row
+
+    def sensor(self, key):
+        """Sensor table row 2.1-2.13 of a sensor"""
+        row = self._row(key)
+        columns = [(obj, self.segment.column(name), convert) for obj, (name, convert) in _SENSOR_OBJECTS.items()]
+        return self.segment.snapshot(lambda: {obj: convert(column[row]) for obj, column, convert in columns})
+
+    def sensors(self):
+        """Indexes of the agent's sensors"""
+        keys = self.segment.column("key")[:int(self.segment.header["count"])]
+        return [bytes(key).decode() for key in keys.tolist()]
+
+    def get(self, iid):
+        """Value of a 1.x or 2.x.<sensor> IID"""
+        parts = str(iid).split('.')
+        if len(parts) == 2 and parts[0] == "1":
+            return self.device().get(str(iid))
+        if len(parts) == 3 and parts[0] == "2":
+            obj = _SENSOR_OBJECTS.get(f"2.{parts[1]}")
+            if obj is None:
+                raise ValueError(f"Unknown IID: {iid}")
+            name, convert = obj
+            column = self.segment.column(name)
+            row = self._row(parts[2])
+            return self.segment.snapshot(lambda: convert(column[row]))
+        raise ValueError(f"Unknown IID: {iid}")
+
+    def close(self):
+        self.segment.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m Agent.shared <segment name>")
+        sys.exit(2)
+    reader = MibReader(sys.argv[1])
+    for iid, value in reader.device().items():
+        print(f"{iid:>6}  {value}")
+    for key in reader.sensors():
+        print(f"\nSensor {key}")
+        for iid, value in reader.sensor(key).items():
+            print(f"{iid}.{key:<4}  {value}")
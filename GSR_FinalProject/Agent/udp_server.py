@@ -1,4 +1,5 @@
 import socket
+import selectors
 import threading
 import json
 import time
@@ -6,56 +7,251 @@ import hashlib
 
 
 from Agent.lsnmp_agent import LSNMPAgent
-from Protocol.protocol import encode_complete_pdu, decode_complete_pdu, encrypt, decrypt
+from Protocol.protocol import (encode_complete_pdu, decode_complete_pdu, encrypt, decrypt, CryptoSession,
+                               ReceiveBuffers, MAX_DATAGRAM_SIZE)
+
+
+def open_request(crypto, data, addr, verbose=True):
+    """Decoded request of a datagram, None if it is forged/corrupted"""
+    try:
+        # Forged/corrupted datagrams are dropped before any decoding
+        data = crypto.open(data)
+    except ValueError as e:
+        if verbose:
+            print(f"Rejected datagram from {addr}: {e}")
+        return None
+    try:
+        request_data = decode_complete_pdu(data)
+        #print(f"   📦 Request IIDs: {request_data['iid_list']}")
+        if verbose:
+            print(f"        DATA: {request_data}")
+        return request_data
+    except Exception as e:
+        print(f"Error handling request: {e}")
+        return None
+
+def handle_message(agent, request_data, addr):
+    """Response message of the agent to a decoded request (not encoded yet)"""
+    #Verifica se é get ou set
+    if request_data['type'] == 'set-request':
+        return agent._handle_set_request(request_data, addr)
+    return agent._handle_get_request(request_data, addr)
+
+def build_response(agent, crypto, request_data, addr, out=None, verbose=True):
+    """
+    Sealed response of the agent to a decoded request, None if it fails.
+    out: seal into this buffer and return the view of it that was written
+    (default: a view of the crypto session buffer).
+    """
+    try:
+        response_data = handle_message(agent, request_data, addr).encode_protocol()
+        if out is None:
+            response_data = crypto.seal(response_data)
+        else:
+            response_data = out[:crypto.seal_into(response_data, out)]
+        if verbose:
+            print("Message= ", bytes(response_data))
+        return response_data
+    except Exception as e:
+        print(f"Error handling request: {e}")
+        return None
+
+
+class BatchStats:
+    """Syscalls and time of the batched receive loop, per wakeup and per datagram"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.wakeups = 0
+        self.datagrams = 0
+        self.responses = 0
+        self.dropped = 0
+        self.max_batch = 0
+        # batches of 1, 2-3, 4-7, 8-15...
+        self.histogram = {}
+        self.syscalls = 0
+        self.busy_ns = 0
+
+    def record(self, batch, responses, dropped, syscalls, busy_ns):
+        self.wakeups += 1
+        self.datagrams += batch
+        self.responses += responses
+        self.dropped += dropped
+        self.syscalls += syscalls
+        self.busy_ns += busy_ns
+        if batch > self.max_batch:
+            self.max_batch = batch
+        if batch:
+            low = 1 << (batch.bit_length() - 1)
+            self.histogram[low] = self.histogram.get(low, 0) + 1
+
+    def snapshot(self):
+        wakeups = self.wakeups or 1
+        datagrams = self.datagrams or 1
+        return {
+            "wakeups": self.wakeups,
+            "datagrams": self.datagrams,
+            "responses": self.responses,
+            "dropped_responses": self.dropped,
+            "mean_batch": self.datagrams / wakeups,
+            "max_batch": self.max_batch,
+            "batch_histogram": {(f"{low}" if low == 1 else f"{low}-{2 * low - 1}"): count
+                                for low, count in sorted(self.histogram.items())},
+            "syscalls_per_wakeup": self.syscalls / wakeups,
+            "syscalls_per_datagram": self.syscalls / datagrams,
+            "us_per_wakeup": self.busy_ns / wakeups / 1000,
+            "us_per_datagram": self.busy_ns / datagrams / 1000,
+        }
 
 
 class UDPServer:
-    def __init__(self, host='localhost', port=1161, shared_key="default_key_12345678"):
+    def __init__(self, host='localhost', port=1161, shared_key="default_key_12345678", crypto_mode="ecb",
+                 notification_window=0.0, agent=None, reuse_port=False, services=True, batch=False,
+                 max_batch=64, max_datagram=MAX_DATAGRAM_SIZE):
+        """
+        agent: serve an existing agent (the workers of Agent.multicore share one).
+        reuse_port: bind with SO_REUSEPORT, several servers on the same port.
+        services: False does not send beacons (the agent's notifications still go out).
+        batch: high-throughput mode, every wakeup drains up to max_batch
+        ready datagrams with non-blocking receives into preallocated buffers,
+        handles them and then sends all the responses, without the
+        per-request prints. get_io_stats() has its counters.
+        max_datagram: larger requests are counted and dropped.
+        """
         self.host = host
         self.port = port
-        self.agent = LSNMPAgent()
+        self.reuse_port = reuse_port
+        self.batch = batch
+        self.max_batch = max_batch
+        self.io_stats = BatchStats()
+        # requests are received into reusable buffers and handled as views of them
+        self.buffers = ReceiveBuffers(max_datagram, max_batch if batch else 1)
+        # notification_window > 0: samples due within it go in one notification
+        self.agent = agent if agent is not None else LSNMPAgent(notification_window)
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         #Socket para enviar beacons
         self.beacon_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.beacon_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         self.key = hashlib.sha256(shared_key.encode()).digest()[:16]
+        # "ecb" (legacy) or "aead" (authenticated), must match the managers
+        self.crypto = CryptoSession(self.key, crypto_mode)
 
         self.running = True
-        self._start_beacon_service()
+        if services:
+            self._start_beacon_service()
         self.agent.set_notification_callback(self.handle_sensor_notification)
 
     def start(self):
         try:
+            if self.reuse_port:
+                # the kernel spreads the datagrams among the sockets bound to the port
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             self.socket.bind((self.host, self.port))
             print(f"UDP Server running on {self.host}:{self.port}")
 
+            if self.batch:
+                return self._serve_batches()
             while True:
-                data, addr = self.socket.recvfrom(1024)
+                data, addr = self.buffers.recvfrom(self.socket)
+                if data is None:
+                    print(f"Dropped datagram from {addr}: larger than {self.buffers.max_datagram} bytes")
+                    continue
                 self.handle_request(data, addr)
         except Exception as e:
             print(f"Error starting upd server: {e}")
 
-    def handle_request(self, data, addr):
-        try:
-            data = decrypt(data, self.key)
-            request_data = decode_complete_pdu(data)
-            iid_list = request_data['iid_list']
-            #print(f"   📦 Request IIDs: {iid_list}")
-            print(f"        DATA: {request_data}")
+    def _serve_batches(self):
+        """Receive loop of the batch mode: one wait per wakeup, then drain, handle, flush"""
+        # the receive pool has a buffer per datagram of a batch
+        # responses of a batch are sealed one after the other in the arena,
+        # it is flushed early if the next one might not fit
+        largest = self.crypto.max_size + self.crypto.overhead
+        arena = memoryview(bytearray(4 * largest))
+        received = [None] * self.max_batch
+        pending = []
+        self.socket.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(self.socket, selectors.EVENT_READ)
+        while self.running:
+            if not selector.select():
+                continue
+            started = time.perf_counter_ns()
+            syscalls = 1
+            # 1. drain every ready datagram
+            count = 0
+            while count < self.max_batch:
+                syscalls += 1
+                try:
+                    data, addr = self.buffers.recvfrom(self.socket)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    # e.g. ICMP port unreachable of an earlier response
+                    continue
+                if data is None:
+                    continue
+                received[count] = (data, addr)
+                count += 1
+            # 2. handle them
+            offset = 0
+            sent = dropped = 0
+            for index in range(count):
+                data, addr = received[index]
+                request_data = open_request(self.crypto, data, addr, verbose=False)
+                if request_data is None:
+                    continue
+                if len(arena) - offset < largest:
+                    flushed, failed, calls = self._flush(pending)
+                    sent += flushed
+                    dropped += failed
+                    syscalls += calls
+                    offset = 0
+                response = build_response(self.agent, self.crypto, request_data, addr, arena[offset:], verbose=False)
+                if response is not None:
+                    pending.append((response, addr))
+                    offset += len(response)
+            # 3. send the responses together
+            flushed, failed, calls = self._flush(pending)
+            self.io_stats.record(count, sent + flushed, dropped + failed, syscalls + calls,
+                                 time.perf_counter_ns() - started)
+        selector.close()
 
-            #Verifica se é get ou set
-            if request_data['type'] == 'set-request':
-                message = self.agent._handle_set_request(request_data, addr)
-            else:
-                message = self.agent._handle_get_request(request_data, addr)
+    def _flush(self, pending):
+        """Sends and clears the pending (response, addr), returns sent, dropped, syscalls"""
+        sent = dropped = 0
+        for response, addr in pending:
+            try:
+                self.socket.sendto(response, addr)
+                sent += 1
+            except OSError:
+                # full socket buffer (non-blocking) or unreachable manager, UDP drops it
+                dropped += 1
+        pending.clear()
+        return sent, dropped, sent + dropped
 
-            response_data = message.encode_protocol()
-            response_data = encrypt(response_data, self.key)
-            print("Message= ", response_data)
+    def get_io_stats(self):
+        """
+        Counters of the batch mode (batch sizes, syscalls and time per
+        wakeup/datagram) and of the received/oversize datagrams
+        """
+        stats = self.io_stats.snapshot()
+        stats["received"] = self.buffers.received
+        stats["oversize"] = self.buffers.oversize
+        return stats
 
+    def handle_request(self, data, addr):
+        request_data = open_request(self.crypto, data, addr)
+        if request_data is None:
+            return
+        response_data = build_response(self.agent, self.crypto, request_data, addr)
+        if response_data is None:
+            return
+        try:
             # 4. Envia via UDP
             self.socket.sendto(response_data, addr)
-        except Exception as e:
+        except OSError as e:
             print(f"Error handling request: {e}")
 
     def handle_sensor_notification(self, notification_msg):
@@ -65,8 +261,10 @@ class UDPServer:
             #print(f"   🆔 Sensor: {notification_msg.iid_list[0]}")
             #print(f"   💾 Value: {notification_msg.v_list[0]}")
 
-            encoded_notification = notification_msg.encode_protocol()
-            self.beacon_socket.sendto(encoded_notification, ('<broadcast>', 1163))
+            # Rendered from the sensor's PDUTemplate (view of a reused buffer),
+            # coalesced notifications may take more than one datagram
+            for encoded_notification in notification_msg.encode_datagrams():
+                self.beacon_socket.sendto(encoded_notification, ('<broadcast>', 1163))
             #print(f"    Sensor notification broadcasted to managers")
         except Exception as e:
             print(f"X Error in sensor notification callback: {e}")
@@ -86,6 +284,7 @@ class UDPServer:
             if beacon_rate > 0:
                 try:
                     beacon_msg = self.agent.generate_beacon()
+                    # Beacon PDU is rendered from the agent's pre-encoded template
                     encoded_beacon = beacon_msg.encode_protocol()
                     self.beacon_socket.sendto(encoded_beacon, ('<broadcast>', 1163))
                     print(f"Beacon enviado (rate: {beacon_rate}s)")
@@ -0,0 +1,146 @@
+"""
+Columnar batch decoding of single sensor notifications (requires NumPy).
+
+The agent's sensor notifications always have the same layout: tag, type,
+timestamp, MSG-ID, one 3-part IID (2.3.x), one integer value and empty
+T/E lists. Packets with that layout are decoded with one structured dtype
+frombuffer pass per integer width; anything else falls back to
+decode_complete_pdu.
+"""
+import numpy as np
+
+from Protocol.protocol import PROTOCOL_TAG, TYPE_MAP, decode_complete_pdu
+
+_NOTIFICATION = TYPE_MAP["notification"]
+_IID_3_PARTS = 0b01000001
+
+
+def _notification_dtype(value_format):
+    # timestamp is packed in native byte order (struct '3H'), everything else big-endian
+    return np.dtype([
+        ('tag', 'S8'),
+        ('type', 'u1'),
+        ('secs_ms', '=u2'),
+        ('hours_mins', '=u2'),
+        ('date', '=u2'),
+        ('msg_id', '>u8'),
+        ('n_iids', 'u1'),
+        ('iid_type', 'u1'),
+        ('structure', 'u1'),
+        ('object_id', 'u1'),
+        ('sensor_index', '>u2'),
+        ('n_values', 'u1'),
+        ('value_type', 'u1'),
+        ('value', value_format),
+        ('n_timestamps', 'u1'),
+        ('n_errors', 'u1'),
+    ])
+
+# packet length -> (value type byte, structured dtype), one per integer width
+LAYOUTS = {}
+for _value_type, _value_format in ((0b00000100, 'i1'), (0b00000101, '>i2'),
+                                   (0b00000110, '>i4'), (0b00000111, '>i8')):
+    _dtype = _notification_dtype(_value_format)
+    LAYOUTS[_dtype.itemsize] = (_value_type, _dtype)
+del _value_type, _value_format, _dtype
+
+# offset of the value type byte, the same for every layout
+_VALUE_TYPE_OFFSET = 30
+
+
+class NotificationBatch:
+    """
+    Columns of a decoded batch, in input order. positions holds the index of
+    each row in the input packets, fallback holds (position, decoded dict) for
+    the packets that did not match the fixed layout.
+    """
+
+    def __init__(self, positions, sensor_index, value, msg_id, secs_ms, hours_mins, date, fallback):
+        self.positions = positions
+        self.sensor_index = sensor_index
+        self.value = value
+        self.msg_id = msg_id
+        self.secs_ms = secs_ms
+        self.hours_mins = hours_mins
+        self.date = date
+        self.fallback = fallback
+
+    def __len__(self):
+        return len(self.positions)
+
+    def timestamp_fields(self):
+        """Timestamp Type 0 fields as arrays (day, month, year, hour, minute, second, ms)"""
+        return {
+            'day': self.date & 0x1F,
+            'month': (self.date >> 5) & 0xF,
+            'year': (self.date >> 9).astype(np.int32) + 2000,
+            'hour': self.hours_mins // 60,
+            'minute': self.hours_mins % 60,
+            'second': self.secs_ms // 1000,
+            'ms': self.secs_ms % 1000,
+        }
+
+
+def decode_notification_batch(packets, strict=False):
+    """
+    Decodes many notification PDUs into columns. Packets that don't match
+    the fixed layout are decoded with decode_complete_pdu; with strict=False
+    the ones that fail to decode are left out of the fallback list.
+    """
+    buckets = {length: ([], []) for length in LAYOUTS}
+    fallback_positions = []
+
+    for position, packet in enumerate(packets):
+        bucket = buckets.get(len(packet))
+        if bucket is not None and packet[_VALUE_TYPE_OFFSET] == LAYOUTS[len(packet)][0]:
+            bucket[0].append(position)
+            bucket[1].append(packet)
+        else:
+            fallback_positions.append(position)
+
+    columns = []
+    for length, (positions, bucket_packets) in buckets.items():
+        if not positions:
+            continue
+        rows = np.frombuffer(b''.join(bucket_packets), dtype=LAYOUTS[length][1])
+        positions = np.asarray(positions, dtype=np.int64)
+
+        valid = ((rows['tag'] == PROTOCOL_TAG) & (rows['type'] == _NOTIFICATION)
+                 & (rows['n_iids'] == 1) & (rows['iid_type'] == _IID_3_PARTS)
+                 & (rows['structure'] == 2) & (rows['object_id'] == 3) & (rows['n_values'] == 1)
+                 & (rows['n_timestamps'] == 0) & (rows['n_errors'] == 0))
+        if not valid.all():
+            fallback_positions.extend(positions[~valid].tolist())
+            rows = rows[valid]
+            positions = positions[valid]
+        columns.append((positions, rows))
+
+    fallback = []
+    for position in sorted(fallback_positions):
+        try:
+            fallback.append((position, decode_complete_pdu(packets[position])))
+        except ValueError:
+            if strict:
+                raise
+
+    if not columns:
+        empty_u2 = np.empty(0, dtype=np.uint16)
+        return NotificationBatch(np.empty(0, dtype=np.int64), empty_u2, np.empty(0, dtype=np.int64),
+                                 np.empty(0, dtype=np.uint64), empty_u2, empty_u2, empty_u2, fallback)
+
+    positions = np.concatenate([positions for positions, _ in columns])
+    order = np.argsort(positions, kind='stable')
+
+    def column(name, dtype):
+        return np.concatenate([rows[name].astype(dtype) for _, rows in columns])[order]
+
+    return NotificationBatch(
+        positions=positions[order],
+        sensor_index=column('sensor_index', np.uint16),
+        value=column('value', np.int64),
+        msg_id=column('msg_id', np.uint64),
+        secs_ms=column('secs_ms', np.uint16),
+        hours_mins=column('hours_mins', np.uint16),
+        date=column('date', np.uint16),
+        fallback=fallback,
+    )
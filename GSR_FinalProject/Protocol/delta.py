@@ -0,0 +1,164 @@
+"""
+Zig-zag varint delta coding of integer sequences (value types 0x18/0x19).
+
+order 1 stores the first value and the differences between consecutive
+values, order 2 the differences of those differences (delta-of-delta, for
+series with a steady slope). Each number is zig-zag mapped (small negative
+numbers become small positive ones) and written as a varint: 7 bits per
+byte, low bits first, the high bit set on every byte but the last.
+
+Long sequences are coded with vectorized NumPy operations when NumPy is
+installed, everything else (and every sequence without NumPy) in pure
+Python. Both give the same bytes.
+"""
+from array import array
+from operator import sub
+
+try:
+    import numpy as np
+except ImportError:     # pure Python only
+    np = None
+
+# |value| limit, keeps every delta-of-delta and its zig-zag form inside 64 bits
+DELTA_VALUE_LIMIT = 1 << 60
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+MAX_VARINT_SIZE = 9
+# below these counts the pure Python loops are faster than the NumPy set-up
+NUMPY_ENCODE_MIN_COUNT = 512
+NUMPY_DECODE_MIN_COUNT = 128
+
+
+def _differences(values, order):
+    deltas = values if values.__class__ is list else list(values)
+    for _ in range(order):
+        deltas = [deltas[0], *map(sub, deltas[1:], deltas)]
+    return deltas
+
+def _encode_python(values, order, limit=None):
+    zigzags = [(d << 1) ^ (d >> 63) for d in _differences(values, order)]
+    out = bytearray()
+    # the first value is usually large, the deltas often fit in one byte each
+    if max(zigzags[1:], default=0) < 0x80:
+        _append_varint(out, zigzags[0])
+        out += bytes(zigzags[1:])
+    else:
+        # 7 data bits per byte: a lower bound of the size, checked before the byte loop
+        if limit is not None and sum(map(int.bit_length, zigzags)) > 7 * limit:
+            return None
+        for zigzag in zigzags:
+            _append_varint(out, zigzag)
+    if limit is not None and len(out) > limit:
+        return None
+    return bytes(out)
+
+def _append_varint(out, zigzag):
+    while zigzag > 0x7F:
+        out.append((zigzag & 0x7F) | 0x80)
+        zigzag >>= 7
+    out.append(zigzag)
+
+def varint_size(number):
+    """Bytes of number (zig-zag mapped) as a varint"""
+    return max(1, (((number << 1) ^ (number >> 63)).bit_length() + 6) // 7)
+
+def _decode_python(data, count, order):
+    numbers = []
+    zigzag = shift = 0
+    for byte in data:
+        zigzag |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            if shift >= 7 * MAX_VARINT_SIZE:
+                raise ValueError("Varint too long")
+        else:
+            numbers.append((zigzag >> 1) ^ -(zigzag & 1))
+            zigzag = shift = 0
+    if shift:
+        raise ValueError("Truncated varint")
+    if len(numbers) != count:
+        raise ValueError(f"Delta sequence holds {len(numbers)} values, expected {count}")
+    for _ in range(order):
+        total = 0
+        for i, d in enumerate(numbers):
+            total += d
+            numbers[i] = total
+        # every level must fit in 64 bits, like the int64 sums of the NumPy path
+        if min(numbers) < INT64_MIN or max(numbers) > INT64_MAX:
+            raise ValueError("Delta sequence value out of range")
+    return array('q', numbers)
+
+
+def _zigzag_numpy(values, order):
+    deltas = np.asarray(values, dtype=np.int64)
+    for _ in range(order):
+        deltas = np.diff(deltas, prepend=np.int64(0))
+    return ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+
+if np is not None:
+    # a number needs k + 1 bytes when it is >= 2**(7 * k)
+    _VARINT_LIMITS = np.array([1 << (7 * k) for k in range(1, MAX_VARINT_SIZE)], dtype=np.uint64)
+    _VARINT_SHIFTS = np.arange(0, 7 * MAX_VARINT_SIZE, 7, dtype=np.uint64)
+
+def _encode_numpy(values, order):
+    zigzag = _zigzag_numpy(values, order)
+    sizes = np.searchsorted(_VARINT_LIMITS, zigzag, side='right') + 1
+    width = int(sizes.max())
+    # one row of 7-bit chunks per number, the rows' first `size` bytes are kept
+    chunks = ((zigzag[:, None] >> _VARINT_SHIFTS[:width]) & np.uint64(0x7F)).astype(np.uint8)
+    columns = np.arange(width)
+    chunks[columns < sizes[:, None] - 1] |= 0x80
+    return chunks[columns < sizes[:, None]].tobytes()
+
+def _decode_numpy(data, count, order):
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(raw < 0x80)
+    if len(ends) != count:
+        raise ValueError(f"Delta sequence holds {len(ends)} values, expected {count}")
+    if ends[-1] != len(raw) - 1:
+        raise ValueError("Truncated varint")
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    sizes = ends - starts + 1
+    if sizes.max() > MAX_VARINT_SIZE:
+        raise ValueError("Varint too long")
+    # position of every byte inside its number -> shift of its 7 bits
+    position = np.arange(len(raw)) - np.repeat(starts, sizes)
+    parts = (raw & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    zigzag = np.bitwise_or.reduceat(parts, starts)
+    numbers = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+    for _ in range(order):
+        sums = np.cumsum(numbers)
+        # cumsum wraps around: an addition overflowed when both operands have
+        # the same sign and the sum the other one
+        previous = np.concatenate((np.zeros(1, dtype=np.int64), sums[:-1]))
+        if (((previous ^ sums) & (numbers ^ sums)) < 0).any():
+            raise ValueError("Delta sequence value out of range")
+        numbers = sums
+    decoded = array('q')
+    decoded.frombytes(numbers.astype(np.int64).tobytes())
+    return decoded
+
+
+def delta_encode(values, order=1, limit=None):
+    """
+    Varint data of values, every |value| must be below DELTA_VALUE_LIMIT.
+    None (without finishing the encoding if possible) when it exceeds limit bytes.
+    """
+    if not values:
+        return b''
+    if np is not None and len(values) >= NUMPY_ENCODE_MIN_COUNT:
+        data = _encode_numpy(values, order)
+        return data if limit is None or len(data) <= limit else None
+    return _encode_python(values, order, limit)
+
+def delta_decode(data, count, order=1):
+    """Integers (array 'q') coded in data, ValueError if data does not hold count varints"""
+    if not count:
+        if data:
+            raise ValueError("Data left in an empty delta sequence")
+        return array('q')
+    if np is not None and count >= NUMPY_DECODE_MIN_COUNT:
+        return _decode_numpy(data, count, order)
+    return _decode_python(data, count, order)
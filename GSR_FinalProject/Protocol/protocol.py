@@ -1,8 +1,13 @@
+import mmap
+import os
 import struct
+import sys
+from array import array
+from functools import partial
 from calendar import month
 from datetime import datetime
 from operator import index
-from time import monotonic_ns
+from time import localtime, mktime, monotonic_ns, time_ns
 from tkinter.font import names
 import hashlib
 import hmac
@@ -10,6 +15,7 @@ import base64
 from datetime import datetime
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
+from Protocol.delta import DELTA_VALUE_LIMIT, delta_encode, delta_decode, varint_size
 
 # Mapping between names and numeric codes for type encoding
 TYPE_MAP = {
@@ -31,7 +37,211 @@ ERROR_CODES = {
     8: "value list does not match IID list"
 }
 
-def encode_timestamp_type0(timestamp_str):
+# Reverse lookup for the type byte (code -> name)
+TYPE_NAMES = {code: name for name, code in TYPE_MAP.items()}
+
+PROTOCOL_TAG = b'LSNMPv2\x00'
+
+# IID-List of the global beacon: lMibId, device.id, nSensors, opStatus
+BEACON_IIDS = ["1.1", "1.2", "1.5", "1.8"]
+
+# Pre-compiled unpackers used by the cursor based decoder
+_U8 = struct.Struct('>B')
+_U16 = struct.Struct('>H')
+_MSGID = struct.Struct('>Q')
+_TIMESTAMP_TYPE0 = struct.Struct('3H')
+_TIMESTAMP_TYPE1 = struct.Struct('<3H')
+_IID_2 = struct.Struct('>BB')
+_IID_3 = struct.Struct('>BBH')
+_IID_4 = struct.Struct('>BBHH')
+
+# Fixed part of every PDU: tag (8) + type (1) + timestamp (6) + msg-id (8)
+PDU_HEADER_SIZE = 23
+
+
+def _as_view(data):
+    """
+    Returns a flat byte memoryview over data (bytearray, mmap, memoryview)
+    """
+    if data.__class__ is bytes:
+        # bytes already index/unpack without copies
+        return data
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+# Wire value of an invalid Timestamp Type 0/1 (impossible date/day count)
+_TIMESTAMP_ERROR = struct.pack('<3H', 0, 0, 0xFFFF)
+
+
+class Timestamp:
+    """
+    Timestamp Type 0 (absolute local time, ms resolution) kept as its three
+    wire fields, so decoding and re-encoding never go through text.
+    str() gives the legacy "day:month:year:hours:mins:secs:ms" form.
+    """
+
+    __slots__ = ('secs_ms', 'hours_mins', 'date')
+
+    def __init__(self, secs_ms, hours_mins, date):
+        self.secs_ms = secs_ms
+        self.hours_mins = hours_mins
+        self.date = date
+
+    @classmethod
+    def now(cls):
+        return cls(*_TIMESTAMP_TYPE0.unpack(encode_current_timestamp()))
+
+    @classmethod
+    def from_epoch_ms(cls, epoch_ms):
+        return cls(*_TIMESTAMP_TYPE0.unpack(encode_epoch_ms(epoch_ms)))
+
+    @classmethod
+    def from_string(cls, timestamp_str):
+        return cls(*_TIMESTAMP_TYPE0.unpack(_encode_timestamp_type0_text(timestamp_str)))
+
+    @property
+    def day(self):
+        return self.date & 0x1F
+
+    @property
+    def month(self):
+        return (self.date >> 5) & 0xF
+
+    @property
+    def year(self):
+        return (self.date >> 9) + 2000
+
+    @property
+    def hour(self):
+        return self.hours_mins // 60
+
+    @property
+    def minute(self):
+        return self.hours_mins % 60
+
+    @property
+    def second(self):
+        return self.secs_ms // 1000
+
+    @property
+    def ms(self):
+        return self.secs_ms % 1000
+
+    def to_epoch_ms(self):
+        """Local time -> milliseconds since the epoch"""
+        seconds = mktime((self.year, self.month, self.day, self.hour, self.minute, self.second, 0, 0, -1))
+        return int(seconds) * 1000 + self.ms
+
+    def to_bytes(self):
+        return _TIMESTAMP_TYPE0.pack(self.secs_ms, self.hours_mins, self.date)
+
+    def __eq__(self, other):
+        if other.__class__ is not Timestamp:
+            return NotImplemented
+        return (self.secs_ms, self.hours_mins, self.date) == (other.secs_ms, other.hours_mins, other.date)
+
+    def __hash__(self):
+        return hash((self.secs_ms, self.hours_mins, self.date))
+
+    def __str__(self):
+        return _format_timestamp_type0(self.secs_ms, self.hours_mins, self.date)
+
+    def __repr__(self):
+        return f"Timestamp('{self}')"
+
+
+class Uptime:
+    """
+    Timestamp Type 1 (elapsed time: days, hours, mins, secs, ms) kept as its
+    wire fields. str() gives the legacy "days:hours:mins:secs:ms" form.
+    """
+
+    __slots__ = ('secs_ms', 'hours_mins', 'days')
+
+    def __init__(self, secs_ms, hours_mins, days):
+        self.secs_ms = secs_ms
+        self.hours_mins = hours_mins
+        self.days = days
+
+    @classmethod
+    def from_ms(cls, elapsed_ms):
+        elapsed_ms = int(elapsed_ms)
+        days, elapsed_ms = divmod(elapsed_ms, 86400000)
+        hours_mins, secs_ms = divmod(elapsed_ms, 60000)
+        return cls(secs_ms, hours_mins, days)
+
+    def to_ms(self):
+        return self.days * 86400000 + self.hours_mins * 60000 + self.secs_ms
+
+    def to_bytes(self):
+        return _TIMESTAMP_TYPE1.pack(self.secs_ms, self.hours_mins, self.days)
+
+    def __eq__(self, other):
+        if other.__class__ is not Uptime:
+            return NotImplemented
+        return (self.secs_ms, self.hours_mins, self.days) == (other.secs_ms, other.hours_mins, other.days)
+
+    def __hash__(self):
+        return hash((self.secs_ms, self.hours_mins, self.days))
+
+    def __str__(self):
+        return _format_timestamp_type1(self.secs_ms, self.hours_mins, self.days)
+
+    def __repr__(self):
+        return f"Uptime('{self}')"
+
+
+# Last encoded (second -> date/hours_mins/secs words) and (ms -> wire bytes),
+# "now" is encoded at most once per millisecond and localtime runs once per second
+_last_second = (None, None)
+_last_epoch_ms = (None, None)
+
+def encode_epoch_ms(epoch_ms):
+    """Timestamp Type 0 wire bytes for milliseconds since the epoch (local time)"""
+    global _last_second, _last_epoch_ms
+    cached_ms, encoded = _last_epoch_ms
+    if epoch_ms == cached_ms:
+        return encoded
+
+    seconds, ms = divmod(epoch_ms, 1000)
+    cached_second, words = _last_second
+    if seconds != cached_second:
+        try:
+            now = localtime(seconds)
+        except (OverflowError, OSError, ValueError):
+            return _TIMESTAMP_ERROR
+        if not (2000 <= now.tm_year <= 2127):
+            return _TIMESTAMP_ERROR
+        # leap seconds (tm_sec 60) are folded into 59
+        words = (min(now.tm_sec, 59) * 1000, now.tm_hour * 60 + now.tm_min,
+                 (now.tm_year - 2000) * 512 + now.tm_mon * 32 + now.tm_mday)
+        _last_second = (seconds, words)
+
+    encoded = _TIMESTAMP_TYPE0.pack(words[0] + ms, words[1], words[2])
+    _last_epoch_ms = (epoch_ms, encoded)
+    return encoded
+
+def encode_current_timestamp():
+    """Timestamp Type 0 wire bytes for the current time"""
+    return encode_epoch_ms(time_ns() // 1000000)
+
+def encode_timestamp_type0(timestamp):
+    """
+    TimeStamp encoding. Accepts a Timestamp, epoch milliseconds (int), None for
+    the current time or the legacy "d:m:y:h:m:s:ms" string.
+    """
+    timestamp_class = timestamp.__class__
+    if timestamp_class is Timestamp:
+        return _TIMESTAMP_TYPE0.pack(timestamp.secs_ms, timestamp.hours_mins, timestamp.date)
+    if timestamp_class is int:
+        return encode_epoch_ms(timestamp)
+    if timestamp is None:
+        return encode_current_timestamp()
+    return _encode_timestamp_type0_text(timestamp)
+
+def _encode_timestamp_type0_text(timestamp_str):
     """
     TimeStamp encoding, return impossivel values if the input is invalid
     """
@@ -66,9 +276,15 @@ def encode_timestamp_type0(timestamp_str):
     except (ValueError, IndexError, TypeError):
         return struct.pack('<3H', 0, 0, 0xFFFF)  # ERROR CODE
 
-def decode_timestamp_type0(data):
-    secs_ms, hours_mins, date = struct.unpack('3H', data)
+def decode_timestamp_type0(data, as_string=False):
+    """
+    Decode: Timestamp type 0, as a Timestamp (or the legacy string with as_string=True)
+    """
+    if as_string:
+        return _format_timestamp_type0(*_TIMESTAMP_TYPE0.unpack(data))
+    return Timestamp(*_TIMESTAMP_TYPE0.unpack(data))
 
+def _format_timestamp_type0(secs_ms, hours_mins, date):
     # 1. seconds + milliseconds
     second = secs_ms // 1000
     ms = secs_ms % 1000
@@ -85,10 +301,21 @@ def decode_timestamp_type0(data):
     return f"{day}:{month}:{year}:{hour}:{minute}:{second}:{ms}"
 
 
-def encode_timestamp_type1(timestamp_str):
+def encode_timestamp_type1(timestamp):
     """
-    Encode: Timestamp Type 1 with proper error handling
+    Encode: Timestamp Type 1 with proper error handling. Accepts an Uptime,
+    elapsed milliseconds (int) or the legacy "days:hours:mins:secs:ms" string.
     """
+    timestamp_class = timestamp.__class__
+    if timestamp_class is Uptime:
+        return _TIMESTAMP_TYPE1.pack(timestamp.secs_ms, timestamp.hours_mins, timestamp.days)
+    if timestamp_class is int:
+        if not (0 <= timestamp < 65536 * 86400000):
+            return _TIMESTAMP_ERROR
+        return Uptime.from_ms(timestamp).to_bytes()
+    return _encode_timestamp_type1_text(timestamp)
+
+def _encode_timestamp_type1_text(timestamp_str):
     try:
         # 1. Validação básica do formato
         parts = timestamp_str.split(':')
@@ -124,12 +351,15 @@ def encode_timestamp_type1(timestamp_str):
         # Qualquer exceção → error code
         return struct.pack('<3H', 0, 0, 0xFFFF)  # ⚠️ ERROR CODE
 
-def decode_timestamp_type1(data):
+def decode_timestamp_type1(data, as_string=False):
     """
-    Decode: Timestamp type 1
+    Decode: Timestamp type 1, as an Uptime (or the legacy string with as_string=True)
     """
-    secs_ms, hours_mins, days = struct.unpack('<3H', data)
+    if as_string:
+        return _format_timestamp_type1(*_TIMESTAMP_TYPE1.unpack(data))
+    return Uptime(*_TIMESTAMP_TYPE1.unpack(data))
 
+def _format_timestamp_type1(secs_ms, hours_mins, days):
     secs = secs_ms // 1000
     ms = secs_ms % 1000
 
@@ -149,9 +379,9 @@ def decode_tag(tag_bytes):
     """
     Decode and validate protocol tag
     """
-    expected = b'LSNMPv2\x00'
+    expected = PROTOCOL_TAG
     if tag_bytes != expected:
-        raise ValueError(f"Invalid protocol tag. Expected {expected}, got {tag_bytes}")
+        raise ValueError(f"Invalid protocol tag. Expected {expected}, got {bytes(tag_bytes)}")
     return "LSNMPv2"  # Devolve string para debugging
 
 def encode_type(type):
@@ -179,9 +409,7 @@ def decode_type(type_bytes):
         else:
             return "Erro"
 
-        for name, code in TYPE_MAP.items():
-            if code == value:
-                return name
+        return TYPE_NAMES.get(value)
     except:
         return "Erro"
 
@@ -206,9 +434,9 @@ def decode_MSGID(msgId_bytes):
     except Exception:
         return 0
 
-def encode_single_iid( iid_str):
+def _parse_iid(iid_str):
     """
-    Encode a single IID
+    Validates an IID string, returns (integer parts, wire encoding)
     """
     parts = iid_str.split('.')
 
@@ -231,14 +459,14 @@ def encode_single_iid( iid_str):
     # Encoding
     if len(parts) == 2:
         data_type = 0b01000000
-        return struct.pack('>BBB', data_type, structure, object_id)
+        return tuple(parts), struct.pack('>BBB', data_type, structure, object_id)
 
     elif len(parts) == 3:
         index1 = parts[2]
         if not (0 <= index1 <= 65535):
             raise ValueError(f"Index1 must be 0-65535: {index1}")
         data_type = 0b01000001
-        return struct.pack('>BBBH', data_type, structure, object_id, index1)
+        return tuple(parts), struct.pack('>BBBH', data_type, structure, object_id, index1)
 
     else:
         index1, index2 = parts[2], parts[3]
@@ -247,7 +475,81 @@ def encode_single_iid( iid_str):
         if index2 < index1:
             raise ValueError(f"Index2 must be >= Index1: {index1}, {index2} ")
         data_type = 0b01000011
-        return struct.pack('>BBBHH', data_type, structure, object_id, index1, index2)
+        return tuple(parts), struct.pack('>BBBHH', data_type, structure, object_id, index1, index2)
+
+# Intern tables for IIDs: text -> Iid (only IIDs valid for encoding) and
+# wire bytes -> Iid. Bounded, once full new IIDs are simply not cached.
+IID_INTERN_LIMIT = 16384
+_IID_BY_TEXT = {}
+_IID_BY_WIRE = {}
+
+
+class Iid(str):
+    """
+    IID value ("2.3.1"). Behaves like the plain string but caches the parsed
+    integer parts and the wire encoding (None if the IID can't be encoded).
+    Use intern_iid() so equal IIDs share one object.
+    """
+
+    def __new__(cls, text, parts, wire):
+        iid = super().__new__(cls, text)
+        iid.parts = parts
+        iid.wire = wire
+        return iid
+
+    def __reduce__(self):
+        return Iid, (str(self), self.parts, self.wire)
+
+
+def intern_iid(iid_str):
+    """
+    Returns the shared Iid for iid_str, raises ValueError if the IID is invalid
+    """
+    iid = _IID_BY_TEXT.get(iid_str)
+    if iid is None:
+        parts, wire = _parse_iid(iid_str)
+        iid = _IID_BY_WIRE.get(wire)
+        if iid is None:
+            iid = Iid(".".join(map(str, parts)), parts, wire)
+            if len(_IID_BY_WIRE) < IID_INTERN_LIMIT:
+                _IID_BY_WIRE[wire] = iid
+        if len(_IID_BY_TEXT) < IID_INTERN_LIMIT:
+            _IID_BY_TEXT[iid_str] = iid
+    return iid
+
+def _iid_from_wire(wire):
+    """
+    Builds (and interns) the Iid for an encoded IID read from the network
+    """
+    data_type = wire[0]
+    if data_type == 0b01000000:
+        parts = _IID_2.unpack_from(wire, 1)
+    elif data_type == 0b01000001:
+        parts = _IID_3.unpack_from(wire, 1)
+    else:
+        parts = _IID_4.unpack_from(wire, 1)
+    text = ".".join(map(str, parts))
+
+    try:
+        valid = _parse_iid(text)[1] == wire
+    except ValueError:
+        valid = False
+    iid = Iid(text, parts, wire if valid else None)
+
+    if len(_IID_BY_WIRE) < IID_INTERN_LIMIT:
+        _IID_BY_WIRE[wire] = iid
+    if valid and len(_IID_BY_TEXT) < IID_INTERN_LIMIT:
+        _IID_BY_TEXT.setdefault(text, iid)
+    return iid
+
+def encode_single_iid( iid_str):
+    """
+    Encode a single IID
+    """
+    iid = _IID_BY_TEXT.get(iid_str)
+    if iid is None:
+        iid = intern_iid(iid_str)
+    return iid.wire
 
 def encode_iid_list(iid_list, strict=True):
     """
@@ -282,30 +584,44 @@ def decode_single_iid(data):
     """
     DECODE single IID
     """
-    if len(data) < 1:
+    iid, offset = _decode_single_iid_at(_as_view(data), 0)
+    return iid, data[offset:]
+
+def _decode_single_iid_at(buf, offset):
+    """
+    DECODE single IID starting at buf[offset], returns (Iid, next offset)
+    """
+    available = len(buf) - offset
+    if available < 1:
         raise ValueError("Data too short for IID")
 
-    data_type = data[0]
+    data_type = buf[offset]
 
     # check DataType to format
     if data_type == 0b01000000:  # 2-part IID
-        if len(data) < 3:
-            raise ValueError(f"Need 3 bytes for 2-part IID, got {len(data)}")
-        structure, object_id = struct.unpack('>BB', data[1:3])
-        return f"{structure}.{object_id}", data[3:]
+        size = 3
+        if available < 3:
+            raise ValueError(f"Need 3 bytes for 2-part IID, got {available}")
     elif data_type == 0b01000001:
-        if len(data) < 5:
+        size = 5
+        if available < 5:
             raise ValueError("Not enough data for 3-part IID")
-        structure, object_id, index1 = struct.unpack('>BBH', data[1:5])
-        return f"{structure}.{object_id}.{index1}", data[5:]
     elif data_type == 0b01000011:
-        if len(data) < 7:
+        size = 7
+        if available < 7:
             raise ValueError("Not enough data for 4-part IID")
-        structure, object_id, index1, index2 = struct.unpack('>BBHH', data[1:7])
-        return f"{structure}.{object_id}.{index1}.{index2}", data[7:]
     else:
         raise ValueError(f"Unknow IID data type: {data_type:08b}")
 
+    # Repeated IIDs cost one dict lookup and share the same object
+    wire = buf[offset:offset + size]
+    if wire.__class__ is not bytes:
+        wire = bytes(wire)
+    iid = _IID_BY_WIRE.get(wire)
+    if iid is None:
+        iid = _iid_from_wire(wire)
+    return iid, offset + size
+
 def decode_iid_list(data):
     """
     DECODE IID list
@@ -313,184 +629,355 @@ def decode_iid_list(data):
     if not data or len(data) == 0:
         return [], data
 
-    try:
-        num_elements = struct.unpack('>B', data[:1])[0]
-    except:
-        raise ValueError("Invalid IID list header")
+    decoded_iids, offset = _decode_iid_list_at(_as_view(data), 0)
+    return decoded_iids, data[offset:]
+
+def _decode_iid_list_at(buf, offset):
+    """
+    DECODE IID list starting at buf[offset], returns (iids, next offset)
+    """
+    if offset >= len(buf):
+        return [], offset
 
-    remaining_data = data[1:]
+    num_elements = buf[offset]
+    offset += 1
     decoded_iids = []
 
     for i in range(num_elements):
         try:
-            iid_str, remaining_data = decode_single_iid(remaining_data)
+            iid_str, offset = _decode_single_iid_at(buf, offset)
             decoded_iids.append(iid_str)
         except ValueError as e:
             # SKIP ID OR RAISE ERROR???, TO DECIDE LATER !!!!!!!
             print(f"⚠️ Skipping corrupted IID {i + 1}/{num_elements}: {e}")
             continue
 
-    return decoded_iids, remaining_data
+    return decoded_iids, offset
+
+# ---------------------------------------------------------------------------
+# Value codec
+#
+# Both directions are table driven: _VALUE_ENCODERS and _VALUE_DECODERS have
+# one entry per value type byte (256 entries, None for unused codes). Fixed
+# width types use pre-compiled struct.Struct objects and integer sequences
+# are packed/unpacked through the array module.
+# ---------------------------------------------------------------------------
+
+_BYTE = struct.Struct('>BB')
+_BYTE_SEQ_SHORT = struct.Struct('>BB')
+_BYTE_SEQ_LONG = struct.Struct('>BH')
+_STRING_HEADER = struct.Struct('>BH')
+# 0x18/0x19 delta-varint integer sequences: type, count, data length
+_DELTA_HEADER = struct.Struct('>BHH')
+_DELTA_SEQUENCE = 0b00011000
+_DELTA2_SEQUENCE = 0b00011001
+# shorter sequences are always sent with fixed size elements
+DELTA_MIN_COUNT = 4
+_INT_STRUCTS = {
+    0b00000100: struct.Struct('>Bb'),
+    0b00000101: struct.Struct('>Bh'),
+    0b00000110: struct.Struct('>Bi'),
+    0b00000111: struct.Struct('>Bq'),
+}
+_INT_NAMES = {
+    0b00000100: "8-bit integer",
+    0b00000101: "16-bit integer",
+    0b00000110: "32-bit integer",
+    0b00000111: "64 bit integer",
+}
 
-def encode_value(value_data, value_type=None):
-    """
-    Encode a single value
-    """
-    try:
-        #Auto-detect type if not provided
-        if value_type is None:
-            if isinstance(value_data, int):
-                if value_data < -128 or value_data > 255:
-                    value_type = "integer"
-                value_type = "integer"
-            elif isinstance(value_data, str):
-                if ":" in str(value_data):
-                    value_type = "timestamp"
-                else:
-                    value_type = "string"
-            elif isinstance(value_data, bytes):
-                value_type = "byte"
-            elif isinstance(value_data, list):
-                if not value_data:
-                    raise ValueError("Empty list cannot be auto-detected")
+def _array_typecode(size):
+    for typecode in ('b', 'h', 'i', 'l', 'q'):
+        if array(typecode).itemsize == size:
+            return typecode
+    raise ImportError(f"No array typecode for {size}-byte integers")
 
-                if all(isinstance(x, int) for x in value_data):
-                    value_type = "integer"
+# element size bits (0-3) -> (bytes per element, array typecode)
+_SEQUENCE_ELEMENTS = {bits: (size, _array_typecode(size)) for bits, size in {0: 1, 1: 2, 2: 4, 3: 8}.items()}
+_SWAP_BYTES = sys.byteorder == 'little'
 
-                elif all(isinstance(x, str) and x.isdigit() for x in value_data):
-                    value_data = [int(x) for x in value_data]
-                    value_type = "integer"
+_VALUE_ENCODERS = [None] * 256
+_VALUE_DECODERS = [None] * 256
 
-                elif all(isinstance(x, bytes) for x in value_data):
-                    value_data = b''.join(value_data)
-                    value_type = "bytes"
 
-                else:
-                    raise ValueError(f"Cannot auto-detect type for list: {value_data}. Mixed types or unsopported elemtes")
-            else:
-                raise ValueError(f"Cannot auto-detect type for: {value_data}")
+def _encode_byte(value):
+    return _BYTE.pack(0b00000000, value)
 
+def _encode_byte_sequence_short(value):
+    return _BYTE_SEQ_SHORT.pack(0b00000001, len(value)) + value
 
-        # Byte types
-        if value_type == "byte":
-            if isinstance(value_data, int):
-                if 0 <= value_data <= 255:
-                    return struct.pack('>B', 0b00000000) + struct.pack('>B', value_data)
-                else:
-                    raise ValueError(f"Byte value out of range: {value_data}. Must be 0-255")
-            elif isinstance(value_data, bytes):
-                if len(value_data) <= 255:
-                    return struct.pack('>BB', 0b00000001, len(value_data)) + value_data
-                elif len(value_data) <= 65535:
-                    return struct.pack('>BH', 0b00000010, len(value_data)) + value_data
-                else:
-                    raise ValueError(f"Byte sequence too long: {len(value_data)}")
-
-        #INTEGER types
-        elif value_type == "integer":
-            if isinstance(value_data, int):
-                if -128 <= value_data <= 127:
-                    return struct.pack('>Bb', 0b00000100, value_data)
-                elif -32768 <= value_data <= 32767:
-                    return struct.pack('>Bh', 0b00000101, value_data)
-                elif -2147483648 <= value_data <= 2147483647:
-                    return struct.pack('>Bi', 0b00000110, value_data)
-                else:
-                    return struct.pack('>Bq', 0b00000111, value_data)
-            elif isinstance(value_data, list):
-                if not value_data:
-                    raise ValueError("Empty integer sequence")
-
-                #Check all elements are integers
-                if not all(isinstance(x, int) for x in value_data):
-                    raise ValueError("All sequence elements must be integers")
-
-                # Determine size needed
-                max_val = max(max(value_data), abs(min(value_data))) if value_data else 0
-
-                if max_val <= 127:
-                    if len(value_data) <= 255:
-                        encoded = struct.pack('>BB', 0b00001000, len(value_data))
-                        encoded += struct.pack('>' + 'b' * len(value_data), *value_data)
-                        return encoded
-                    else:
-                        encoded = struct.pack('>BH', 0b00001100, len(value_data))
-                        encoded += struct.pack('>' + 'b' * len(value_data), *value_data)
-                        return encoded
-                elif max_val <= 32767:
-                    if len(value_data) <= 255:
-                        encoded = struct.pack('>BB', 0b00001001, len(value_data))
-                        encoded += struct.pack('>' + 'h' * len(value_data), *value_data)
-                        return encoded
-                    else:
-                        encoded = struct.pack('>BH', 0b00001101, len(value_data))
-                        encoded += struct.pack('>' + 'i' * len(value_data), *value_data)
-                        return encoded
-                elif max_val <= 2147483647:
-                    if len(value_data) <= 255:
-                        encoded = struct.pack('>BB', 0b00001010, len(value_data))
-                        encoded += struct.pack('>' + 'i' * len(value_data), *value_data)
-                        return encoded
-                    else:
-                        encoded = struct.pack('>BH', 0b00001110, len(value_data))
-                        encoded += struct.pack('>' + 'i' * len(value_data), *value_data)
-                        return encoded
-                else: # 64 bit
-                    if len(value_data) <= 255:
-                        encoded = struct.pack('>BH', 0b00001111, len(value_data))
-                        encoded += struct.pack('>' + 'q' * len(value_data), *value_data)
-                        return encoded
-
-        # TimeStamp types:
-        elif value_type == "timestamp":
-            if isinstance(value_data, str):
-                if value_data.count(':') == 6:
-                    encoded_ts = encode_timestamp_type0(value_data)
-                    return struct.pack('>B', 0b00010000) + encoded_ts
-                elif value_data.count(':') == 4:
-                    encoded_ts = encode_timestamp_type1(value_data)
-                    return struct.pack('>B', 0b00010001) + encoded_ts
-                else:
-                    raise ValueError(f"Invalid timestamp format: {value_data}")
-            else:
-                raise ValueError(f"Timestamp must be string: {value_data}")
-
-        # STRING types
-        elif value_type == "string":
-            if isinstance(value_data, str):
-                #ASCII normalized
-                try:
-                    encoded_str = value_data.encode('ascii')
-                    if len(encoded_str) <= 65535:
-                        return struct.pack('>BH', 0b00100000, len(encoded_str)) + encoded_str
-                    else:
-                        raise ValueError(f"String too long: {len(encoded_str)}")
-                except UnicodeError:
-                    # Extended ASCII
-                    encoded_str = value_data.encode('latin-1')
-            if len(encoded_str) <= 65535:
-                return struct.pack('>BH', 0b00100001, len(encoded_str)) + encoded_str
-            else:
-                raise ValueError(f"String too long: {value_data}")
-
-        #IID type
-        elif value_type == "iid":
-            if isinstance(value_data, str):
-                encoded_iid = encode_single_iid(value_data)
-                # Extract the data type bits from the encoded IID
-                iid_data_type = encoded_iid[0]
-                #MAP to IID value type encoding
-                if iid_data_type == 0b01000000:
-                    return struct.pack('>B', 0b01000000) + encoded_iid[1:]
-                elif iid_data_type == 0b01000001:
-                    return struct.pack('>b', 0b01000001) + encoded_iid[1:]
-                elif iid_data_type == 0b01000011:
-                    return struct.pack('>B', 0b01000011) + encoded_iid[1:]
-                else: raise ValueError(f"Invalid IID data type: {iid_data_type:08b}")
-            else:
-                raise ValueError(f"IID must be string: {value_data}")
+def _encode_byte_sequence_long(value):
+    return _BYTE_SEQ_LONG.pack(0b00000010, len(value)) + value
+
+def _make_integer_encoder(data_type):
+    return partial(_INT_STRUCTS[data_type].pack, data_type)
+
+def _make_sequence_encoder(data_type):
+    size, typecode = _SEQUENCE_ELEMENTS[data_type & 0b00000011]
+    header = _BYTE_SEQ_SHORT if (data_type & 0b00000100) == 0 else _BYTE_SEQ_LONG
+
+    def encode(values):
+        try:
+            elements = array(typecode, values)
+        except TypeError:
+            raise ValueError("All sequence elements must be integers")
+        if _SWAP_BYTES and size > 1:
+            elements.byteswap()
+        return header.pack(data_type, len(values)) + elements.tobytes()
+    return encode
+
+def _make_delta_encoder(data_type, order):
+    def encode(values):
+        if len(values) > 65535:
+            raise ValueError(f"Integer sequence too long: {len(values)}")
+        try:
+            data = delta_encode(values, order)
+        except TypeError:
+            raise ValueError("All sequence elements must be integers")
+        if len(data) > 65535:
+            raise ValueError(f"Delta sequence too long: {len(data)} bytes")
+        return _DELTA_HEADER.pack(data_type, len(values), len(data)) + data
+    return encode
+
+def _encode_timestamp_type0_value(value):
+    return b'\x10' + encode_timestamp_type0(value)
+
+def _encode_timestamp_type1_value(value):
+    return b'\x11' + encode_timestamp_type1(value)
+
+def _encode_string_ascii(value):
+    encoded_str = value.encode('ascii')
+    return _STRING_HEADER.pack(0b00100000, len(encoded_str)) + encoded_str
+
+def _encode_string_latin1(value):
+    encoded_str = value.encode('latin-1')
+    return _STRING_HEADER.pack(0b00100001, len(encoded_str)) + encoded_str
+
+def _encode_iid_value(value):
+    # The IID value type byte is the same as the IID data type byte
+    return encode_single_iid(value)
+
+_VALUE_ENCODERS[0b00000000] = _encode_byte
+_VALUE_ENCODERS[0b00000001] = _encode_byte_sequence_short
+_VALUE_ENCODERS[0b00000010] = _encode_byte_sequence_long
+for _data_type in _INT_STRUCTS:
+    _VALUE_ENCODERS[_data_type] = _make_integer_encoder(_data_type)
+for _data_type in range(0b00001000, 0b00010000):
+    _VALUE_ENCODERS[_data_type] = _make_sequence_encoder(_data_type)
+_VALUE_ENCODERS[_DELTA_SEQUENCE] = _make_delta_encoder(_DELTA_SEQUENCE, 1)
+_VALUE_ENCODERS[_DELTA2_SEQUENCE] = _make_delta_encoder(_DELTA2_SEQUENCE, 2)
+_VALUE_ENCODERS[0b00010000] = _encode_timestamp_type0_value
+_VALUE_ENCODERS[0b00010001] = _encode_timestamp_type1_value
+_VALUE_ENCODERS[0b00100000] = _encode_string_ascii
+_VALUE_ENCODERS[0b00100001] = _encode_string_latin1
+for _data_type in (0b01000000, 0b01000001, 0b01000011):
+    _VALUE_ENCODERS[_data_type] = _encode_iid_value
+
+
+def _select_byte_type(value_data):
+    if isinstance(value_data, int):
+        if 0 <= value_data <= 255:
+            return 0b00000000
+        raise ValueError(f"Byte value out of range: {value_data}. Must be 0-255")
+    if isinstance(value_data, bytes):
+        if len(value_data) <= 255:
+            return 0b00000001
+        if len(value_data) <= 65535:
+            return 0b00000010
+        raise ValueError(f"Byte sequence too long: {len(value_data)}")
+    raise ValueError(f"Byte value must be int or bytes: {value_data}")
+
+def _select_integer_type(value_data):
+    if isinstance(value_data, int):
+        if -128 <= value_data <= 127:
+            return 0b00000100
+        elif -32768 <= value_data <= 32767:
+            return 0b00000101
+        elif -2147483648 <= value_data <= 2147483647:
+            return 0b00000110
+        return 0b00000111
+    if isinstance(value_data, (list, array)):
+        if not value_data:
+            raise ValueError("Empty integer sequence")
+        if len(value_data) > 65535:
+            raise ValueError(f"Integer sequence too long: {len(value_data)}")
+
+        # Determine size needed (element types are checked by the array packing)
+        try:
+            max_val = max(max(value_data), abs(min(value_data)))
+        except TypeError:
+            raise ValueError("All sequence elements must be integers")
+        long_bit = 0b00000100 if len(value_data) > 255 else 0
+        if max_val <= 127:
+            return 0b00001000 | long_bit
+        elif max_val <= 32767:
+            return 0b00001001 | long_bit
+        elif max_val <= 2147483647:
+            return 0b00001010 | long_bit
+        return 0b00001111   # 64 bit, always sent with the 16-bit count
+    raise ValueError(f"Integer value must be int or list: {value_data}")
+
+def _make_delta_selector(data_type):
+    def select(value_data):
+        if not isinstance(value_data, (list, array)) or not value_data:
+            raise ValueError(f"Delta sequence must be a non empty list of integers: {value_data}")
+        try:
+            max_val = max(max(value_data), abs(min(value_data)))
+        except TypeError:
+            raise ValueError("All sequence elements must be integers")
+        if max_val >= DELTA_VALUE_LIMIT:
+            raise ValueError(f"Delta sequence value out of range: {max_val}")
+        return data_type
+    return select
+
+def _select_timestamp_type(value_data):
+    if value_data.__class__ is Timestamp:
+        return 0b00010000
+    if value_data.__class__ is Uptime:
+        return 0b00010001
+    if not isinstance(value_data, str):
+        raise ValueError(f"Timestamp must be string: {value_data}")
+    separators = value_data.count(':')
+    if separators == 6:
+        return 0b00010000
+    elif separators == 4:
+        return 0b00010001
+    raise ValueError(f"Invalid timestamp format: {value_data}")
+
+def _select_string_type(value_data):
+    if not isinstance(value_data, str):
+        raise ValueError(f"String value must be str: {value_data}")
+    # ASCII normalized when possible, extended ASCII otherwise
+    data_type = 0b00100000 if value_data.isascii() else 0b00100001
+    if len(value_data) > 65535:
+        raise ValueError(f"String too long: {len(value_data)}")
+    return data_type
+
+def _select_iid_type(value_data):
+    if not isinstance(value_data, str):
+        raise ValueError(f"IID must be string: {value_data}")
+    parts = value_data.count('.') + 1
+    if parts == 2:
+        return 0b01000000
+    elif parts == 3:
+        return 0b01000001
+    return 0b01000011
+
+_VALUE_TYPE_SELECTORS = {
+    "byte": _select_byte_type,
+    "integer": _select_integer_type,
+    "delta": _make_delta_selector(_DELTA_SEQUENCE),
+    "delta2": _make_delta_selector(_DELTA2_SEQUENCE),
+    "timestamp": _select_timestamp_type,
+    "string": _select_string_type,
+    "iid": _select_iid_type,
+}
+
+def _detect_str_type(value_data):
+    return value_data, "timestamp" if ":" in value_data else "string"
+
+def _detect_list_type(value_data):
+    if not value_data:
+        raise ValueError("Empty list cannot be auto-detected")
+    if isinstance(value_data[0], int):
+        # Remaining elements are validated when the sequence is packed
+        return value_data, "integer"
+    elif all(isinstance(x, str) and x.isdigit() for x in value_data):
+        return [int(x) for x in value_data], "integer"
+    elif all(isinstance(x, bytes) for x in value_data):
+        return b''.join(value_data), "byte"
+    raise ValueError(f"Cannot auto-detect type for list: {value_data}. Mixed types or unsopported elemtes")
+
+# Python type -> value type name, or a detector returning (value, type name)
+_AUTO_VALUE_TYPES = {
+    bool: "integer",
+    int: "integer",
+    str: _detect_str_type,
+    bytes: "byte",
+    list: _detect_list_type,
+    array: "integer",
+    Timestamp: "timestamp",
+    Uptime: "timestamp",
+}
+
+def _detect_value_type(value_data, value_type):
+    if value_type is None:
+        # Subclasses of the supported types
+        for python_type, candidate in _AUTO_VALUE_TYPES.items():
+            if isinstance(value_data, python_type):
+                value_type = candidate
+                break
         else:
+            raise ValueError(f"Cannot auto-detect type for: {value_data}")
+    if isinstance(value_type, str):
+        return value_data, value_type
+    return value_type(value_data)
+
+
+class EncodedValue(bytes):
+    """
+    Value already encoded (type byte + data). encode_value and encode_v_list
+    copy it as it is, so cached fragments are concatenated without detecting
+    the type again. value keeps the original value.
+    """
+
+    def __new__(cls, encoded, value=None):
+        self = super().__new__(cls, encoded)
+        self.value = value
+        return self
+
+    def __repr__(self):
+        return f"EncodedValue({self.value!r})"
+
+# integer sequence without elements (count 0), encode_value refuses empty lists
+EMPTY_SEQUENCE = EncodedValue(b'\x08\x00', [])
+
+
+# integer sequences of 2-8 byte elements, delta coding may be smaller
+# (with 1 byte elements a varint is never shorter)
+_DELTA_CANDIDATES = [(data_type & 0b11111000) == 0b00001000 and (data_type & 0b00000011) != 0
+                     for data_type in range(256)]
+
+def _encode_smallest_sequence(values, data_type):
+    """Fixed size sequence (data_type) or delta-varint sequence, the smaller one"""
+    size = _SEQUENCE_ELEMENTS[data_type & 0b00000011][0]
+    fixed_size = (3 if data_type & 0b00000100 else 2) + len(values) * size
+    # varint data larger than this loses against the fixed size elements
+    limit = min(fixed_size - _DELTA_HEADER.size - 1, 65535)
+    if limit >= len(values) and max(max(values), -min(values)) < DELTA_VALUE_LIMIT:
+        delta_type, data = _DELTA_SEQUENCE, delta_encode(values, 1, limit)
+        if data is None or len(data) > len(values) - 1 + varint_size(values[0]):
+            # some deltas take more than a byte, a steady slope codes better as delta-of-delta
+            data2 = delta_encode(values, 2, limit if data is None else len(data) - 1)
+            if data2 is not None:
+                delta_type, data = _DELTA2_SEQUENCE, data2
+        if data is not None:
+            return _DELTA_HEADER.pack(delta_type, len(values), len(data)) + data
+    return _VALUE_ENCODERS[data_type](values)
+
+def encode_value(value_data, value_type=None):
+    """
+    Encode a single value. Auto-detected integer sequences are sent delta-varint
+    coded (0x18/0x19) when that is smaller, value_type "integer" keeps the fixed
+    size elements.
+    """
+    if value_data.__class__ is EncodedValue:
+        return value_data
+    try:
+        detected = value_type is None
+        #Auto-detect type if not provided
+        if detected:
+            value_type = _AUTO_VALUE_TYPES.get(type(value_data))
+            if value_type.__class__ is not str:
+                value_data, value_type = _detect_value_type(value_data, value_type)
+
+        selector = _VALUE_TYPE_SELECTORS.get(value_type)
+        if selector is None:
             raise ValueError(f"Unsupported value type: {value_data}")
+        data_type = selector(value_data)
+        if detected and _DELTA_CANDIDATES[data_type] and len(value_data) >= DELTA_MIN_COUNT:
+            return _encode_smallest_sequence(value_data, data_type)
+        return _VALUE_ENCODERS[data_type](value_data)
 
     except Exception as e:
         raise ValueError(f"Value encoding failed: {e}")
@@ -499,143 +986,182 @@ def decode_value(data):
     """
     Decode a single value from bytes
     """
-    if len(data) < 1:
-        raise ValueError("No data for value decoding")
+    value, offset = _decode_value_at(_as_view(data), 0)
+    return value, data[offset:]
 
-    data_type = data[0]
+def _decode_value_at(buf, offset):
+    """
+    Decode a single value starting at buf[offset], returns (value, next offset)
+    """
+    available = len(buf) - offset
+    if available < 1:
+        raise ValueError("No data for value decoding")
 
+    data_type = buf[offset]
+    decoder = _VALUE_DECODERS[data_type]
     try:
-        #Byte types
-        if data_type == 0b00000000: # Single byte
-            if len(data) < 2:
-                raise ValueError("Not enough data for single byte")
-            value = struct.unpack('>B', data[1:2])[0]
-            return value, data[2:]
-
-        elif data_type == 0b00000001: # Short byte sequence
-            if len(data) < 2:
-                raise ValueError("Not enough data for byte sequence header")
-            n_bytes = data[1]
-            if len(data) < 2 + n_bytes:
-                raise ValueError(f"Not enough data for byte sequence: need {n_bytes}, got {len(data)-2}")
-            if n_bytes == 0:
-                raise ValueError("Empty byte sequence not allowed")
-            if len(data) < 2 + n_bytes:
-                raise ValueError(f"Not enough data for byte sequence: need {n_bytes}, got {len(data)-2}")
-            value = data[2:2+n_bytes]
-            return value, data[2+n_bytes:]
-
-        elif data_type == 0b00000010: # Long byte sequence
-            if len(data) < 3:
-                raise ValueError("Not enough data for, long byte sequence header")
-            n_bytes = struct.unpack('>H', data[1:3])[0]
-            if len(data) < 3 + n_bytes:
-                raise ValueError(f"Not enough data for long byte sequence: need {n_bytes}, got {len(data)-3}")
-            if n_bytes == 0:
-                raise ValueError("Empty long byte sequence not allowed")
-            value = data[3:3+n_bytes]
-            return value, data[3+n_bytes:]
-
-        # Integer types
-        elif data_type in [0b00000100, 0b00000101, 0b00000110, 0b00000111]:
-            if data_type == 0b00000100: # 8 bit int
-                if len(data) < 2:
-                    raise ValueError("Not enough data for 8-bit integer")
-                value = struct.unpack('>b', data[1:2])[0]
-                return value, data[2:]
-            elif data_type == 0b00000101: # 16 bit int
-                if len(data) < 3:
-                    raise ValueError("Not enough data for 16-bit integer")
-                value = struct.unpack('>h', data[1:3])[0]
-                return value, data[3:]
-            elif data_type == 0b00000110:   # 32 bit int
-                if len(data) < 5:
-                    raise ValueError("Not enough data for 32-bit integer")
-                value = struct.unpack('>i', data[1:5])[0]
-                return value, data[5:]
-            elif data_type == 0b00000111:   # 64 bit int
-                if len(data) < 9:
-                    raise ValueError("not enough data for 64 bit integer")
-                value = struct.unpack('>q', data[1:9])[0]
-                return value, data[9:]
-
-        # INTEGER SEQUENCE types
-        elif data_type in range(0b00001000, 0b00010000):
-            # Determine size and count from data_type
-            size_bits = (data_type & 0b00000011)
-            is_short = (data_type & 0b00000100) == 0
-
-            sizes = {0: 1, 1: 2, 2: 4, 3: 8}    # bytes per element
-            format_chars = {0: 'b', 1: 'h', 2: 'i', 3: 'q'}  # struct format chars
-
-            size = sizes[size_bits]
-            fmt_char = format_chars[size_bits]
-
-            if is_short:
-                if len(data) < 2:
-                    raise ValueError("not enough data for integer sequence header")
-                count = data[1]
-                header_size = 2
-            else:
-                if len(data) < 3:
-                    raise ValueError("Not enough data for long integer sequence header")
-                count = struct.unpack('>H', data[1:3])[0]
-                header_size = 3
-
-            total_size = header_size + count * size
-            if len(data) < total_size:
-                raise ValueError(f"not enough data for integer sequence : need {total_size}, got {len(data)}")
-            values = list(struct.unpack('>' + fmt_char * count, data[header_size:total_size]))
-            return values, data[total_size:]
-
-        # TIMESTAMP types
-        elif data_type in [0b00010000, 0b00010001]:
-            if len(data) < 7: # 3 * uint16 = 6 bytes
-                raise ValueError("Not enough data for timestamp")
-
-            timestamp_data = data[1:7]
-            if data_type == 0b00010000: # Type 0
-                value = decode_timestamp_type0(timestamp_data)
-            else: # Type 1
-                value = decode_timestamp_type1(timestamp_data)
-            return value, data[7:]
-
-        # STRING types
-        elif (data_type & 0b11110000) == 0b00100000:
-            if len(data) < 3:
-                raise ValueError("Not enough data for string header")
-
-            str_len = struct.unpack('>H', data[1:3])[0]
-            if len(data) < 3 + str_len:
-                raise ValueError(f"Not enough data for string: need {str_len}, got {len(data)-3}")
-
-            string_data = data[3:3+str_len]
-            encoding_bits = data_type & 0b00001111
-
-            if encoding_bits == 0b0000: #ASCII normalized
-                value = string_data.decode('ascii')
-            elif encoding_bits == 0b001:   # Extended ASCII/ISO-8859-1
-                value = string_data.decode('latin-1')
-            else:
-                value = string_data.decode('latin-1')   # Fallback
-
-            return value, data[3+str_len:]
-
-        #IID types
-        elif data_type in [0b01000000, 0b01000001, 0b01000011]:
-            # REconstruct the IID data type byte
-            iid_data_type = 0b01000000 | (data_type & 0b00000011)
-            iid_data = bytes([iid_data_type]) + data[1:]
-
-            value, remaining = decode_single_iid(iid_data)
-            return value, remaining
-        else:
+        if decoder is None:
             raise ValueError(f"Unknow value data type: {data_type:08b}")
-
+        return decoder(buf, offset, available)
     except Exception as e:
         raise ValueError(f"Value decoding failed: {e}")
 
 
+def _decode_byte(buf, offset, available):
+    if available < 2:
+        raise ValueError("Not enough data for single byte")
+    return buf[offset + 1], offset + 2
+
+def _decode_byte_sequence_short(buf, offset, available):
+    if available < 2:
+        raise ValueError("Not enough data for byte sequence header")
+    n_bytes = buf[offset + 1]
+    if available < 2 + n_bytes:
+        raise ValueError(f"Not enough data for byte sequence: need {n_bytes}, got {available-2}")
+    if n_bytes == 0:
+        raise ValueError("Empty byte sequence not allowed")
+    start = offset + 2
+    return bytes(buf[start:start + n_bytes]), start + n_bytes
+
+def _decode_byte_sequence_long(buf, offset, available):
+    if available < 3:
+        raise ValueError("Not enough data for, long byte sequence header")
+    n_bytes = _U16.unpack_from(buf, offset + 1)[0]
+    if available < 3 + n_bytes:
+        raise ValueError(f"Not enough data for long byte sequence: need {n_bytes}, got {available-3}")
+    if n_bytes == 0:
+        raise ValueError("Empty long byte sequence not allowed")
+    start = offset + 3
+    return bytes(buf[start:start + n_bytes]), start + n_bytes
+
+def _make_integer_decoder(data_type):
+    unpack_from = _INT_STRUCTS[data_type].unpack_from
+    size = _INT_STRUCTS[data_type].size
+    message = f"{'not' if data_type == 0b00000111 else 'Not'} enough data for {_INT_NAMES[data_type]}"
+
+    def decode(buf, offset, available):
+        if available < size:
+            raise ValueError(message)
+        return unpack_from(buf, offset)[1], offset + size
+    return decode
+
+def _make_sequence_decoder(decode_array):
+
+    def decode(buf, offset, available):
+        elements, end = decode_array(buf, offset, available)
+        return elements.tolist(), end
+    return decode
+
+def _make_sequence_array_decoder(data_type):
+    size, typecode = _SEQUENCE_ELEMENTS[data_type & 0b00000011]
+    is_short = (data_type & 0b00000100) == 0
+
+    def decode(buf, offset, available):
+        if is_short:
+            if available < 2:
+                raise ValueError("not enough data for integer sequence header")
+            count = buf[offset + 1]
+            header_size = 2
+        else:
+            if available < 3:
+                raise ValueError("Not enough data for long integer sequence header")
+            count = _U16.unpack_from(buf, offset + 1)[0]
+            header_size = 3
+
+        total_size = header_size + count * size
+        if available < total_size:
+            raise ValueError(f"not enough data for integer sequence : need {total_size}, got {available}")
+        elements = array(typecode)
+        elements.frombytes(buf[offset + header_size:offset + total_size])
+        if _SWAP_BYTES and size > 1:
+            elements.byteswap()
+        return elements, offset + total_size
+    return decode
+
+def _make_delta_array_decoder(order):
+    def decode(buf, offset, available):
+        if available < _DELTA_HEADER.size:
+            raise ValueError("Not enough data for delta sequence header")
+        _, count, size = _DELTA_HEADER.unpack_from(buf, offset)
+        start = offset + _DELTA_HEADER.size
+        if available < _DELTA_HEADER.size + size:
+            raise ValueError(f"not enough data for delta sequence : need {_DELTA_HEADER.size + size}, got {available}")
+        return delta_decode(buf[start:start + size], count, order), start + size
+    return decode
+
+def _decode_timestamp_type0_value(buf, offset, available):
+    if available < 7: # 3 * uint16 = 6 bytes
+        raise ValueError("Not enough data for timestamp")
+    return Timestamp(*_TIMESTAMP_TYPE0.unpack_from(buf, offset + 1)), offset + 7
+
+def _decode_timestamp_type1_value(buf, offset, available):
+    if available < 7:
+        raise ValueError("Not enough data for timestamp")
+    return Uptime(*_TIMESTAMP_TYPE1.unpack_from(buf, offset + 1)), offset + 7
+
+def _make_string_decoder(encoding):
+    def decode(buf, offset, available):
+        if available < 3:
+            raise ValueError("Not enough data for string header")
+        str_len = _U16.unpack_from(buf, offset + 1)[0]
+        if available < 3 + str_len:
+            raise ValueError(f"Not enough data for string: need {str_len}, got {available-3}")
+        start = offset + 3
+        return str(buf[start:start + str_len], encoding), start + str_len
+    return decode
+
+def _decode_iid_value(buf, offset, available):
+    return _decode_single_iid_at(buf, offset)
+
+_VALUE_DECODERS[0b00000000] = _decode_byte
+_VALUE_DECODERS[0b00000001] = _decode_byte_sequence_short
+_VALUE_DECODERS[0b00000010] = _decode_byte_sequence_long
+for _data_type in _INT_STRUCTS:
+    _VALUE_DECODERS[_data_type] = _make_integer_decoder(_data_type)
+# integer sequences decoded as an array (no int object per element), see PDUView.sequence_value
+_SEQUENCE_ARRAY_DECODERS = {}
+for _data_type in range(0b00001000, 0b00010000):
+    _SEQUENCE_ARRAY_DECODERS[_data_type] = _make_sequence_array_decoder(_data_type)
+    _VALUE_DECODERS[_data_type] = _make_sequence_decoder(_SEQUENCE_ARRAY_DECODERS[_data_type])
+for _data_type, _order in ((_DELTA_SEQUENCE, 1), (_DELTA2_SEQUENCE, 2)):
+    _SEQUENCE_ARRAY_DECODERS[_data_type] = _make_delta_array_decoder(_order)
+    _VALUE_DECODERS[_data_type] = _make_sequence_decoder(_SEQUENCE_ARRAY_DECODERS[_data_type])
+del _order
+_VALUE_DECODERS[0b00010000] = _decode_timestamp_type0_value
+_VALUE_DECODERS[0b00010001] = _decode_timestamp_type1_value
+# 0b0010xxxx: ASCII normalized (0000), everything else as Extended ASCII/ISO-8859-1
+_VALUE_DECODERS[0b00100000] = _make_string_decoder('ascii')
+for _data_type in range(0b00100001, 0b00110000):
+    _VALUE_DECODERS[_data_type] = _make_string_decoder('latin-1')
+for _data_type in (0b01000000, 0b01000001, 0b01000011):
+    _VALUE_DECODERS[_data_type] = _decode_iid_value
+del _data_type
+
+
+def _encode_v_list_value(value, strict=True):
+    """One V-List entry: (value, type) tuples, IIDs given as "x.y.z" strings, or auto-detected"""
+    if isinstance(value, tuple) and len(value) == 2:
+        value_data, value_type = value
+        return encode_value(value_data, value_type)
+    # ✅ Para IIDs, tenta primeiro como IID específico
+    if isinstance(value, str) and '.' in value:
+        try:
+            # Tenta como IID primeiro
+            return encode_value(value, "iid")
+        except ValueError:
+            # Se falhar como IID, trata como string normal
+            if not strict:
+                return encode_value(value, "string")
+            raise ValueError(f"Invalid IID format: {value}")
+    return encode_value(value)
+
+def encode_static_value(value):
+    """
+    Pre-encodes a V-List entry (same rules as encode_v_list) as an EncodedValue,
+    for values that are encoded many times without changing
+    """
+    return EncodedValue(_encode_v_list_value(value), value)
+
 def encode_v_list(values, strict=True):
     """
     ENCODE A V-LIST - VERSÃO MAIS RESTRITIVA
@@ -646,24 +1172,10 @@ def encode_v_list(values, strict=True):
     encoded_values = []
     for value in values:
         try:
-            if isinstance(value, tuple) and len(value) == 2:
-                value_data, value_type = value
-                encoded = encode_value(value_data, value_type)
+            if value.__class__ is EncodedValue:
+                encoded = value
             else:
-                # ✅ Para IIDs, tenta primeiro como IID específico
-                if isinstance(value, str) and '.' in value:
-                    try:
-                        # Tenta como IID primeiro
-                        encoded = encode_value(value, "iid")
-                    except ValueError:
-                        # Se falhar como IID, trata como string normal
-                        if not strict:
-                            encoded = encode_value(value, "string")
-                        else:
-                            raise ValueError(f"Invalid IID format: {value}")
-                else:
-                    encoded = encode_value(value)
-
+                encoded = _encode_v_list_value(value, strict)
             encoded_values.append(encoded)
 
         except Exception as e:
@@ -685,23 +1197,29 @@ def decode_v_list(data):
     if not data or len(data) == 0:
         return [], data
 
-    try:
-        num_elements = struct.unpack('>B', data[:1])[0]
-    except:
-        raise ValueError("Invalid V-List header")
+    decoded_values, offset = _decode_v_list_at(_as_view(data), 0)
+    return decoded_values, data[offset:]
+
+def _decode_v_list_at(buf, offset):
+    """
+    DECODE a V-List starting at buf[offset], returns (values, next offset)
+    """
+    if offset >= len(buf):
+        return [], offset
 
-    remaining_data = data[1:]
+    num_elements = buf[offset]
+    offset += 1
     decoded_values = []
 
     for i in range(num_elements):
         try:
-            value, remaining_data = decode_value(remaining_data)
+            value, offset = _decode_value_at(buf, offset)
             decoded_values.append(value)
         except ValueError as e:
             print(f"⚠️ Skipping corrupted value {i + 1}/{num_elements}: {e}")
             continue
 
-    return decoded_values, remaining_data
+    return decoded_values, offset
 
 def encode_t_list(timestamps):
     """
@@ -713,7 +1231,11 @@ def encode_t_list(timestamps):
     encoded_timestamps = []
     for timestamp in timestamps:
         try:
-            if isinstance(timestamp, str):
+            if timestamp.__class__ is Timestamp or timestamp.__class__ is int:
+                encoded = b'\x10' + encode_timestamp_type0(timestamp)
+            elif timestamp.__class__ is Uptime:
+                encoded = b'\x11' + encode_timestamp_type1(timestamp)
+            elif isinstance(timestamp, str):
                 if timestamp.count(':') == 6:
                     encoded_ts = encode_timestamp_type0(timestamp)
                     encoded = struct.pack('>B', 0b00010000) + encoded_ts
@@ -743,46 +1265,58 @@ def decode_t_list(data):
     if not data or len(data) == 0:
         return [], data
 
-    try:
-        num_elements = struct.unpack('>B', data[:1])[0]
-    except:
-        raise ValueError("Invalid T-List header")
+    decoded_timestamps, offset = _decode_t_list_at(_as_view(data), 0)
+    return decoded_timestamps, data[offset:]
+
+def _decode_t_list_at(buf, offset):
+    """
+    DECODE A T-List starting at buf[offset], returns (timestamps, next offset)
+    """
+    if offset >= len(buf):
+        return [], offset
 
-    remaining_data = data[1:]
+    num_elements = buf[offset]
+    offset += 1
     decoded_timestamps = []
 
     for i in range(num_elements):
         try:
-            timestamp, remaining_data = decode_timestamp(remaining_data)
+            timestamp, offset = _decode_timestamp_at(buf, offset)
             decoded_timestamps.append(timestamp)
         except ValueError as e:
             print(f"⚠️ Skipping corrupted timestamp {i + 1}/{num_elements}: {e}")
             continue
 
-    return decoded_timestamps, remaining_data
+    return decoded_timestamps, offset
 
 def decode_timestamp(data):
     """
     Decode a single timestap
     """
-    if len(data) < 1:
+    value, offset = _decode_timestamp_at(_as_view(data), 0)
+    return value, data[offset:]
+
+def _decode_timestamp_at(buf, offset):
+    """
+    Decode a single timestamp starting at buf[offset], returns (timestamp, next offset)
+    """
+    available = len(buf) - offset
+    if available < 1:
         raise ValueError("No data for timestap decoding")
 
-    data_type = data[0]
+    data_type = buf[offset]
 
     if data_type == 0b00010000: #type0
-        if len(data) < 7:
+        if available < 7:
             raise ValueError("Not enough data for timestamp type0")
-        timestamp_data = data[1:7]
-        value = decode_timestamp_type0(timestamp_data)
-        return value, data[7:]
+        value = Timestamp(*_TIMESTAMP_TYPE0.unpack_from(buf, offset + 1))
+        return value, offset + 7
 
     elif data_type == 0b00010001:   # type 1
-        if len(data) < 7:
+        if available < 7:
             raise ValueError("Not enough data for timestmap type 1")
-        timestamp_data = data[1:7]
-        value = decode_timestamp_type1(timestamp_data)
-        return value, data[7:]
+        value = Uptime(*_TIMESTAMP_TYPE1.unpack_from(buf, offset + 1))
+        return value, offset + 7
 
     else:
         raise ValueError(f"Invalid timestmap data type: {data_type:08b}")
@@ -837,26 +1371,23 @@ def decode_e_list(data):
     if not data or len(data) == 0:
         return [], data
 
-    try:
-        # 2. Lê número de elementos
-        num_elements = data[0]  # 1º byte
-        remaining = data[1:]  # Resto dos dados
-
-        # 3. Lê cada código de erro
-        error_codes = []
-        for i in range(num_elements):
-            if len(remaining) < 1:
-                break  # Dados insuficientes
+    error_codes, offset = _decode_e_list_at(_as_view(data), 0)
+    return error_codes, data[offset:]
 
-            error_code = remaining[0]  # Lê 1 byte
-            error_codes.append(error_code)
-            remaining = remaining[1:]  # Avança
+def _decode_e_list_at(buf, offset):
+    """
+    Decode E-List starting at buf[offset], returns (error_codes, next offset)
+    """
+    if offset >= len(buf):
+        return [], offset
 
-        return error_codes, remaining
+    # 2. Lê número de elementos
+    num_elements = buf[offset]
+    offset += 1
 
-    except Exception:
-        # Em caso de erro, retorna lista vazia
-        return [], data
+    # 3. Lê os códigos de erro (1 byte cada), pára se os dados acabarem
+    end = min(offset + num_elements, len(buf))
+    return list(buf[offset:end]), end
 
 def error_code_to_string(error_code):
     """
@@ -868,6 +1399,7 @@ def error_code_to_string(error_code):
 def encode_complete_pdu(msg_type, timestamp, msg_id, iid_list, v_list, t_list, e_list=None):
     """
     Encode completo L-SNMPvS PDU
+    timestamp: Timestamp, epoch ms, legacy string or None for the current time
     """
     if e_list is None:
         e_list = []
@@ -902,53 +1434,394 @@ def encode_complete_pdu(msg_type, timestamp, msg_id, iid_list, v_list, t_list, e
     return encoded
 
 
-def decode_complete_pdu(data):
+MAX_LIST_ENTRIES = 255      # the list counts are one byte
+
+def encode_split_pdus(msg_type, timestamp, msg_id, iid_list, v_list, max_size=None):
     """
-    Decode completo L-SNMPvS PDU
+    Encodes the (iid, value) pairs as few PDUs as possible, each with at most
+    max_size bytes (default MAX_DATAGRAM_SIZE) and MAX_LIST_ENTRIES entries.
+    The PDUs share the timestamp and get consecutive MSG-IDs. Returns a list
+    of bytes, one per datagram.
+    """
+    if len(iid_list) != len(v_list):
+        raise ValueError(f"IID-List and V-List sizes differ: {len(iid_list)} != {len(v_list)}")
+    if max_size is None:
+        max_size = MAX_DATAGRAM_SIZE
+    prefix = encode_tag() + encode_type(msg_type) + encode_timestamp_type0(timestamp)
+    # header + the 4 list counts, T-List and E-List are empty
+    base_size = PDU_HEADER_SIZE + 4
+    tail = encode_t_list([]) + encode_e_list([])
+
+    pdus = []
+    iids, values, size = [], [], base_size
+
+    def flush():
+        pdus.append(b''.join((prefix, encode_MSGID(msg_id + len(pdus)), bytes((len(iids),)), *iids,
+                              bytes((len(values),)), *values, tail)))
+
+    for iid, value in zip(iid_list, v_list):
+        encoded_iid = encode_single_iid(iid)
+        try:
+            encoded_value = value if value.__class__ is EncodedValue else _encode_v_list_value(value)
+        except Exception as e:
+            raise ValueError(f"Failed to encode value {value}: {e}")
+        entry_size = len(encoded_iid) + len(encoded_value)
+        if base_size + entry_size > max_size:
+            raise ValueError(f"Entry {iid} does not fit in a {max_size} byte PDU")
+        if iids and (size + entry_size > max_size or len(iids) == MAX_LIST_ENTRIES):
+            flush()
+            iids, values, size = [], [], base_size
+        iids.append(encoded_iid)
+        values.append(encoded_value)
+        size += entry_size
+    if iids or not pdus:
+        flush()
+    return pdus
+
+
+class PDUTemplate:
+    """
+    Pre-encoded PDU for messages that repeat the same type, IID-List, T-List and
+    E-List (sensor notifications, beacons). Only the timestamp, MSG-ID and V-List
+    change, so they are patched into a reusable bytearray on each render.
     """
-    remaining = data
 
-    # 1. Tag (8 bytes)
-    if len(remaining) < 8:
-        raise ValueError("Not enough data for tag")
-    tag_bytes = remaining[:8]
-    tag = decode_tag(tag_bytes)
-    remaining = remaining[8:]
+    def __init__(self, msg_type, iid_list, t_list=None, e_list=None):
+        self.msg_type = msg_type
+        self.iid_list = list(iid_list)
+        self._values_offset = PDU_HEADER_SIZE + len(encode_iid_list(self.iid_list))
+        self._tail = encode_t_list(t_list or []) + encode_e_list(e_list or [])
+        # tag + type + room for timestamp/MSG-ID + IID-List, followed by V-List + tail
+        prefix = encode_tag() + encode_type(msg_type) + bytes(14) + encode_iid_list(self.iid_list)
+        self._buffer = bytearray(prefix)
+        self._view = memoryview(self._buffer)
+
+    def _reserve(self, size):
+        """Makes sure the buffer holds size bytes, keeping the encoded prefix"""
+        if len(self._buffer) >= size:
+            return
+        # A new buffer instead of a resize, views from earlier renders may still be alive
+        buffer = bytearray(max(size, 2 * len(self._buffer)))
+        buffer[:self._values_offset] = self._buffer[:self._values_offset]
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+
+    def render(self, timestamp, msg_id, values):
+        """
+        Patches timestamp (None for the current time), MSG-ID and values into the template.
+        Returns a memoryview that is only valid until the next render.
+        """
+        encoded_values = encode_v_list(values)
+        values_end = self._values_offset + len(encoded_values)
+        end = values_end + len(self._tail)
+        self._reserve(end)
+
+        buffer = self._buffer
+        buffer[9:15] = encode_timestamp_type0(timestamp)
+        _MSGID.pack_into(buffer, 15, msg_id)
+        buffer[self._values_offset:values_end] = encoded_values
+        buffer[values_end:end] = self._tail
+        return self._view[:end]
+
+    def render_bytes(self, timestamp, msg_id, values):
+        """Same as render() but returns an independent bytes object"""
+        return bytes(self.render(timestamp, msg_id, values))
+
+# ---------------------------------------------------------------------------
+# Skipping (offsets without building Python objects), used by PDUView
+# ---------------------------------------------------------------------------
+
+_IID_SIZES = {0b01000000: 3, 0b01000001: 5, 0b01000011: 7}
+
+# Total size of the fixed width value types, None for variable ones
+_VALUE_SIZES = [None] * 256
+for _data_type, _size in ((0b00000000, 2), (0b00000100, 2), (0b00000101, 3), (0b00000110, 5),
+                          (0b00000111, 9), (0b00010000, 7), (0b00010001, 7)):
+    _VALUE_SIZES[_data_type] = _size
+for _data_type, _size in _IID_SIZES.items():
+    _VALUE_SIZES[_data_type] = _size
+del _data_type, _size
+
+
+def _skip_iid_list_at(buf, offset):
+    """Offset after the IID-List at buf[offset] (same rules as _decode_iid_list_at)"""
+    if offset >= len(buf):
+        return offset
+    num_elements = buf[offset]
+    offset += 1
+    end = len(buf)
+    for _ in range(num_elements):
+        # corrupted IIDs are skipped without advancing, like the decoder does
+        if offset < end:
+            size = _IID_SIZES.get(buf[offset])
+            if size is not None and end - offset >= size:
+                offset += size
+    return offset
+
+def _skip_value_at(buf, offset):
+    """Offset after the value at buf[offset], raises ValueError like _decode_value_at"""
+    available = len(buf) - offset
+    if available < 1:
+        raise ValueError("No data for value decoding")
+    data_type = buf[offset]
+    size = _VALUE_SIZES[data_type]
+    if size is not None:
+        if available < size:
+            raise ValueError("Value decoding failed: not enough data")
+        return offset + size
+    if 0b00001000 <= data_type < 0b00010000:
+        element_size = _SEQUENCE_ELEMENTS[data_type & 0b00000011][0]
+        if (data_type & 0b00000100) == 0:
+            header_size = 2
+            count = buf[offset + 1] if available >= 2 else None
+        else:
+            header_size = 3
+            count = _U16.unpack_from(buf, offset + 1)[0] if available >= 3 else None
+        if count is None or available < header_size + count * element_size:
+            raise ValueError("Value decoding failed: not enough data for integer sequence")
+        return offset + header_size + count * element_size
+    # byte sequences, strings and delta sequences carry validation rules, let the decoder apply them
+    return _decode_value_at(buf, offset)[1]
+
+def _skip_v_list_at(buf, offset):
+    """Offset after the V-List at buf[offset] (same rules as _decode_v_list_at)"""
+    if offset >= len(buf):
+        return offset
+    num_elements = buf[offset]
+    offset += 1
+    for _ in range(num_elements):
+        try:
+            offset = _skip_value_at(buf, offset)
+        except ValueError:
+            continue
+    return offset
+
+def _skip_t_list_at(buf, offset):
+    """Offset after the T-List at buf[offset] (same rules as _decode_t_list_at)"""
+    if offset >= len(buf):
+        return offset
+    num_elements = buf[offset]
+    offset += 1
+    end = len(buf)
+    for _ in range(num_elements):
+        if end - offset >= 7 and buf[offset] in (0b00010000, 0b00010001):
+            offset += 7
+    return offset
+
+def iid_list_fingerprint(iid_list):
+    """
+    Fingerprint of an IID-List, comparable with PDUView.iid_fingerprint
+    (it is the encoded IID-List itself)
+    """
+    return encode_iid_list(iid_list)
 
-    # 2. Type (1 byte)
-    if len(remaining) < 1:
-        raise ValueError("Not enough data for type")
-    type_byte = remaining[0]
-    msg_type = decode_type(type_byte)
-    remaining = remaining[1:]
 
-    # 3. Timestamp (6 bytes)
-    if len(remaining) < 6:
-        raise ValueError("Not enough data for timestamp")
-    timestamp_data = remaining[:6]
-    timestamp = decode_timestamp_type0(timestamp_data)
-    remaining = remaining[6:]
+class PDUView:
+    """
+    Lazy L-SNMPvS PDU. The header is validated when the view is created, the
+    IID/V/T/E lists are only decoded on first access. Supports the same keys
+    as the dict returned by decode_complete_pdu (view['iid_list'], ...).
 
-    # 4. MSG-ID (8 bytes)
-    if len(remaining) < 8:
-        raise ValueError("Not enough data for MSG-ID")
-    msgid_data = remaining[:8]
-    msg_id = decode_MSGID(msgid_data)
-    remaining = remaining[8:]
+    The view keeps a reference to data, a reused receive buffer must not be
+    overwritten while the view is in use.
+    """
+    KEYS = ('tag', 'type', 'timestamp', 'msg_id', 'iid_list', 'v_list', 't_list', 'e_list', 'remaining_data')
+
+    __slots__ = ('_buf', 'tag', 'type', 'msg_id', '_timestamp', '_iid_list', '_v_list', '_t_list',
+                 '_e_list', '_iid_end', '_v_end', '_t_end', '_e_end')
+
+    def __init__(self, data):
+        buf = _as_view(data)
+        self.tag, self.type, _, self.msg_id = _decode_header(buf, with_timestamp=False)
+        self._buf = buf
+        self._timestamp = None
+        self._iid_list = None
+        self._v_list = None
+        self._t_list = None
+        self._e_list = None
+        self._iid_end = None
+        self._v_end = None
+        self._t_end = None
+        self._e_end = None
+
+    # --- offsets -----------------------------------------------------------
+
+    @property
+    def iid_end(self):
+        if self._iid_end is None:
+            self._iid_end = _skip_iid_list_at(self._buf, PDU_HEADER_SIZE)
+        return self._iid_end
+
+    @property
+    def v_end(self):
+        if self._v_end is None:
+            self._v_end = _skip_v_list_at(self._buf, self.iid_end)
+        return self._v_end
+
+    @property
+    def t_end(self):
+        if self._t_end is None:
+            self._t_end = _skip_t_list_at(self._buf, self.v_end)
+        return self._t_end
+
+    # --- lazily decoded fields ---------------------------------------------
+
+    @property
+    def timestamp(self):
+        if self._timestamp is None:
+            self._timestamp = Timestamp(*_TIMESTAMP_TYPE0.unpack_from(self._buf, 9))
+        return self._timestamp
+
+    @property
+    def timestamp_ms(self):
+        """Header timestamp as milliseconds since the epoch"""
+        return self.timestamp.to_epoch_ms()
+
+    @property
+    def iid_list(self):
+        if self._iid_list is None:
+            self._iid_list, self._iid_end = _decode_iid_list_at(self._buf, PDU_HEADER_SIZE)
+        return self._iid_list
+
+    @property
+    def v_list(self):
+        if self._v_list is None:
+            self._v_list, self._v_end = _decode_v_list_at(self._buf, self.iid_end)
+        return self._v_list
+
+    @property
+    def t_list(self):
+        if self._t_list is None:
+            self._t_list, self._t_end = _decode_t_list_at(self._buf, self.v_end)
+        return self._t_list
+
+    @property
+    def e_list(self):
+        if self._e_list is None:
+            self._e_list, self._e_end = _decode_e_list_at(self._buf, self.t_end)
+        return self._e_list
+
+    @property
+    def remaining_data(self):
+        if self._e_end is None:
+            self.e_list
+        return bytes(self._buf[self._e_end:])
+
+    # --- cheap accessors ---------------------------------------------------
+
+    @property
+    def iid_count(self):
+        """Number of IIDs announced in the IID-List header"""
+        return self._buf[PDU_HEADER_SIZE] if len(self._buf) > PDU_HEADER_SIZE else 0
+
+    @property
+    def iid_fingerprint(self):
+        """Raw IID-List bytes, compare with iid_list_fingerprint([...])"""
+        return bytes(self._buf[PDU_HEADER_SIZE:self.iid_end])
+
+    @property
+    def first_iid(self):
+        """First IID (shared Iid object) or None, without decoding the whole list"""
+        if self.iid_count == 0:
+            return None
+        try:
+            return _decode_single_iid_at(self._buf, PDU_HEADER_SIZE + 1)[0]
+        except ValueError:
+            return None
+
+    def first_value(self):
+        """First value of the V-List or None, without decoding the whole list"""
+        offset = self.iid_end
+        if offset >= len(self._buf) or self._buf[offset] == 0:
+            return None
+        try:
+            return _decode_value_at(self._buf, offset + 1)[0]
+        except ValueError:
+            return None
+
+    def sequence_value(self, index=0):
+        """
+        Integer sequence at index of the V-List as an array (no int object per
+        element), None if that value is not an integer sequence
+        """
+        buf = self._buf
+        offset = self.iid_end
+        if offset >= len(buf) or index >= buf[offset]:
+            return None
+        offset += 1
+        try:
+            for _ in range(index):
+                offset = _skip_value_at(buf, offset)
+            decode_array = _SEQUENCE_ARRAY_DECODERS.get(buf[offset])
+            if decode_array is None:
+                return None
+            return decode_array(buf, offset, len(buf) - offset)[0]
+        except (ValueError, IndexError):
+            return None
+
+    def first_value_int(self):
+        """First value of the V-List if it is an integer (or single byte), else None"""
+        offset = self.iid_end + 1
+        if offset >= len(self._buf) or self._buf[offset - 1] == 0:
+            return None
+        data_type = self._buf[offset]
+        if data_type == 0b00000000 or 0b00000100 <= data_type <= 0b00000111:
+            try:
+                return _VALUE_DECODERS[data_type](self._buf, offset, len(self._buf) - offset)[0]
+            except ValueError:
+                return None
+        return None
+
+    # --- dict compatibility ------------------------------------------------
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self, timestamp_strings=False):
+        """Fully decoded PDU, same dict as decode_complete_pdu"""
+        decoded = {key: getattr(self, key) for key in self.KEYS}
+        if timestamp_strings:
+            _timestamps_to_strings(decoded)
+        return decoded
+
+    def __repr__(self):
+        return f"PDUView(type={self.type!r}, msg_id={self.msg_id}, iids={self.iid_count})"
+
+def decode_complete_pdu(data, timestamp_strings=False):
+    """
+    Decode completo L-SNMPvS PDU
+
+    Works with a cursor over a memoryview of data, so no intermediate
+    copies of the remaining buffer are made while decoding. Timestamps are
+    returned as Timestamp/Uptime objects, timestamp_strings=True gives the
+    legacy "d:m:y:h:m:s:ms" strings instead.
+    """
+    buf = _as_view(data)
+
+    tag, msg_type, timestamp, msg_id = _decode_header(buf)
+    offset = PDU_HEADER_SIZE
 
     # 5. IID-List (variável)
-    iid_list, remaining = decode_iid_list(remaining)
+    iid_list, offset = _decode_iid_list_at(buf, offset)
 
     # 6. V-List (variável)
-    v_list, remaining = decode_v_list(remaining)
+    v_list, offset = _decode_v_list_at(buf, offset)
 
     # 7. T-List (variável)
-    t_list, remaining = decode_t_list(remaining)
+    t_list, offset = _decode_t_list_at(buf, offset)
 
     # 8. E-List (variável)
-    e_list, remaining = decode_e_list(remaining)
+    e_list, offset = _decode_e_list_at(buf, offset)
 
-    return {
+    decoded = {
         'tag': tag,
         'type': msg_type,
         'timestamp': timestamp,
@@ -957,8 +1830,255 @@ def decode_complete_pdu(data):
         'v_list': v_list,
         't_list': t_list,
         'e_list': e_list,
-        'remaining_data': remaining
+        'remaining_data': bytes(buf[offset:])
     }
+    if timestamp_strings:
+        _timestamps_to_strings(decoded)
+    return decoded
+
+def _timestamps_to_strings(decoded):
+    """Replaces the Timestamp/Uptime objects of a decoded PDU by their legacy strings"""
+    decoded['timestamp'] = str(decoded['timestamp'])
+    decoded['v_list'] = [str(value) if value.__class__ in (Timestamp, Uptime) else value
+                         for value in decoded['v_list']]
+    decoded['t_list'] = [str(timestamp) for timestamp in decoded['t_list']]
+
+def _decode_header(buf, with_timestamp=True):
+    """
+    Decode the fixed PDU header (tag, type, timestamp, msg-id)
+    """
+    # 1. Tag (8 bytes)
+    if len(buf) < 8:
+        raise ValueError("Not enough data for tag")
+    tag = decode_tag(buf[:8])
+
+    # 2. Type (1 byte)
+    if len(buf) < 9:
+        raise ValueError("Not enough data for type")
+    msg_type = decode_type(buf[8])
+
+    # 3. Timestamp (6 bytes)
+    if len(buf) < 15:
+        raise ValueError("Not enough data for timestamp")
+    timestamp = Timestamp(*_TIMESTAMP_TYPE0.unpack_from(buf, 9)) if with_timestamp else None
+
+    # 4. MSG-ID (8 bytes)
+    if len(buf) < PDU_HEADER_SIZE:
+        raise ValueError("Not enough data for MSG-ID")
+    msg_id = _MSGID.unpack_from(buf, 15)[0]
+
+    return tag, msg_type, timestamp, msg_id
+
+# ---------------------------------------------------------------------------
+# Streams of PDUs (TCP-like byte streams, capture files)
+# ---------------------------------------------------------------------------
+
+_LENGTH_PREFIXES = {2: struct.Struct('>H'), 4: struct.Struct('>I')}
+
+
+def _value_end(buf, offset, end):
+    """End of the value at buf[offset] in a stream, None if incomplete"""
+    available = end - offset
+    data_type = buf[offset]
+    size = _VALUE_SIZES[data_type]
+    if size is not None:
+        return offset + size if available >= size else None
+
+    if data_type in (0b00000001, 0b00000010) or (data_type & 0b11110000) == 0b00100000:
+        # byte sequences and strings: 1 or 2 byte length header
+        if data_type == 0b00000001:
+            if available < 2:
+                return None
+            size = 2 + buf[offset + 1]
+        else:
+            if available < 3:
+                return None
+            size = 3 + _U16.unpack_from(buf, offset + 1)[0]
+    elif 0b00001000 <= data_type < 0b00010000:
+        element_size = _SEQUENCE_ELEMENTS[data_type & 0b00000011][0]
+        if (data_type & 0b00000100) == 0:
+            if available < 2:
+                return None
+            size = 2 + buf[offset + 1] * element_size
+        else:
+            if available < 3:
+                return None
+            size = 3 + _U16.unpack_from(buf, offset + 1)[0] * element_size
+    elif data_type == _DELTA_SEQUENCE or data_type == _DELTA2_SEQUENCE:
+        if available < _DELTA_HEADER.size:
+            return None
+        size = _DELTA_HEADER.size + _U16.unpack_from(buf, offset + 3)[0]
+    else:
+        raise ValueError(f"Unknow value data type: {data_type:08b}")
+    return offset + size if available >= size else None
+
+def pdu_end(buf, offset=0, end=None):
+    """
+    Offset where the PDU starting at buf[offset] ends, or None if buf does not
+    hold the complete PDU yet. Unlike the datagram decoder every list header
+    must be present and corrupted entries raise ValueError, since a stream
+    cannot be re-synchronised after them.
+    """
+    if end is None:
+        end = len(buf)
+    if end - offset < PDU_HEADER_SIZE:
+        return None
+    if buf[offset:offset + 8] != PROTOCOL_TAG:
+        raise ValueError(f"Invalid protocol tag at offset {offset}")
+    position = offset + PDU_HEADER_SIZE
+
+    # IID-List
+    if position >= end:
+        return None
+    count = buf[position]
+    position += 1
+    for _ in range(count):
+        if position >= end:
+            return None
+        size = _IID_SIZES.get(buf[position])
+        if size is None:
+            raise ValueError(f"Unknow IID data type: {buf[position]:08b}")
+        position += size
+
+    # V-List
+    if position >= end:
+        return None
+    count = buf[position]
+    position += 1
+    for _ in range(count):
+        if position >= end:
+            return None
+        position = _value_end(buf, position, end)
+        if position is None:
+            return None
+
+    # T-List
+    if position >= end:
+        return None
+    count = buf[position]
+    position += 1
+    for _ in range(count):
+        if position >= end:
+            return None
+        if buf[position] not in (0b00010000, 0b00010001):
+            raise ValueError(f"Invalid timestmap data type: {buf[position]:08b}")
+        position += 7
+
+    # E-List
+    if position >= end:
+        return None
+    position += 1 + buf[position]
+    return position if position <= end else None
+
+def _next_frame(buf, offset, end, length_prefix):
+    """(frame start, frame end) of the next PDU, None if incomplete"""
+    if not length_prefix:
+        frame_end = pdu_end(buf, offset, end)
+        return None if frame_end is None else (offset, frame_end)
+    prefix = _LENGTH_PREFIXES[length_prefix]
+    if end - offset < prefix.size:
+        return None
+    start = offset + prefix.size
+    frame_end = start + prefix.unpack_from(buf, offset)[0]
+    return (start, frame_end) if frame_end <= end else None
+
+
+class PDUStreamDecoder:
+    """
+    Incremental decoder for concatenated PDUs arriving in arbitrary chunks.
+    length_prefix=0 finds PDU boundaries by parsing them, 2 or 4 expects every
+    PDU to be preceded by its big-endian length. feed() yields decoded PDUs
+    (dicts, or PDUView objects with lazy=True) as soon as each one completes;
+    incomplete frames stay in the buffer until more data arrives.
+    """
+
+    def __init__(self, length_prefix=0, lazy=False):
+        if length_prefix and length_prefix not in _LENGTH_PREFIXES:
+            raise ValueError(f"length_prefix must be 0, 2 or 4: {length_prefix}")
+        self.length_prefix = length_prefix
+        self.lazy = lazy
+        self._buffer = bytearray()
+        self._start = 0
+
+    @property
+    def pending(self):
+        """Number of buffered bytes that are not a complete PDU yet"""
+        return len(self._buffer) - self._start
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of the stream (right away, even if the result is not
+        iterated), returns an iterator over every PDU completed by it
+        """
+        self._buffer += chunk
+        return self._drain()
+
+    def _drain(self):
+        buffer = self._buffer
+        while True:
+            with memoryview(buffer) as view:
+                frame = _next_frame(view, self._start, len(buffer), self.length_prefix)
+                if frame is None:
+                    break
+                start, end = frame
+                if self.lazy:
+                    # the buffer is reused, the view gets its own copy of the frame
+                    pdu = PDUView(bytes(view[start:end]))
+                else:
+                    pdu = decode_complete_pdu(view[start:end])
+            self._start = end
+            yield pdu
+        # Drop consumed bytes once they are the larger part of the buffer
+        if self._start and self._start * 2 >= len(buffer):
+            del buffer[:self._start]
+            self._start = 0
+
+
+def iter_pdus(data, length_prefix=0, lazy=False):
+    """
+    Yields every PDU of a complete buffer of concatenated PDUs (bytes, mmap...).
+    With lazy=True the PDUView objects point into data, nothing is copied.
+    """
+    buf = _as_view(data)
+    offset = 0
+    end = len(buf)
+    while offset < end:
+        frame = _next_frame(buf, offset, end, length_prefix)
+        if frame is None:
+            raise ValueError(f"Truncated PDU at offset {offset}")
+        start, offset = frame
+        if lazy:
+            yield PDUView(buf[start:offset])
+        else:
+            yield decode_complete_pdu(buf[start:offset])
+
+def iter_capture_file(path, length_prefix=0, lazy=False):
+    """
+    Yields the PDUs stored in a capture file. The file is memory mapped, so
+    memory use stays constant whatever the file size.
+    """
+    with open(path, 'rb') as capture:
+        if os.fstat(capture.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield from iter_pdus(mapped, length_prefix, lazy)
+        finally:
+            try:
+                mapped.close()
+            except BufferError:
+                # lazy views still point into the mapping, it closes when they are gone
+                pass
+
+def write_capture_file(path, pdus, length_prefix=0):
+    """Writes encoded PDUs to a capture file readable by iter_capture_file"""
+    prefix = _LENGTH_PREFIXES.get(length_prefix)
+    with open(path, 'wb') as capture:
+        for pdu in pdus:
+            if prefix is not None:
+                capture.write(prefix.pack(len(pdu)))
+            capture.write(pdu)
+
 
 def get_current_timestamp():
     """
@@ -967,15 +2087,184 @@ def get_current_timestamp():
     now = datetime.now()
     return f"{now.day}:{now.month}:{now.year}:{now.hour}:{now.minute}:{now.second}:{now.microsecond // 1000}"
 
+# AES-ECB objects per key, ECB keeps no state between calls so they are reused
+_ECB_CIPHERS = {}
+
+def _ecb_cipher(key):
+    cipher = _ECB_CIPHERS.get(key)
+    if cipher is None:
+        cipher = _ECB_CIPHERS[key] = AES.new(key, AES.MODE_ECB)
+    return cipher
+
 def encrypt(pdu_bytes, key):
     """Encrypt PDU bytes - call this BEFORE sending"""
     # Simple AES-ECB (for simplicity - CBC would be better)
-    cipher = AES.new(key, AES.MODE_ECB)
+    cipher = _ecb_cipher(key)
     padded = pad(pdu_bytes, AES.block_size)
     return cipher.encrypt(padded)
 
 def decrypt(encrypted_bytes, key):
     """Decrypt PDU bytes - call this AFTER receiving"""
-    cipher = AES.new(key, AES.MODE_ECB)
+    cipher = _ecb_cipher(key)
     decrypted = cipher.decrypt(encrypted_bytes)
-    return unpad(decrypted, AES.block_size)
\ No newline at end of file
+    return unpad(decrypted, AES.block_size)
+
+
+# Largest UDP payload, sizes the session buffers
+MAX_DATAGRAM_SIZE = 65507
+AEAD_NONCE_SIZE = 8
+AEAD_TAG_SIZE = 16
+
+
+class CryptoSession:
+    """
+    Encryption of the request/response datagrams for one shared key.
+
+    mode="ecb" is the legacy AES-ECB + PKCS#7 format (same bytes as
+    encrypt/decrypt). mode="aead" is AES-CTR + HMAC-SHA256:
+        nonce (8) | ciphertext | tag (16, truncated HMAC of nonce + ciphertext)
+    and datagrams with a wrong tag are rejected before anything is decrypted
+    or decoded.
+
+    The ECB cipher and the HMAC key state are set up once per session, the
+    CTR cipher once per datagram (its nonce) and it writes straight into the
+    output buffer. seal()/open() return a memoryview of a preallocated
+    session buffer that is only valid until the next call of the same method,
+    seal_into()/open_into() write into a caller supplied bytearray/memoryview.
+    Not thread safe, use one session per thread.
+    """
+
+    MODES = ("ecb", "aead")
+
+    def __init__(self, key, mode="ecb", max_size=MAX_DATAGRAM_SIZE):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown crypto mode: {mode}")
+        self.mode = mode
+        self.max_size = max_size
+        if mode == "ecb":
+            self.overhead = AES.block_size
+            self._cipher = _ecb_cipher(key)
+        else:
+            self.overhead = AEAD_NONCE_SIZE + AEAD_TAG_SIZE
+            # independent keys for encryption and authentication
+            self._enc_key = hashlib.sha256(b"L-SNMPvS enc" + key).digest()[:16]
+            self._mac = hmac.new(hashlib.sha256(b"L-SNMPvS mac" + key).digest(), digestmod=hashlib.sha256)
+        self._seal_buffer = memoryview(bytearray(max_size + self.overhead))
+        self._open_buffer = memoryview(bytearray(max_size + self.overhead))
+        self.rejected = 0
+
+    def seal(self, pdu):
+        """Encrypts a PDU, returns a view of the session buffer"""
+        return self._seal_buffer[:self.seal_into(pdu, self._seal_buffer)]
+
+    def open(self, datagram):
+        """Authenticates/decrypts a datagram, returns a view of the session buffer"""
+        return self._open_buffer[:self.open_into(datagram, self._open_buffer)]
+
+    def seal_into(self, pdu, out):
+        """Encrypts pdu into out, returns the number of bytes written"""
+        size = len(pdu)
+        if size > self.max_size:
+            raise ValueError(f"PDU too large to encrypt: {size} bytes")
+        if self.mode == "ecb":
+            padding = AES.block_size - size % AES.block_size
+            total = size + padding
+            out[:total] = self._cipher.encrypt(bytes(pdu) + bytes((padding,)) * padding)
+            return total
+
+        nonce = os.urandom(AEAD_NONCE_SIZE)
+        body_end = AEAD_NONCE_SIZE + size
+        total = body_end + AEAD_TAG_SIZE
+        out = memoryview(out)
+        out[:AEAD_NONCE_SIZE] = nonce
+        self._ctr(nonce).encrypt(pdu, output=out[AEAD_NONCE_SIZE:body_end])
+        mac = self._mac.copy()
+        mac.update(out[:body_end])
+        out[body_end:total] = mac.digest()[:AEAD_TAG_SIZE]
+        return total
+
+    def open_into(self, datagram, out):
+        """
+        Authenticates and decrypts datagram into out, returns the PDU size.
+        Raises ValueError (and counts it in self.rejected) for forged,
+        corrupted or truncated datagrams.
+        """
+        try:
+            return self._open_into(datagram, out)
+        except ValueError:
+            self.rejected += 1
+            raise
+
+    def _open_into(self, datagram, out):
+        total = len(datagram)
+        if self.mode == "ecb":
+            if total == 0 or total % AES.block_size or total > self.max_size + self.overhead:
+                raise ValueError(f"Invalid encrypted datagram size: {total}")
+            # decrypted straight into out (the padding is overwritten by the next datagram)
+            plain = memoryview(out)[:total]
+            self._cipher.decrypt(datagram, output=plain)
+            padding = plain[-1]
+            if not 1 <= padding <= AES.block_size or plain[total - padding:] != bytes((padding,)) * padding:
+                raise ValueError("Invalid padding")
+            # ECB has no integrity check, at least make sure it looks like a PDU
+            if plain[:len(PROTOCOL_TAG)] != PROTOCOL_TAG:
+                raise ValueError("Decrypted datagram is not a L-SNMPvS PDU")
+            return total - padding
+
+        size = total - self.overhead
+        if size < 0 or size > self.max_size:
+            raise ValueError(f"Invalid encrypted datagram size: {total}")
+        datagram = memoryview(datagram)
+        body_end = AEAD_NONCE_SIZE + size
+        mac = self._mac.copy()
+        mac.update(datagram[:body_end])
+        if not hmac.compare_digest(mac.digest()[:AEAD_TAG_SIZE], datagram[body_end:]):
+            raise ValueError("Datagram authentication failed")
+        self._ctr(datagram[:AEAD_NONCE_SIZE]).decrypt(datagram[AEAD_NONCE_SIZE:body_end],
+                                                     output=memoryview(out)[:size])
+        return size
+
+    def _ctr(self, nonce):
+        """AES-CTR of one datagram, counter blocks: nonce | 64-bit block index from 0"""
+        return AES.new(self._enc_key, AES.MODE_CTR, nonce=bytes(nonce), initial_value=0)
+
+
+class ReceiveBuffers:
+    """
+    Reusable receive buffers of a socket. recvfrom(sock) receives the next
+    datagram with recvfrom_into into the next buffer of the pool (round robin)
+    and returns a memoryview of it, valid until the pool comes back to that
+    buffer (after `count` more datagrams).
+
+    Every buffer has one byte more than max_datagram: a datagram that fills it
+    was larger than the maximum and truncated by the kernel, it is counted in
+    self.oversize and dropped instead of being decoded.
+    """
+
+    def __init__(self, max_datagram=MAX_DATAGRAM_SIZE, count=1):
+        self.max_datagram = max_datagram
+        size = max_datagram + 1
+        pool = memoryview(bytearray(size * count))
+        self._buffers = [pool[i * size:(i + 1) * size] for i in range(count)]
+        self._next = 0
+        self.received = 0
+        self.oversize = 0
+
+    def recvfrom(self, sock):
+        """(view of the datagram, addr), the view is None for an oversize datagram"""
+        buffer = self._buffers[self._next]
+        try:
+            size, addr = sock.recvfrom_into(buffer)
+        except OSError as e:
+            # Windows fails the receive instead of truncating (WSAEMSGSIZE)
+            if getattr(e, "winerror", None) != 10040:
+                raise
+            self.received += 1
+            self.oversize += 1
+            return None, None
+        self.received += 1
+        if size > self.max_datagram:
+            self.oversize += 1
+            return None, addr
+        self._next = (self._next + 1) % len(self._buffers)
+        return buffer[:size], addr
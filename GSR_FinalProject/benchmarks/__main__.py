@@ -0,0 +1,30 @@
+import argparse
+import sys
+
+from benchmarks import suite
+
+parser = argparse.ArgumentParser(prog="python -m benchmarks", description="L-SNMPvS codec benchmark suite")
+parser.add_argument("--repeat", type=int, default=5, help="timing repetitions per case")
+parser.add_argument("--filter", help="only run the cases whose name contains this text")
+parser.add_argument("--save", metavar="PATH", help="store the results as a JSON baseline")
+parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+parser.add_argument("--threshold", type=float, default=0.10,
+                    help="slowdown flagged as a regression when comparing (default 0.10 = 10%%)")
+args = parser.parse_args()
+
+results = suite.run(args.repeat, args.filter)
+baseline = suite.load_baseline(args.compare) if args.compare else None
+suite.print_report(results, baseline)
+
+if args.save:
+    suite.save_baseline(args.save, results)
+    print(f"\nBaseline saved to {args.save}")
+
+if baseline is not None:
+    regressions = suite.compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for name, before, after in regressions:
+            print(f"   {name}: {before:.0f} -> {after:.0f} ns/op")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
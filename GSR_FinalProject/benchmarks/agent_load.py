@@ -0,0 +1,79 @@
+"""
+Agent throughput on loopback: requests/s answered by Agent.multicore with
+1, 2, 4... workers, under closed-loop GET load from several client processes.
+
+Run from GSR_FinalProject (Linux):
+    python -m benchmarks.agent_load --workers 1 2 4 --clients 8 --seconds 5
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from Protocol.protocol import encode_complete_pdu, CryptoSession
+
+SHARED_KEY = "default_key_12345678"
+REQUEST_IIDS = ["1.1", "1.2", "1.5", "2.3.1", "2.7.1"]
+
+
+def _client(port, seconds, results):
+    """Sends a GET, waits for its response, repeats, counts the responses"""
+    session = CryptoSession(hashlib.sha256(SHARED_KEY.encode()).digest()[:16], "ecb")
+    request = bytes(session.seal(encode_complete_pdu("get-request", time.time_ns() // 1000000, 1,
+                                                     REQUEST_IIDS, [], [], [])))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(0.5)
+    answered = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        sock.sendto(request, ("localhost", port))
+        try:
+            sock.recvfrom(2048)
+            answered += 1
+        except socket.timeout:
+            pass
+    results.put(answered)
+
+
+def measure(workers, clients, seconds, port, batch=False):
+    """Requests/s of an agent with `workers` processes"""
+    # the agent prints every request (except in batch mode), its output is discarded
+    command = [sys.executable, "-m", "Agent.multicore", "--workers", str(workers), "--port", str(port)]
+    if batch:
+        command.append("--batch")
+    agent = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(1.0 + 0.2 * workers)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_client, args=(port, seconds, results)) for _ in range(clients)]
+        for process in processes:
+            process.start()
+        answered = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        return answered / seconds
+    finally:
+        agent.terminate()
+        agent.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.agent_load", description="Agent loopback throughput")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="client processes (closed loop)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=21161)
+    parser.add_argument("--batch", action="store_true", help="agent in batch receive mode")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores, {args.clients} clients, {args.seconds}s per run"
+          f"{', batch mode' if args.batch else ''}")
+    single = None
+    for workers in args.workers:
+        rate = measure(workers, args.clients, args.seconds, args.port, args.batch)
+        single = single or rate
+        print(f"   {workers:>3} workers: {rate:>10.0f} req/s   x{rate / single:.2f}")
@@ -0,0 +1,312 @@
+"""
+Reference copy of the if/elif value codec that Protocol.protocol used before
+the table driven codec. Only used by the benchmarks as the "before" side.
+"""
+import struct
+
+from Protocol.protocol import (decode_single_iid, decode_timestamp_type0, decode_timestamp_type1,
+                               encode_single_iid, encode_timestamp_type0, encode_timestamp_type1)
+
+
+def encode_value(value_data, value_type=None):
+    """
+    Encode a single value (if/elif implementation)
+    """
+    try:
+        #Auto-detect type if not provided
+        if value_type is None:
+            if isinstance(value_data, int):
+                if value_data < -128 or value_data > 255:
+                    value_type = "integer"
+                value_type = "integer"
+            elif isinstance(value_data, str):
+                if ":" in str(value_data):
+                    value_type = "timestamp"
+                else:
+                    value_type = "string"
+            elif isinstance(value_data, bytes):
+                value_type = "byte"
+            elif isinstance(value_data, list):
+                if not value_data:
+                    raise ValueError("Empty list cannot be auto-detected")
+
+                if all(isinstance(x, int) for x in value_data):
+                    value_type = "integer"
+
+                elif all(isinstance(x, str) and x.isdigit() for x in value_data):
+                    value_data = [int(x) for x in value_data]
+                    value_type = "integer"
+
+                elif all(isinstance(x, bytes) for x in value_data):
+                    value_data = b''.join(value_data)
+                    value_type = "bytes"
+
+                else:
+                    raise ValueError(f"Cannot auto-detect type for list: {value_data}. Mixed types or unsopported elemtes")
+            else:
+                raise ValueError(f"Cannot auto-detect type for: {value_data}")
+
+
+        # Byte types
+        if value_type == "byte":
+            if isinstance(value_data, int):
+                if 0 <= value_data <= 255:
+                    return struct.pack('>B', 0b00000000) + struct.pack('>B', value_data)
+                else:
+                    raise ValueError(f"Byte value out of range: {value_data}. Must be 0-255")
+            elif isinstance(value_data, bytes):
+                if len(value_data) <= 255:
+                    return struct.pack('>BB', 0b00000001, len(value_data)) + value_data
+                elif len(value_data) <= 65535:
+                    return struct.pack('>BH', 0b00000010, len(value_data)) + value_data
+                else:
+                    raise ValueError(f"Byte sequence too long: {len(value_data)}")
+
+        #INTEGER types
+        elif value_type == "integer":
+            if isinstance(value_data, int):
+                if -128 <= value_data <= 127:
+                    return struct.pack('>Bb', 0b00000100, value_data)
+                elif -32768 <= value_data <= 32767:
+                    return struct.pack('>Bh', 0b00000101, value_data)
+                elif -2147483648 <= value_data <= 2147483647:
+                    return struct.pack('>Bi', 0b00000110, value_data)
+                else:
+                    return struct.pack('>Bq', 0b00000111, value_data)
+            elif isinstance(value_data, list):
+                if not value_data:
+                    raise ValueError("Empty integer sequence")
+
+                #Check all elements are integers
+                if not all(isinstance(x, int) for x in value_data):
+                    raise ValueError("All sequence elements must be integers")
+
+                # Determine size needed
+                max_val = max(max(value_data), abs(min(value_data))) if value_data else 0
+
+                if max_val <= 127:
+                    if len(value_data) <= 255:
+                        encoded = struct.pack('>BB', 0b00001000, len(value_data))
+                        encoded += struct.pack('>' + 'b' * len(value_data), *value_data)
+                        return encoded
+                    else:
+                        encoded = struct.pack('>BH', 0b00001100, len(value_data))
+                        encoded += struct.pack('>' + 'b' * len(value_data), *value_data)
+                        return encoded
+                elif max_val <= 32767:
+                    if len(value_data) <= 255:
+                        encoded = struct.pack('>BB', 0b00001001, len(value_data))
+                        encoded += struct.pack('>' + 'h' * len(value_data), *value_data)
+                        return encoded
+                    else:
+                        encoded = struct.pack('>BH', 0b00001101, len(value_data))
+                        encoded += struct.pack('>' + 'i' * len(value_data), *value_data)
+                        return encoded
+                elif max_val <= 2147483647:
+                    if len(value_data) <= 255:
+                        encoded = struct.pack('>BB', 0b00001010, len(value_data))
+                        encoded += struct.pack('>' + 'i' * len(value_data), *value_data)
+                        return encoded
+                    else:
+                        encoded = struct.pack('>BH', 0b00001110, len(value_data))
+                        encoded += struct.pack('>' + 'i' * len(value_data), *value_data)
+                        return encoded
+                else: # 64 bit
+                    if len(value_data) <= 255:
+                        encoded = struct.pack('>BH', 0b00001111, len(value_data))
+                        encoded += struct.pack('>' + 'q' * len(value_data), *value_data)
+                        return encoded
+
+        # TimeStamp types:
+        elif value_type == "timestamp":
+            if isinstance(value_data, str):
+                if value_data.count(':') == 6:
+                    encoded_ts = encode_timestamp_type0(value_data)
+                    return struct.pack('>B', 0b00010000) + encoded_ts
+                elif value_data.count(':') == 4:
+                    encoded_ts = encode_timestamp_type1(value_data)
+                    return struct.pack('>B', 0b00010001) + encoded_ts
+                else:
+                    raise ValueError(f"Invalid timestamp format: {value_data}")
+            else:
+                raise ValueError(f"Timestamp must be string: {value_data}")
+
+        # STRING types
+        elif value_type == "string":
+            if isinstance(value_data, str):
+                #ASCII normalized
+                try:
+                    encoded_str = value_data.encode('ascii')
+                    if len(encoded_str) <= 65535:
+                        return struct.pack('>BH', 0b00100000, len(encoded_str)) + encoded_str
+                    else:
+                        raise ValueError(f"String too long: {len(encoded_str)}")
+                except UnicodeError:
+                    # Extended ASCII
+                    encoded_str = value_data.encode('latin-1')
+            if len(encoded_str) <= 65535:
+                return struct.pack('>BH', 0b00100001, len(encoded_str)) + encoded_str
+            else:
+                raise ValueError(f"String too long: {value_data}")
+
+        #IID type
+        elif value_type == "iid":
+            if isinstance(value_data, str):
+                encoded_iid = encode_single_iid(value_data)
+                # Extract the data type bits from the encoded IID
+                iid_data_type = encoded_iid[0]
+                #MAP to IID value type encoding
+                if iid_data_type == 0b01000000:
+                    return struct.pack('>B', 0b01000000) + encoded_iid[1:]
+                elif iid_data_type == 0b01000001:
+                    return struct.pack('>b', 0b01000001) + encoded_iid[1:]
+                elif iid_data_type == 0b01000011:
+                    return struct.pack('>B', 0b01000011) + encoded_iid[1:]
+                else: raise ValueError(f"Invalid IID data type: {iid_data_type:08b}")
+            else:
+                raise ValueError(f"IID must be string: {value_data}")
+        else:
+            raise ValueError(f"Unsupported value type: {value_data}")
+
+    except Exception as e:
+        raise ValueError(f"Value encoding failed: {e}")
+
+def decode_value(data):
+    """
+    Decode a single value from bytes (if/elif implementation)
+    """
+    if len(data) < 1:
+        raise ValueError("No data for value decoding")
+
+    data_type = data[0]
+
+    try:
+        #Byte types
+        if data_type == 0b00000000: # Single byte
+            if len(data) < 2:
+                raise ValueError("Not enough data for single byte")
+            value = struct.unpack('>B', data[1:2])[0]
+            return value, data[2:]
+
+        elif data_type == 0b00000001: # Short byte sequence
+            if len(data) < 2:
+                raise ValueError("Not enough data for byte sequence header")
+            n_bytes = data[1]
+            if len(data) < 2 + n_bytes:
+                raise ValueError(f"Not enough data for byte sequence: need {n_bytes}, got {len(data)-2}")
+            if n_bytes == 0:
+                raise ValueError("Empty byte sequence not allowed")
+            if len(data) < 2 + n_bytes:
+                raise ValueError(f"Not enough data for byte sequence: need {n_bytes}, got {len(data)-2}")
+            value = data[2:2+n_bytes]
+            return value, data[2+n_bytes:]
+
+        elif data_type == 0b00000010: # Long byte sequence
+            if len(data) < 3:
+                raise ValueError("Not enough data for, long byte sequence header")
+            n_bytes = struct.unpack('>H', data[1:3])[0]
+            if len(data) < 3 + n_bytes:
+                raise ValueError(f"Not enough data for long byte sequence: need {n_bytes}, got {len(data)-3}")
+            if n_bytes == 0:
+                raise ValueError("Empty long byte sequence not allowed")
+            value = data[3:3+n_bytes]
+            return value, data[3+n_bytes:]
+
+        # Integer types
+        elif data_type in [0b00000100, 0b00000101, 0b00000110, 0b00000111]:
+            if data_type == 0b00000100: # 8 bit int
+                if len(data) < 2:
+                    raise ValueError("Not enough data for 8-bit integer")
+                value = struct.unpack('>b', data[1:2])[0]
+                return value, data[2:]
+            elif data_type == 0b00000101: # 16 bit int
+                if len(data) < 3:
+                    raise ValueError("Not enough data for 16-bit integer")
+                value = struct.unpack('>h', data[1:3])[0]
+                return value, data[3:]
+            elif data_type == 0b00000110:   # 32 bit int
+                if len(data) < 5:
+                    raise ValueError("Not enough data for 32-bit integer")
+                value = struct.unpack('>i', data[1:5])[0]
+                return value, data[5:]
+            elif data_type == 0b00000111:   # 64 bit int
+                if len(data) < 9:
+                    raise ValueError("not enough data for 64 bit integer")
+                value = struct.unpack('>q', data[1:9])[0]
+                return value, data[9:]
+
+        # INTEGER SEQUENCE types
+        elif data_type in range(0b00001000, 0b00010000):
+            # Determine size and count from data_type
+            size_bits = (data_type & 0b00000011)
+            is_short = (data_type & 0b00000100) == 0
+
+            sizes = {0: 1, 1: 2, 2: 4, 3: 8}    # bytes per element
+            format_chars = {0: 'b', 1: 'h', 2: 'i', 3: 'q'}  # struct format chars
+
+            size = sizes[size_bits]
+            fmt_char = format_chars[size_bits]
+
+            if is_short:
+                if len(data) < 2:
+                    raise ValueError("not enough data for integer sequence header")
+                count = data[1]
+                header_size = 2
+            else:
+                if len(data) < 3:
+                    raise ValueError("Not enough data for long integer sequence header")
+                count = struct.unpack('>H', data[1:3])[0]
+                header_size = 3
+
+            total_size = header_size + count * size
+            if len(data) < total_size:
+                raise ValueError(f"not enough data for integer sequence : need {total_size}, got {len(data)}")
+            values = list(struct.unpack('>' + fmt_char * count, data[header_size:total_size]))
+            return values, data[total_size:]
+
+        # TIMESTAMP types
+        elif data_type in [0b00010000, 0b00010001]:
+            if len(data) < 7: # 3 * uint16 = 6 bytes
+                raise ValueError("Not enough data for timestamp")
+
+            timestamp_data = data[1:7]
+            if data_type == 0b00010000: # Type 0
+                value = decode_timestamp_type0(timestamp_data)
+            else: # Type 1
+                value = decode_timestamp_type1(timestamp_data)
+            return value, data[7:]
+
+        # STRING types
+        elif (data_type & 0b11110000) == 0b00100000:
+            if len(data) < 3:
+                raise ValueError("Not enough data for string header")
+
+            str_len = struct.unpack('>H', data[1:3])[0]
+            if len(data) < 3 + str_len:
+                raise ValueError(f"Not enough data for string: need {str_len}, got {len(data)-3}")
+
+            string_data = data[3:3+str_len]
+            encoding_bits = data_type & 0b00001111
+
+            if encoding_bits == 0b0000: #ASCII normalized
+                value = string_data.decode('ascii')
+            elif encoding_bits == 0b001:   # Extended ASCII/ISO-8859-1
+                value = string_data.decode('latin-1')
+            else:
+                value = string_data.decode('latin-1')   # Fallback
+
+            return value, data[3+str_len:]
+
+        #IID types
+        elif data_type in [0b01000000, 0b01000001, 0b01000011]:
+            # REconstruct the IID data type byte
+            iid_data_type = 0b01000000 | (data_type & 0b00000011)
+            iid_data = bytes([iid_data_type]) + data[1:]
+
+            value, remaining = decode_single_iid(iid_data)
+            return value, remaining
+        else:
+            raise ValueError(f"Unknow value data type: {data_type:08b}")
+
+    except Exception as e:
+        raise ValueError(f"Value decoding failed: {e}")
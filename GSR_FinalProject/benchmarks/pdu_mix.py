@@ -0,0 +1,31 @@
+"""
+Realistic PDUs for the benchmarks, shaped like the ones the agent and the
+manager actually exchange.
+"""
+from Protocol.protocol import BEACON_IIDS, Timestamp, Uptime
+
+TIMESTAMP = Timestamp.from_string("17:10:2026:12:30:45:123")
+N_SENSORS = 8
+
+# Device group (1.1 - 1.9) as returned by LSNMPAgent._get_device_value
+DEVICE_IIDS = [f"1.{i}" for i in range(1, 10)]
+DEVICE_VALUES = [123, "Agent_001", "Sensing Hub", 30, N_SENSORS, TIMESTAMP,
+                 Uptime.from_ms(3 * 3600000 + 25 * 60000 + 7123), 1, 0]
+
+# Sensor table (2.1.x - 2.7.x) of every sensor
+SENSOR_TABLE_IIDS = [f"2.{obj}.{sensor}" for sensor in range(1, N_SENSORS + 1) for obj in range(1, 8)]
+SENSOR_TABLE_VALUES = []
+for _sensor in range(1, N_SENSORS + 1):
+    SENSOR_TABLE_VALUES += [f"Sensor_{_sensor}", "Virtual Sensor", 42 + _sensor, 0, 100,
+                            Uptime.from_ms(1500 + _sensor), 10]
+del _sensor
+
+# name -> (msg_type, iid_list, v_list, t_list, e_list)
+PDU_CASES = {
+    "beacon": ("notification", BEACON_IIDS, [123, "Agent_001", N_SENSORS, 1], [], []),
+    "notification": ("notification", ["2.3.1"], [57], [], []),
+    "device get-request": ("get-request", DEVICE_IIDS, [], [], []),
+    "device response": ("response", DEVICE_IIDS, DEVICE_VALUES, [], []),
+    "sensor table get-request": ("get-request", SENSOR_TABLE_IIDS, [], [], []),
+    "sensor table response": ("response", SENSOR_TABLE_IIDS, SENSOR_TABLE_VALUES, [], []),
+}
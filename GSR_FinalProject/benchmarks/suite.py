@@ -0,0 +1,140 @@
+"""
+Codec benchmark suite: complete PDUs, single values, encryption and IID-Lists.
+
+Every case reports ops/s, ns/op and the bytes allocated per op (peak traced
+by tracemalloc). Results can be saved as a JSON baseline and later runs
+compared against it, flagging cases slower than the threshold.
+
+Run from GSR_FinalProject:
+    python -m benchmarks --save benchmarks/baselines/baseline.json
+    python -m benchmarks --compare benchmarks/baselines/baseline.json --threshold 0.15
+"""
+import hashlib
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from Protocol.protocol import (encode_complete_pdu, decode_complete_pdu, encode_value, decode_value,
+                               encode_iid_list, decode_iid_list, encrypt, decrypt, CryptoSession, encode_static_value)
+from benchmarks.pdu_mix import PDU_CASES, TIMESTAMP
+from benchmarks.value_codec import VALUE_CASES, DELTA_CASES
+
+KEY = hashlib.sha256(b"benchmark").digest()[:16]
+
+
+def build_cases():
+    """name -> zero argument callable, one per benchmarked operation"""
+    cases = {}
+    sessions = {mode: CryptoSession(KEY, mode) for mode in CryptoSession.MODES}
+    for name, (msg_type, iid_list, v_list, t_list, e_list) in PDU_CASES.items():
+        pdu = encode_complete_pdu(msg_type, TIMESTAMP, 1, iid_list, v_list, t_list, e_list)
+        encrypted = encrypt(pdu, KEY)
+        encoded_iids = encode_iid_list(iid_list)
+        cases[f"pdu encode/{name}"] = (
+            lambda m=msg_type, i=iid_list, v=v_list, t=t_list, e=e_list:
+            encode_complete_pdu(m, TIMESTAMP, 1, i, v, t, e))
+        cases[f"pdu decode/{name}"] = lambda p=pdu: decode_complete_pdu(p)
+        if name.endswith("response"):
+            # agent responses with the values pre-encoded (static MIB objects)
+            cached = [encode_static_value(value) for value in v_list]
+            cases[f"pdu encode/{name} cached"] = (
+                lambda m=msg_type, i=iid_list, v=cached, t=t_list, e=e_list:
+                encode_complete_pdu(m, TIMESTAMP, 1, i, v, t, e))
+        cases[f"encrypt/{name}"] = lambda p=pdu: encrypt(p, KEY)
+        cases[f"decrypt/{name}"] = lambda c=encrypted: decrypt(c, KEY)
+        for mode, session in sessions.items():
+            sealed = bytes(session.seal(pdu))
+            cases[f"session seal {mode}/{name}"] = lambda p=pdu, s=session: s.seal(p)
+            cases[f"session open {mode}/{name}"] = lambda c=sealed, s=session: s.open(c)
+        cases[f"iid-list encode/{name}"] = lambda i=iid_list: encode_iid_list(i)
+        cases[f"iid-list decode/{name}"] = lambda d=encoded_iids: decode_iid_list(d)
+
+    for label, value, value_type in VALUE_CASES + DELTA_CASES:
+        encoded = encode_value(value, value_type)
+        cases[f"value encode/{label}"] = lambda v=value, t=value_type: encode_value(v, t)
+        cases[f"value decode/{label}"] = lambda d=encoded: decode_value(d)
+    return cases
+
+
+def measure_time(func, repeat):
+    """Best ns per call over repeat rounds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+def measure_allocations(func, calls=20):
+    """Average peak bytes allocated by one call"""
+    func()   # warm up caches (interned IIDs, struct objects...)
+    total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / calls
+
+
+def run(repeat=5, name_filter=None):
+    results = {}
+    for name, func in build_cases().items():
+        if name_filter and name_filter not in name:
+            continue
+        ns_per_op = measure_time(func, repeat)
+        results[name] = {
+            "ns_per_op": round(ns_per_op, 1),
+            "ops_per_s": round(1e9 / ns_per_op),
+            "alloc_bytes_per_op": round(measure_allocations(func)),
+        }
+    return results
+
+
+def save_baseline(path, results):
+    baseline = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+def compare(results, baseline, threshold):
+    """Cases whose ns/op grew more than threshold (0.10 = 10%): [(name, before, after)]"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["ns_per_op"] > before["ns_per_op"] * (1 + threshold):
+            regressions.append((name, before["ns_per_op"], result["ns_per_op"]))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    header = f"{'case':<44}{'ops/s':>12}{'ns/op':>11}{'bytes/op':>10}"
+    if baseline:
+        header += f"{'baseline':>11}{'change':>9}"
+    print(header)
+    for name, result in results.items():
+        line = (f"{name:<44}{result['ops_per_s']:>12,}{result['ns_per_op']:>11.0f}"
+                f"{result['alloc_bytes_per_op']:>10}")
+        before = baseline.get(name) if baseline else None
+        if before:
+            change = result["ns_per_op"] / before["ns_per_op"] - 1
+            line += f"{before['ns_per_op']:>11.0f}{change:>+9.1%}"
+        print(line)
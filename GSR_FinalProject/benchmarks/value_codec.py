@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: per-value cost of encode_value/decode_value, before (if/elif
+codec) and after (table driven codec), for every L-SNMPvS value type.
+
+Run from GSR_FinalProject:
+    python -m benchmarks.value_codec
+"""
+import argparse
+import timeit
+
+from Protocol.protocol import encode_value, decode_value
+from benchmarks import legacy_value_codec as legacy
+
+# (label, value, value type) - one case per wire value type. Integer sequences
+# are typed "integer" (fixed size elements), auto-detection would delta code them
+VALUE_CASES = [
+    ("byte", 200, "byte"),
+    ("byte sequence", b"\x01\x02\x03\x04\x05\x06\x07\x08", None),
+    ("long byte sequence", bytes(range(256)) * 2, None),
+    ("int8", 42, None),
+    ("int16", 1013, None),
+    ("int32", 70000, None),
+    ("int64", 2 ** 40, None),
+    ("int8 sequence", list(range(-50, 50)), "integer"),
+    ("int16 sequence", [1000 + i for i in range(100)], "integer"),
+    ("int32 sequence", [100000 + i for i in range(100)], "integer"),
+    ("int64 sequence", [2 ** 40 + i for i in range(100)], "integer"),
+    ("long int8 sequence", [i % 100 for i in range(1000)], "integer"),
+    ("long int32 sequence", [100000 + i for i in range(1000)], "integer"),
+    ("timestamp type 0", "17:10:2026:12:30:45:123", None),
+    ("timestamp type 1", "3:4:5:6:789", None),
+    ("ascii string", "Sensing Hub", None),
+    ("latin-1 string", "Pressão", None),
+    ("iid (2 parts)", "1.2", "iid"),
+    ("iid (3 parts)", "2.3.1", "iid"),
+    ("iid (4 parts)", "2.3.1.4", "iid"),
+]
+
+# delta-varint sequences (no legacy equivalent): (label, value, value type)
+DELTA_CASES = [
+    ("delta sequence", [100000 + i for i in range(100)], "delta"),
+    ("delta-of-delta sequence", [100000 + 300 * i for i in range(100)], "delta2"),
+    ("long delta sequence", [100000 + i % 7 for i in range(1000)], "delta"),
+    ("auto int16 sequence", [1000 + i for i in range(100)], None),
+]
+
+
+def time_per_call(func, repeat=5):
+    """Best time per call in nanoseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def run(repeat=5):
+    rows = []
+    for label, value, value_type in VALUE_CASES:
+        encoded = encode_value(value, value_type)
+        if encoded != legacy.encode_value(value, value_type):
+            raise AssertionError(f"Encoders disagree for {label}")
+        # timestamps decode to Timestamp/Uptime objects, compared by their legacy text
+        if str(decode_value(encoded)[0]) != str(legacy.decode_value(encoded)[0]):
+            raise AssertionError(f"Decoders disagree for {label}")
+
+        rows.append((
+            label,
+            time_per_call(lambda: legacy.encode_value(value, value_type), repeat),
+            time_per_call(lambda: encode_value(value, value_type), repeat),
+            time_per_call(lambda: legacy.decode_value(encoded), repeat),
+            time_per_call(lambda: decode_value(encoded), repeat),
+        ))
+    return rows
+
+
+def print_report(rows):
+    print(f"{'value type':<22}{'enc before':>12}{'enc after':>12}{'x':>7}"
+          f"{'dec before':>12}{'dec after':>12}{'x':>7}   (ns/value)")
+    for label, enc_before, enc_after, dec_before, dec_after in rows:
+        print(f"{label:<22}{enc_before:>12.0f}{enc_after:>12.0f}{enc_before / enc_after:>7.2f}"
+              f"{dec_before:>12.0f}{dec_after:>12.0f}{dec_before / dec_after:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="encode_value/decode_value micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions per case")
+    args = parser.parse_args()
+    print_report(run(args.repeat))
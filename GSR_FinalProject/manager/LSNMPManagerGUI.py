@@ -3,7 +3,7 @@ from tkinter import ttk, scrolledtext
 import threading
 import queue
 import time
-from manager.udp_client import UDPClient
+from manager.udp_client import UDPClient, GLOBAL_BEACON_FINGERPRINT, is_sensor_notification, sensor_samples
 
 
 class BeaconDashboard:
@@ -21,12 +21,11 @@ class BeaconDashboard:
     def update_with_beacon(self, beacon_msg, addr):
         """Atualiza o dashboard com um novo beacon"""
         self.beacon_count += 1
-        iid_list = beacon_msg['iid_list']
-        v_list = beacon_msg['v_list']
         current_time = time.time()
 
-        if iid_list == ["1.1", "1.2", "1.5", "1.8"]:
+        if beacon_msg.iid_fingerprint == GLOBAL_BEACON_FINGERPRINT:
             # 🔔 BEACON GLOBAL
+            v_list = beacon_msg.v_list
             self.last_global_beacon = {
                 'agent_id': v_list[1],
                 'total_sensors': v_list[2],
@@ -36,29 +35,29 @@ class BeaconDashboard:
             }
             self.last_global_time = current_time
 
-        elif len(iid_list) == 1 and iid_list[0].startswith("2.3."):
-            # 📡 NOTIFICAÇÃO DE SENSOR
-            sensor_iid = iid_list[0]
-            sensor_value = v_list[0]
-            sensor_num = sensor_iid.split('.')[2]
-
-            # Procura se já existe atividade deste sensor
-            found = False
-            for i, activity in enumerate(self.recent_sensor_activity):
-                if activity[0] == sensor_num:
-                    # Atualiza atividade existente
-                    self.recent_sensor_activity[i] = (sensor_num, sensor_value, current_time, beacon_msg['timestamp'])
-                    found = True
-                    break
-
-            # Se não encontrou, adiciona nova atividade
-            if not found:
-                self.recent_sensor_activity.append((
-                    sensor_num,
-                    sensor_value,
-                    current_time,
-                    beacon_msg['timestamp']
-                ))
+        elif is_sensor_notification(beacon_msg):
+            # 📡 NOTIFICAÇÃO DE SENSOR (várias entradas se vier agrupada)
+            timestamp = beacon_msg['timestamp']
+            for sensor_iid, sensor_value in sensor_samples(beacon_msg):
+                sensor_num = str(sensor_iid.parts[2])
+
+                # Procura se já existe atividade deste sensor
+                found = False
+                for i, activity in enumerate(self.recent_sensor_activity):
+                    if activity[0] == sensor_num:
+                        # Atualiza atividade existente
+                        self.recent_sensor_activity[i] = (sensor_num, sensor_value, current_time, timestamp)
+                        found = True
+                        break
+
+                # Se não encontrou, adiciona nova atividade
+                if not found:
+                    self.recent_sensor_activity.append((
+                        sensor_num,
+                        sensor_value,
+                        current_time,
+                        timestamp
+                    ))
 
             self._cleanup_old_activity()
 
@@ -169,12 +168,14 @@ class LSNMPManagerGUI:
             #     original_handle_beacon(beacon_msg, addr)  # 🚫 COMENTADO!
 
             # Apenas atualiza o status discretamente
-            iid_list = beacon_msg['iid_list']
-            if iid_list == ["1.1", "1.2", "1.5", "1.8"]:
+            if beacon_msg.iid_fingerprint == GLOBAL_BEACON_FINGERPRINT:
                 self.update_status("🟢 Ready | 🔔 Global beacon received")
-            elif len(iid_list) == 1 and iid_list[0].startswith("2.3."):
-                sensor_num = iid_list[0].split('.')[2]
-                self.update_status(f"🟢 Ready | 📡 Sensor {sensor_num} updated")
+            elif is_sensor_notification(beacon_msg):
+                if beacon_msg.iid_count == 1:
+                    sensor_num = beacon_msg.first_iid.parts[2]
+                    self.update_status(f"🟢 Ready | 📡 Sensor {sensor_num} updated")
+                else:
+                    self.update_status(f"🟢 Ready | 📡 {beacon_msg.iid_count} sensors updated")
 
         self.client._handle_beacon = new_handle_beacon
 
@@ -541,11 +542,15 @@ class LSNMPManagerGUI:
     def set_sampling_rate(self):
         def action():
             sensor_idx = self.sensor_index_var.get()
-            rate = self.sampling_rate_var.get()
-            if rate.isdigit():
-                response = self.client.send_request("set-request", [f"2.7.{sensor_idx}"], [int(rate)])
-                return f"🔧 Sensor {sensor_idx} sampling rate set to {rate}Hz"
-            return "❌ Invalid sampling rate"
+            try:
+                rate = float(self.sampling_rate_var.get())
+            except ValueError:
+                return "❌ Invalid sampling rate"
+            if rate < 0:
+                return "❌ Invalid sampling rate"
+            # sensors.samplingRate goes in tenths of Hz (same format as the GET)
+            response = self.client.send_request("set-request", [f"2.7.{sensor_idx}"], [round(rate * 10)])
+            return f"🔧 Sensor {sensor_idx} sampling rate set to {round(rate * 10) / 10}Hz"
 
         self.run_in_thread(action)
 
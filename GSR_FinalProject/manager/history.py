@@ -0,0 +1,119 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:     # pure array fallback
+    np = None
+
+
+class SensorHistory:
+    """
+    Samples received from the agents, per sensor IID, as two parallel arrays
+    (time in epoch ms, value). Sample blocks (high-rate notifications) are
+    expanded with array operations, without an int/tuple object per sample.
+    Keeps the last max_samples of each sensor: the arrays are cut back to
+    max_samples when they reach twice that, one move per max_samples new
+    samples instead of one per sample.
+    """
+
+    def __init__(self, max_samples=100000):
+        self.max_samples = max_samples
+        self._series = {}       # sensor IID -> (times, values)
+
+    def _get_series(self, iid):
+        series = self._series.get(iid)
+        if series is None:
+            series = self._series[iid] = (array('q'), array('q'))
+        return series
+
+    def append(self, iid, time_ms, value):
+        """One sample (single value notification)"""
+        times, values = self._get_series(iid)
+        times.append(time_ms)
+        values.append(value)
+        self._trim(times, values)
+
+    def add_block(self, iid, start_ms, span_ms, samples):
+        """
+        Block of samples (array or list of ints) taken at a steady rate from
+        start_ms, span_ms is the duration of the block (samples x interval)
+        """
+        count = len(samples)
+        if not count:
+            return
+        times, values = self._get_series(iid)
+        if np is not None:
+            # whole block at once, each time rounded down on its own
+            if span_ms > 0:
+                block_times = np.arange(count, dtype=np.int64) * span_ms // count + start_ms
+            else:
+                block_times = np.full(count, start_ms, dtype=np.int64)
+            times.frombytes(block_times.tobytes())
+            values.frombytes(np.asarray(samples).astype(np.int64).tobytes())
+        else:
+            if span_ms > 0:
+                interval_ms, fraction = divmod(span_ms, count)
+                if fraction:
+                    times.extend(array('q', (start_ms + i * span_ms // count for i in range(count))))
+                else:
+                    times.extend(array('q', range(start_ms, start_ms + span_ms, interval_ms)))
+            else:
+                times.extend(array('q', [start_ms]) * count)
+            values.extend(samples if getattr(samples, 'typecode', None) == 'q' else array('q', samples))
+        self._trim(times, values)
+
+    def add_samples(self, iid, sample_times, sample_values):
+        """
+        Samples read back from the agent's history (backfill), oldest first.
+        Only the ones newer than the last sample stored are kept.
+        """
+        times, values = self._get_series(iid)
+        first = 0
+        if times:
+            last_ms = times[-1]
+            while first < len(sample_times) and sample_times[first] <= last_ms:
+                first += 1
+        times.extend(array('q', sample_times[first:]))
+        values.extend(array('q', sample_values[first:]))
+        self._trim(times, values)
+        return len(sample_times) - first
+
+    def add_notification(self, notification):
+        """
+        Records a sensor notification (PDUView): a block (integer sequence with
+        start time and block duration in the T-List) or one sample per entry
+        """
+        samples = notification.sequence_value(0) if notification.iid_count == 1 else None
+        if samples is not None:
+            t_list = notification.t_list
+            if len(t_list) == 2:
+                self.add_block(notification.first_iid, t_list[0].to_epoch_ms(), t_list[1].to_ms(), samples)
+                return
+        time_ms = notification.timestamp_ms
+        for iid, value in zip(notification.iid_list, notification.v_list):
+            if isinstance(value, int):
+                self.append(iid, time_ms, value)
+
+    def _trim(self, times, values):
+        if len(times) >= 2 * self.max_samples:
+            excess = len(times) - self.max_samples
+            del times[:excess]
+            del values[:excess]
+
+    def samples(self, iid):
+        """(times, values) arrays of the last max_samples of a sensor, empty if nothing was received"""
+        times, values = self._series.get(iid, (array('q'), array('q')))
+        if len(times) > self.max_samples:
+            return times[-self.max_samples:], values[-self.max_samples:]
+        return times, values
+
+    def last(self, iid):
+        """(time ms, value) of the last sample of a sensor or None"""
+        times, values = self._series.get(iid, ((), ()))
+        return (times[-1], values[-1]) if times else None
+
+    def sensors(self):
+        return list(self._series)
+
+    def __len__(self):
+        return sum(min(len(times), self.max_samples) for times, _ in self._series.values())
@@ -1,6 +1,7 @@
 import select
 import socket
 import sys
+from datetime import datetime
 
 from manager.udp_client import UDPClient
 
@@ -38,6 +39,10 @@ class LSNMPManager:
             print("2.5  Valor máximo do sensor (2.5)")
             print("2.6  Último sampling time (2.6)")
             print("2.7  Configurar sampling rate (2.7)")
+            print("2.8  Política de notificação / deadband (2.8-2.12)")
+
+            print("\n=== HISTÓRICO (3.x) ===")
+            print("3.1  Últimas N amostras de um sensor (3.1-3.2)")
 
             print("\n=== OPERAÇÕES AVANÇADAS ===")
             print("3.  Ativar/desativar beacons")
@@ -88,6 +93,12 @@ class LSNMPManager:
                     self.get_last_sampling_time()
                 elif user_input == "2.7":
                     self.configure_beacon_rate()
+                elif user_input == "2.8":
+                    self.configure_report_policy()
+
+                # Histórico (3.x)
+                elif user_input == "3.1":
+                    self.get_sensor_history()
 
                 # Operações Avançadas
                 elif user_input == "3":
@@ -132,7 +143,7 @@ class LSNMPManager:
                 sampling_time = response['v_list'][0]
 
                 # Formatar a apresentação
-                parts = sampling_time.split(':')
+                parts = str(sampling_time).split(':')
                 if len(parts) == 5:  # Formato Type 1: days:hours:mins:secs:ms
                     days, hours, minutes, seconds, ms = parts
 
@@ -672,6 +683,75 @@ class LSNMPManager:
         except Exception as e:
             print(f"❌ Erro UDP: {e}")
 
+    def configure_report_policy(self):
+        """Feature 2.8-2.12 - Política de notificação de um sensor (deadband/heartbeat)"""
+        try:
+            sensor_index = input("Índice do sensor (1-8): ").strip()
+            if not sensor_index.isdigit():
+                print("❌ Índice deve ser um número!")
+                return
+
+            policy_iids = [f"2.{column}.{sensor_index}" for column in (8, 9, 10, 11, 12)]
+            current_response = self.udp_client.send_request(
+                msg_type="get-request",
+                iid_list=policy_iids
+            )
+            mode, deadband, deadband_pct, max_silence, suppressed = current_response['v_list']
+            print(f"    Modo: {'deadband' if mode == 1 else 'todas as amostras'}")
+            print(f"    Deadband: {deadband} | {deadband_pct}% da gama | Heartbeat: {max_silence}s")
+            print(f"    Amostras suprimidas: {suppressed}")
+
+            # Pedir novos valores
+            mode = int(input("\nModo (0=todas as amostras, 1=deadband/heartbeat): "))
+            deadband = int(input("Deadband absoluto (0 = qualquer alteração): "))
+            deadband_pct = int(input("Deadband em % da gama (0 = desativado): "))
+            max_silence = int(input("Silêncio máximo / heartbeat (segundos, 0 = desativado): "))
+            if mode not in (0, 1) or min(deadband, deadband_pct, max_silence) < 0:
+                print("X Erro: Modo deve ser 0 ou 1 e os valores >= 0")
+                return
+
+            self.udp_client.send_request(
+                msg_type="set-request",
+                iid_list=policy_iids[:4],
+                v_list=[mode, deadband, deadband_pct, max_silence]
+            )
+            print(f"  Política do sensor {sensor_index} configurada")
+
+        except ValueError:
+            print("❌ Erro: Insira um número válido")
+        except socket.timeout:
+            print("❌ Timeout - Agent não respondeu!")
+        except Exception as e:
+            print(f"❌ Erro UDP: {e}")
+
+    def get_sensor_history(self):
+        """Feature 3.1-3.2 - Últimas N amostras guardadas pelo agent (valores e tempos)"""
+        try:
+            sensor_index = input("Índice do sensor (1-8): ").strip()
+            if not sensor_index.isdigit():
+                print("❌ Índice deve ser um número!")
+                return
+            count = int(input("Número de amostras (0 = todas): "))
+            if count < 0:
+                print("X Erro: O número de amostras deve ser >= 0")
+                return
+
+            new_samples = self.udp_client.backfill(sensor_index, last=count)
+            if new_samples is None:
+                return
+            times, values = self.udp_client.history.samples(f"2.3.{sensor_index}")
+            shown = len(times) if count == 0 else min(count, len(times))
+            for time_ms, value in zip(times[len(times) - shown:], values[len(values) - shown:]):
+                print(f"    {datetime.fromtimestamp(time_ms / 1000).strftime('%H:%M:%S.%f')[:-3]}  {value}")
+            print(f"  {new_samples} amostras novas do sensor {sensor_index}")
+
+        except ValueError:
+            print("❌ Erro: Insira um número válido")
+        except socket.timeout:
+            print("❌ Timeout - Agent não respondeu!")
+        except Exception as e:
+            print(f"❌ Erro UDP: {e}")
+
 if __name__ == "__main__":
     manager = LSNMPManager()
     manager.simple_ui()
\ No newline at end of file
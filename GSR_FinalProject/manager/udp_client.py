@@ -7,15 +7,43 @@ import hashlib
 import hmac
 import base64
 from datetime import datetime
-from Protocol.protocol import encode_complete_pdu, decode_complete_pdu, encrypt, decrypt
+from Protocol.protocol import (encode_complete_pdu, decode_complete_pdu, encrypt, decrypt, PDUView,
+                               BEACON_IIDS, iid_list_fingerprint, CryptoSession, Timestamp, ReceiveBuffers,
+                               MAX_DATAGRAM_SIZE)
+from manager.history import SensorHistory
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 from Crypto.Random import get_random_bytes
 import struct
 
+# Beacons are classified by their raw IID-List, without decoding it
+GLOBAL_BEACON_FINGERPRINT = iid_list_fingerprint(BEACON_IIDS)
+
+
+def is_sensor_notification(beacon_msg):
+    """True for a sensor value notification, one or several (coalesced) IIDs 2.3.x"""
+    count = beacon_msg.iid_count
+    if count == 0:
+        return False
+    if count == 1:
+        first_iid = beacon_msg.first_iid
+        return first_iid is not None and first_iid.parts[:2] == (2, 3)
+    return all(iid.parts[:2] == (2, 3) for iid in beacon_msg.iid_list)
+
+
+def sensor_samples(beacon_msg):
+    """(sensor IID, value) of every entry of a sensor notification, the last sample of a block"""
+    if beacon_msg.iid_count == 1:
+        block = beacon_msg.sequence_value(0)
+        if block:
+            return [(beacon_msg.first_iid, block[-1])]
+        return [(beacon_msg.first_iid, beacon_msg.first_value())]
+    return list(zip(beacon_msg.iid_list, beacon_msg.v_list))
+
 
 class UDPClient:
-    def __init__(self, host='localhost', port=1161, beacon_port=1163, shared_key="default_key_12345678"):
+    def __init__(self, host='localhost', port=1161, beacon_port=1163, shared_key="default_key_12345678",
+                 crypto_mode="ecb", max_datagram=MAX_DATAGRAM_SIZE):
         self.host = host
         self.port = port
         self.beacon_port = beacon_port
@@ -28,9 +56,17 @@ class UDPClient:
         self.beacon_socket.bind(('0.0.0.0', self.beacon_port))
         self.beacon_socket.settimeout(1.0)
         self.key = hashlib.sha256(shared_key.encode()).digest()[:16]
+        # "ecb" (legacy) or "aead" (authenticated), must match the agent
+        self.crypto = CryptoSession(self.key, crypto_mode)
+        # Datagrams are received into reusable buffers, larger than max_datagram are counted and dropped
+        self.response_buffers = ReceiveBuffers(max_datagram)
+        # a few buffers: a beacon view stays valid while the next ones arrive
+        self.beacon_buffers = ReceiveBuffers(max_datagram, 4)
         
         self.running = True
         self.beacon_thread = None
+        # Samples of the sensor notifications (blocks expanded), per sensor IID
+        self.history = SensorHistory()
 
     def send_request(self ,msg_type ,iid_list, v_list=[]):
         """Envia pedido para o Agent e recebe resposta"""
@@ -44,14 +80,17 @@ class UDPClient:
             e_list= []
         )
 
-        request_bytes = encrypt(request_bytes, self.key)
+        request_bytes = self.crypto.seal(request_bytes)
         # 2. Envia para agent
 
         self.socket.sendto(request_bytes, (self.host, self.port))
 
         # 3. Recebe response
-        response_data, addr = self.socket.recvfrom(1024)
-        response_data = decrypt(response_data, self.key)
+        response_data, addr = self.response_buffers.recvfrom(self.socket)
+        if response_data is None:
+            raise ValueError(f"Response larger than {self.response_buffers.max_datagram} bytes")
+        # Raises ValueError for forged/corrupted responses, before decoding
+        response_data = self.crypto.open(response_data)
         decoded_message = decode_complete_pdu(response_data)
         self.message_counter += 1
         return (decoded_message)
@@ -67,8 +106,14 @@ class UDPClient:
         """Loop que escuta por beacons dos Agents"""
         while self.running:
             try:
-                data, addr = self.beacon_socket.recvfrom(1024)
-                beacon_msg = decode_complete_pdu(data)
+                data, addr = self.beacon_buffers.recvfrom(self.beacon_socket)
+                if data is None:
+                    print(f"> beacon dropped: larger than {self.beacon_buffers.max_datagram} bytes")
+                    continue
+                # Lazy view, the lists are only decoded if the handler needs them
+                beacon_msg = PDUView(data)
+                if is_sensor_notification(beacon_msg):
+                    self.history.add_notification(beacon_msg)
                 #Processa o beacon recebido
                 self._handle_beacon(beacon_msg, addr)
                 
@@ -83,31 +128,31 @@ class UDPClient:
         #print(f"\n📡 BEACON received from {addr[0]}:")
 
         # 🎯 DETECT WHAT TYPE OF BEACON THIS IS
-        iid_list = beacon_msg['iid_list']
-        v_list = beacon_msg['v_list']
-
-        if iid_list == ["1.1", "1.2", "1.5", "1.8"]:
+        if beacon_msg.iid_fingerprint == GLOBAL_BEACON_FINGERPRINT:
             # 🔔 GLOBAL BEACON (Device Info)
+            v_list = beacon_msg.v_list
             print(f"   🔔 GLOBAL BEACON:")
             print(f"   🆔 Agent ID: {v_list[1]}")
             print(f"   📊 Total Sensors: {v_list[2]}")
             print(f"   🟢 Status: {'Normal' if v_list[3] == 1 else 'Error'}")
             print(f"   🔧 MIB ID: {v_list[0]}")
 
-        elif len(iid_list) == 1 and iid_list[0].startswith("2.3."):
-            # 📡 INDIVIDUAL SENSOR NOTIFICATION
-            sensor_iid = iid_list[0]
-            sensor_value = v_list[0]
+        elif is_sensor_notification(beacon_msg):
+            # 📡 SENSOR NOTIFICATION (one entry per sensor when coalesced)
             print(f"   📡 SENSOR NOTIFICATION:")
-            print(f"   🔸 Sensor: {sensor_iid}")
-            print(f"   💾 Value: {sensor_value}%")
+            block = beacon_msg.sequence_value(0)
+            if block is not None:
+                print(f"   📦 Block: {len(block)} samples")
+            for sensor_iid, sensor_value in sensor_samples(beacon_msg):
+                print(f"   🔸 Sensor: {sensor_iid}")
+                print(f"   💾 Value: {sensor_value}%")
             print(f"   ⏰ Timestamp: {beacon_msg['timestamp']}")
 
         else:
             # ❌ UNKNOWN BEACON TYPE
             print(f"   ❓ UNKNOWN BEACON TYPE:")
-            print(f"   IIDs: {iid_list}")
-            print(f"   Values: {v_list}")
+            print(f"   IIDs: {beacon_msg.iid_list}")
+            print(f"   Values: {beacon_msg.v_list}")
 
         print(f"   📨 Type: {beacon_msg['type']}")
         print(f"   🆔 MSG-ID: {beacon_msg['msg_id']}")
@@ -137,6 +182,33 @@ class UDPClient:
         except Exception as e:
             print(f"X Error getting sensor values: {e}")
 
+    def backfill(self, sensor_index, last=None):
+        """
+        Reads the samples the agent kept for a sensor (history 3.x) into
+        self.history: the last `last` ones, or every sample since the last
+        one received. Returns how many were new, None on error.
+        """
+        sensor_iid = f"2.3.{sensor_index}"
+        if last is None:
+            received = self.history.last(sensor_iid)
+            selector = Timestamp.from_epoch_ms(received[0] + 1) if received else 0
+        else:
+            selector = last
+        try:
+            response = self.send_request(
+                msg_type="get-request",
+                iid_list=[f"3.2.{sensor_index}", f"3.1.{sensor_index}"],
+                v_list=[selector, selector]
+            )
+        except Exception as e:
+            print(f"X Error reading sensor history: {e}")
+            return None
+        sample_times, sample_values = response["v_list"]
+        if not isinstance(sample_times, list) or not isinstance(sample_values, list):
+            print(f"X Unknown sensor {sensor_iid}")
+            return None
+        return self.history.add_samples(sensor_iid, sample_times, sample_values)
+
     def close(self):
         """Fecha todos os sockets"""
         self.running = False
@@ -147,8 +219,8 @@ class UDPClient:
         print("🛑 UDP Client closed")
 
     def _get_current_timestamp(self):
-        now = datetime.now()
-        return f"{now.day}:{now.month}:{now.year}:{now.hour}:{now.minute}:{now.second}:{now.microsecond//1000}"
+        # epoch ms, encoded by the codec without formatting/parsing text
+        return time.time_ns() // 1000000
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+import socket
+import threading
+import time
+import unittest
+
+from Agent.async_server import AsyncUDPServer
+from Protocol.protocol import encode_complete_pdu, decode_complete_pdu, CryptoSession
+
+SHARED_KEY = "default_key_12345678"
+
+
+class AsyncServerConcurrencyTest(unittest.TestCase):
+    """GETs answered from the thread pool and from the loop at the same time"""
+
+    def setUp(self):
+        self.server = AsyncUDPServer(port=0, crypto_mode="aead", read_workers=4)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self.server.serve(),),
+                                       daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + 5
+        while self.server.transport is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.port = self.server.transport.get_extra_info("sockname")[1]
+        self.session = CryptoSession(hashlib.sha256(SHARED_KEY.encode()).digest()[:16], "aead")
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.settimeout(2.0)
+
+    def tearDown(self):
+        self.socket.close()
+        self.server.stop()
+        self.thread.join(5)
+        self.loop.close()
+
+    def test_concurrent_responses_authenticate(self):
+        # 2.3.1 is answered by the thread pool, 1.1 on the loop
+        requests = [bytes(self.session.seal(encode_complete_pdu(
+                        "get-request", 1, msg_id % 256, ["2.3.1" if msg_id % 2 else "1.1"], [], [], [])))
+                    for msg_id in range(50)]
+        received = rejected = 0
+        for _ in range(8):
+            for request in requests:
+                self.socket.sendto(request, ("localhost", self.port))
+            for _ in requests:
+                datagram, _ = self.socket.recvfrom(4096)
+                try:
+                    response = decode_complete_pdu(self.session.open(datagram))
+                except ValueError:
+                    rejected += 1
+                    continue
+                self.assertEqual(response["type"], "response")
+                received += 1
+        self.assertEqual(rejected, 0)
+        self.assertEqual(received, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
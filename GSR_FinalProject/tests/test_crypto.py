@@ -0,0 +1,98 @@
+import hashlib
+import unittest
+
+from Protocol.protocol import (encode_complete_pdu, decode_complete_pdu, encrypt, decrypt, CryptoSession,
+                               AEAD_NONCE_SIZE, AEAD_TAG_SIZE)
+
+KEY = hashlib.sha256(b"default_key_12345678").digest()[:16]
+
+
+def sample_pdu(count=3):
+    iids = [f"2.3.{i}" for i in range(1, count + 1)]
+    return encode_complete_pdu("response", 1700000000000, 7, iids, list(range(count)), [], [])
+
+
+class CryptoSessionTest(unittest.TestCase):
+    """seal/open round trips and rejections, in both modes"""
+
+    def check_round_trip(self, mode):
+        sender = CryptoSession(KEY, mode)
+        receiver = CryptoSession(KEY, mode)
+        for count in (0, 1, 3, 50, 200):
+            pdu = sample_pdu(count)
+            sealed = bytes(sender.seal(pdu))
+            self.assertLessEqual(len(sealed) - len(pdu), sender.overhead)
+            self.assertEqual(bytes(receiver.open(sealed)), pdu)
+            # memoryview/bytearray input and caller supplied buffers
+            out = bytearray(len(pdu) + sender.overhead)
+            size = sender.seal_into(pdu, out)
+            plain = bytearray(size)
+            self.assertEqual(plain[:receiver.open_into(memoryview(out)[:size], plain)], pdu)
+            self.assertEqual(decode_complete_pdu(receiver.open(bytearray(sealed)))["iid_list"],
+                             decode_complete_pdu(pdu)["iid_list"])
+        self.assertEqual(receiver.rejected, 0)
+
+    def test_round_trip_ecb(self):
+        self.check_round_trip("ecb")
+
+    def test_round_trip_aead(self):
+        self.check_round_trip("aead")
+
+    def test_ecb_matches_legacy_functions(self):
+        pdu = sample_pdu()
+        session = CryptoSession(KEY, "ecb")
+        self.assertEqual(bytes(session.seal(pdu)), encrypt(pdu, KEY))
+        self.assertEqual(bytes(session.open(encrypt(pdu, KEY))), decrypt(encrypt(pdu, KEY), KEY))
+
+    def test_aead_nonce_changes_per_datagram(self):
+        session = CryptoSession(KEY, "aead")
+        pdu = sample_pdu()
+        first, second = bytes(session.seal(pdu)), bytes(session.seal(pdu))
+        self.assertNotEqual(first[:AEAD_NONCE_SIZE], second[:AEAD_NONCE_SIZE])
+        self.assertNotEqual(first, second)
+
+    def test_aead_rejects_tampering(self):
+        sender = CryptoSession(KEY, "aead")
+        receiver = CryptoSession(KEY, "aead")
+        sealed = bytes(sender.seal(sample_pdu()))
+        for index in (0, AEAD_NONCE_SIZE, len(sealed) // 2, len(sealed) - 1):
+            tampered = bytearray(sealed)
+            tampered[index] ^= 0x01
+            with self.assertRaises(ValueError):
+                receiver.open(bytes(tampered))
+        self.assertEqual(receiver.rejected, 4)
+
+    def test_aead_rejects_truncated(self):
+        sender = CryptoSession(KEY, "aead")
+        receiver = CryptoSession(KEY, "aead")
+        sealed = bytes(sender.seal(sample_pdu()))
+        for size in (0, AEAD_NONCE_SIZE, AEAD_NONCE_SIZE + AEAD_TAG_SIZE - 1, len(sealed) - 1):
+            with self.assertRaises(ValueError):
+                receiver.open(sealed[:size])
+
+    def test_aead_rejects_other_key(self):
+        sealed = bytes(CryptoSession(KEY, "aead").seal(sample_pdu()))
+        with self.assertRaises(ValueError):
+            CryptoSession(bytes(16), "aead").open(sealed)
+
+    def test_ecb_rejects_corrupted(self):
+        sender = CryptoSession(KEY, "ecb")
+        receiver = CryptoSession(KEY, "ecb")
+        sealed = bytes(sender.seal(sample_pdu()))
+        for datagram in (b"", sealed[:-1], sealed[:-16] + bytes(16), b"garbage" * 5, bytes(32)):
+            with self.assertRaises(ValueError):
+                receiver.open(datagram)
+        # a valid datagram of another key does not decrypt to a PDU
+        with self.assertRaises(ValueError):
+            CryptoSession(bytes(16), "ecb").open(sealed)
+
+    def test_unknown_mode_and_oversize_pdu(self):
+        with self.assertRaises(ValueError):
+            CryptoSession(KEY, "cbc")
+        session = CryptoSession(KEY, "aead", max_size=64)
+        with self.assertRaises(ValueError):
+            session.seal(bytes(65))
+
+
+if __name__ == "__main__":
+    unittest.main()
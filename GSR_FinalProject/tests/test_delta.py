@@ -0,0 +1,89 @@
+import random
+import unittest
+from array import array
+
+from Protocol import delta
+from Protocol.delta import delta_encode, delta_decode, DELTA_VALUE_LIMIT
+
+
+def zigzag_varints(numbers):
+    out = bytearray()
+    for number in numbers:
+        delta._append_varint(out, (number << 1) ^ (number >> 63))
+    return bytes(out)
+
+
+def sequences():
+    rng = random.Random(18)
+    yield [0]
+    yield [-1, 1]
+    yield list(range(1000))
+    yield [1000 + 3 * i for i in range(700)]
+    yield [rng.randint(-100, 100) for _ in range(300)]
+    yield [rng.randint(-(1 << 40), 1 << 40) for _ in range(600)]
+    yield [rng.choice((DELTA_VALUE_LIMIT - 1, -(DELTA_VALUE_LIMIT - 1), 0)) for _ in range(200)]
+    # sensor-like: steady slope plus noise
+    yield [20000 + 5 * i + rng.randint(-2, 2) for i in range(2000)]
+
+
+class DeltaRoundTripTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for values in sequences():
+            for order in (1, 2):
+                for count in (1, 2, 127, 128, 511, 512, len(values)):
+                    part = values[:count]
+                    data = delta_encode(part, order)
+                    self.assertEqual(list(delta_decode(data, len(part), order)), part)
+
+    def test_limit(self):
+        values = list(range(0, 100000, 77))
+        data = delta_encode(values, 1)
+        self.assertEqual(delta_encode(values, 1, limit=len(data)), data)
+        self.assertIsNone(delta_encode(values, 1, limit=len(data) - 1))
+
+    def test_empty(self):
+        self.assertEqual(delta_encode([]), b'')
+        self.assertEqual(delta_decode(b'', 0), array('q'))
+        with self.assertRaises(ValueError):
+            delta_decode(b'\x00', 0)
+
+
+@unittest.skipIf(delta.np is None, "NumPy is not installed")
+class DeltaPythonNumpyTest(unittest.TestCase):
+    """The pure Python and the NumPy coders give the same bytes/values and errors"""
+
+    def test_same_encoding(self):
+        for values in sequences():
+            for order in (1, 2):
+                self.assertEqual(delta._encode_numpy(values, order), delta._encode_python(values, order))
+
+    def test_same_decoding(self):
+        for values in sequences():
+            for order in (1, 2):
+                data = delta._encode_python(values, order)
+                self.assertEqual(delta._decode_numpy(data, len(values), order),
+                                 delta._decode_python(data, len(values), order))
+
+    def assert_both_reject(self, data, count, order=1):
+        for decode in (delta._decode_python, delta._decode_numpy):
+            with self.assertRaises(ValueError, msg=decode.__name__):
+                decode(data, count, order)
+
+    def test_overflow_rejected(self):
+        # the sum of the deltas leaves int64, cumsum would wrap around silently
+        big = (1 << 62) - 1
+        self.assert_both_reject(zigzag_varints([big] * 130), 130)
+        self.assert_both_reject(zigzag_varints([-big] * 130), 130)
+        self.assert_both_reject(zigzag_varints([big, big] + [0] * 128), 130, order=2)
+
+    def test_malformed_rejected(self):
+        data = delta._encode_python(list(range(0, 200000, 997)), 1)
+        count = len(range(0, 200000, 997))
+        self.assert_both_reject(data, count + 1)
+        self.assert_both_reject(data[:-1] + b'\x80', count)
+        self.assert_both_reject(b'\xff' * 10 + b'\x01' + bytes(count - 1), count)
+
+
+if __name__ == "__main__":
+    unittest.main()
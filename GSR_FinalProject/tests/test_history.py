@@ -0,0 +1,84 @@
+import unittest
+from array import array
+
+from Agent.lsnmp_agent import LSNMPAgent
+from manager import history as history_module
+from manager.history import SensorHistory
+from Protocol.protocol import PDUView
+
+
+class SampleBlockTest(unittest.TestCase):
+    """Blocks of high-rate samples, agent notification -> manager history"""
+
+    def setUp(self):
+        self.agent = LSNMPAgent(start_loop=False)
+        self.notifications = []
+        self.agent.set_notification_callback(self.notifications.append)
+        self.history = SensorHistory()
+
+    def deliver(self):
+        for message in self.notifications:
+            for datagram in message.encode_datagrams():
+                self.history.add_notification(PDUView(bytes(datagram)))
+        self.notifications.clear()
+
+    def test_fractional_interval_does_not_drift(self):
+        # 300 Hz: 3.33 ms between samples
+        self.agent.set_sensor_sampling_rate("1", 300)
+        row = self.agent.sensor_bank.row("1")
+        start_ms = 1700000000000
+        for block in range(3):
+            block_start = start_ms + round(block * 100 * 1000 / 300)
+            self.agent._notify_block(row, block_start, array('i', range(100)))
+        self.deliver()
+        times, values = self.history.samples("2.3.1")
+        self.assertEqual(len(times), 300)
+        # every sample within the ms truncations of its nominal time (3 ms interval: 33 ms off by the end)
+        for index, time_ms in enumerate(times):
+            self.assertLessEqual(abs(time_ms - (start_ms + index * 1000 / 300)), 2)
+
+    def test_whole_ms_interval(self):
+        self.history.add_block("2.3.1", 1000, 50, [1, 2, 3, 4, 5])
+        self.assertEqual(list(self.history.samples("2.3.1")[0]), [1000, 1010, 1020, 1030, 1040])
+
+    @unittest.skipIf(history_module.np is None, "NumPy not installed")
+    def test_numpy_matches_fallback(self):
+        blocks = [(1000, 1000, array('i', range(300))), (2000, 50, [1, 2, 3, 4, 5]), (3000, 0, [-7, 8])]
+        expanded = []
+        for numpy in (history_module.np, None):
+            history_module.np, saved = numpy, history_module.np
+            try:
+                history = SensorHistory()
+                for start_ms, span_ms, samples in blocks:
+                    history.add_block("2.3.1", start_ms, span_ms, samples)
+            finally:
+                history_module.np = saved
+            expanded.append(history._series["2.3.1"])
+        self.assertEqual(expanded[0], expanded[1])
+        self.assertEqual(expanded[0][0].typecode, 'q')
+
+
+class HistoryLimitTest(unittest.TestCase):
+
+    def test_keeps_last_max_samples(self):
+        history = SensorHistory(max_samples=100)
+        for time_ms in range(1000):
+            history.append("2.3.1", time_ms, time_ms % 7)
+            times, values = history.samples("2.3.1")
+            self.assertEqual(len(times), min(time_ms + 1, 100))
+            self.assertEqual(times[-1], time_ms)
+        self.assertEqual(list(history.samples("2.3.1")[0]), list(range(900, 1000)))
+        self.assertEqual(history.last("2.3.1"), (999, 999 % 7))
+        self.assertEqual(len(history), 100)
+        # the storage is cut back now and then, never past twice the limit
+        self.assertLess(len(history._series["2.3.1"][0]), 200)
+
+    def test_backfill_after_trim(self):
+        history = SensorHistory(max_samples=10)
+        history.add_block("2.3.1", 0, 300, list(range(30)))
+        self.assertEqual(history.add_samples("2.3.1", [290, 300, 310], [1, 2, 3]), 2)
+        self.assertEqual(list(history.samples("2.3.1")[1])[-3:], [29, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import multiprocessing
+import random
+import unittest
+
+import numpy as np
+
+from Agent.lsnmp_agent import LSNMPAgent
+from Agent.multicore import _reseed
+
+
+def _read_values(agent, results):
+    _reseed(agent)
+    bank = agent.sensor_bank
+    rows = np.arange(bank.count)
+    # read() and read_many() draw from the same generator
+    results.put(([bank.read(bank.row("3")) for _ in range(10)], bank.read_many(rows), random.random()))
+
+
+class WorkerReseedTest(unittest.TestCase):
+
+    def test_forked_workers_read_different_values(self):
+        agent = LSNMPAgent(start_loop=False)
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [context.Process(target=_read_values, args=(agent, results)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        first, second = results.get(timeout=10), results.get(timeout=10)
+        for worker in workers:
+            worker.join()
+        self.assertNotEqual(first[0], second[0])
+        self.assertNotEqual(first[1], second[1])
+        self.assertNotEqual(first[2], second[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from Agent.sensor_bank import SensorBank
+
+
+class SamplingScheduleTest(unittest.TestCase):
+    """The bank's heap schedule, on a manual clock"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.bank = SensorBank(clock=lambda: self.now, slack=0)
+        for key in "12345":
+            self.bank.add_sensor(key, sampling_rate=int(key))
+
+    def run_for(self, steps, start=0):
+        counts = dict.fromkeys("12345", 0)
+        for step in range(start, start + steps):
+            self.now = step * 0.01
+            for key in self.bank.pop_due():
+                counts[key] += 1
+        return counts
+
+    def test_samples_at_each_rate(self):
+        self.assertEqual(self.run_for(1000), {"1": 10, "2": 20, "3": 30, "4": 40, "5": 50})
+
+    def test_rate_changes_rekey(self):
+        self.run_for(100)
+        self.bank.set_sampling_rate("5", 0)
+        self.bank.set_sampling_rate("1", 10)
+        counts = self.run_for(1000, start=100)
+        self.assertEqual(counts["5"], 0)
+        # re-keyed from the previous sample, one boundary sample either way
+        self.assertAlmostEqual(counts["1"], 100, delta=1)
+        self.assertEqual(counts["2"], 20)
+        self.assertEqual(len(self.bank), 4)
+
+    def test_next_deadline_skips_stale_entries(self):
+        self.bank.set_sampling_rate("1", 0)
+        for key in "2345":
+            self.bank.set_sampling_rate(key, 0)
+        self.assertIsNone(self.bank.next_deadline())
+        self.assertEqual(len(self.bank.pop_due_rows(10.0)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import math
+import threading
+import unittest
+from contextlib import contextmanager
+
+from Agent.sensor_bank import SensorBank
+from Agent.shared import MibSegment
+
+
+class SharedSegmentTest(unittest.TestCase):
+    """SensorBank over a MibSegment, a writer thread against the seqlock readers"""
+
+    def setUp(self):
+        self.segment = MibSegment.create(capacity=4, history_size=16)
+        self.bank = SensorBank(segment=self.segment, seed=1)
+        self.bank.add_sensor("1", 0, 1000, sampling_rate=0)
+
+    def tearDown(self):
+        self.bank = None
+        self.segment.close()
+        self.segment.unlink()
+
+    def test_history_under_concurrent_writes(self):
+        done = threading.Event()
+
+        def sample():
+            row = self.bank.row("1")
+            while not done.is_set():
+                self.bank.read(row)
+
+        writer = threading.Thread(target=sample)
+        writer.start()
+        try:
+            for _ in range(2000):
+                times, values = self.bank.history("1")
+                self.assertEqual(len(times), len(values))
+                self.assertLessEqual(len(times), 16)
+                self.assertEqual(times, sorted(times))
+                self.assertTrue(all(0 <= value <= 1000 for value in values))
+        finally:
+            done.set()
+            writer.join()
+
+    def test_history_selection(self):
+        row = self.bank.row("1")
+        for _ in range(40):
+            self.bank.read(row)
+        times, values = self.bank.history("1")
+        self.assertEqual(len(values), 16)
+        self.assertEqual(self.bank.history("1", last=5)[1], values[-5:])
+        self.assertEqual(self.bank.history("1", since_ms=times[-1])[0][-1], times[-1])
+
+    def test_read_fresh_uses_last_sample(self):
+        value = self.bank.read(self.bank.row("1"))
+        self.assertEqual(self.bank.read_fresh("1", max_age=60), value)
+        self.assertEqual(self.bank.fresh_reads, 1)
+
+
+class SharedScheduleTest(unittest.TestCase):
+    """Sampling schedule in a segment, rates changed by another worker"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.segment = MibSegment.create(capacity=4, history_size=4)
+        self.bank = SensorBank(clock=lambda: self.now, slack=0, segment=self.segment)
+        self.bank.add_sensor("1", sampling_rate=10)
+
+    def tearDown(self):
+        self.bank = None
+        self.segment.close()
+        self.segment.unlink()
+
+    def stop_in_other_worker(self):
+        """What another worker's SET 2.7.1 = 0 writes to the segment"""
+        with self.segment.writing():
+            self.bank.intervals[0] = 0
+            self.bank.next_due[0] = math.inf
+            self.segment.header["schedule"] += 1
+
+    def test_stop_between_pop_and_reschedule(self):
+        writing = self.bank._writing
+
+        @contextmanager
+        def racing():
+            self.stop_in_other_worker()
+            with writing():
+                yield
+
+        self.bank._writing = racing
+        self.now = 0.5
+        self.assertEqual(len(self.bank.pop_due_rows()), 0)
+        self.bank._writing = writing
+        self.assertEqual(self.bank.next_due[0], math.inf)
+        for step in range(1, 20):
+            self.now = 0.5 + step * 0.1
+            self.assertEqual(len(self.bank.pop_due_rows()), 0)
+        self.assertIsNone(self.bank.next_deadline())
+
+    def test_suppressed_written_under_seqlock(self):
+        self.bank.set_report_policy("1", mode=1, deadband=1000)
+        rows = self.bank.pop_due_rows()
+        self.bank.read_many(rows)
+        self.bank.select_reports(rows)
+        self.bank.read_many(rows)
+        sequence = int(self.segment.header["sequence"])
+        self.bank.select_reports(rows)
+        self.assertEqual(int(self.bank.suppressed[0]), 1)
+        # one writing() block: odd while writing, even again after it
+        self.assertEqual(int(self.segment.header["sequence"]), sequence + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import random
+import tempfile
+import unittest
+from array import array
+
+from Protocol.protocol import (encode_complete_pdu, decode_complete_pdu, PDUStreamDecoder, iter_pdus,
+                               iter_capture_file, write_capture_file, pdu_end, Timestamp, Uptime)
+
+
+def sample_pdus():
+    start = Timestamp.from_epoch_ms(1700000000123)
+    return [
+        encode_complete_pdu("get-request", 1700000000000, 1, ["1.1", "1.2", "2.3.1"], [], [], []),
+        encode_complete_pdu("response", 1700000000001, 2, ["1.2", "1.6", "1.7"],
+                            ["Agent_001", start, Uptime.from_ms(123456)], [], []),
+        encode_complete_pdu("set-request", 1700000000002, 3, ["1.4"], [10], [], []),
+        # sample block: integer sequence and a T-List
+        encode_complete_pdu("notification", 1700000000003, 4, ["2.3.1"], [array('i', range(-50, 250))],
+                            [start, Uptime.from_ms(1000)], []),
+        encode_complete_pdu("response", 1700000000004, 5, [f"2.3.{i}" for i in range(1, 41)],
+                            list(range(40)), [], []),
+    ]
+
+
+class PDUStreamDecoderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pdus = sample_pdus()
+        self.expected = [decode_complete_pdu(pdu) for pdu in self.pdus]
+        self.stream = b''.join(self.pdus)
+
+    def feed_chunks(self, decoder, data, sizes):
+        decoded = []
+        position = 0
+        for size in sizes:
+            decoded.extend(decoder.feed(data[position:position + size]))
+            position += size
+        decoded.extend(decoder.feed(data[position:]))
+        return decoded
+
+    def test_byte_by_byte(self):
+        decoder = PDUStreamDecoder()
+        self.assertEqual(self.feed_chunks(decoder, self.stream, [1] * len(self.stream)), self.expected)
+        self.assertEqual(decoder.pending, 0)
+
+    def test_every_split_point(self):
+        # two PDUs split at every byte: each one completes exactly once
+        data = self.pdus[1] + self.pdus[3]
+        for split in range(len(data) + 1):
+            decoder = PDUStreamDecoder()
+            decoded = list(decoder.feed(data[:split])) + list(decoder.feed(data[split:]))
+            self.assertEqual(decoded, [self.expected[1], self.expected[3]], split)
+
+    def test_random_chunks(self):
+        rng = random.Random(7)
+        data = self.stream * 20
+        for _ in range(20):
+            decoder = PDUStreamDecoder()
+            sizes = [rng.randint(1, 300) for _ in range(len(data) // 50)]
+            self.assertEqual(self.feed_chunks(decoder, data, sizes), self.expected * 20)
+
+    def test_incomplete_frame_stays_pending(self):
+        decoder = PDUStreamDecoder()
+        self.assertEqual(list(decoder.feed(self.stream[:-3])), self.expected[:-1])
+        self.assertEqual(decoder.pending, len(self.pdus[-1]) - 3)
+        self.assertEqual(list(decoder.feed(self.stream[-3:])), self.expected[-1:])
+
+    def test_feed_without_iterating(self):
+        decoder = PDUStreamDecoder()
+        half = len(self.pdus[0]) // 2
+        decoder.feed(self.pdus[0][:half])
+        self.assertEqual(decoder.pending, half)
+        self.assertEqual(list(decoder.feed(self.pdus[0][half:])), self.expected[:1])
+
+    def test_length_prefixes(self):
+        for length_prefix in (2, 4):
+            framed = b''.join(len(pdu).to_bytes(length_prefix, 'big') + pdu for pdu in self.pdus)
+            decoder = PDUStreamDecoder(length_prefix)
+            self.assertEqual(self.feed_chunks(decoder, framed, [3] * (len(framed) // 3)), self.expected)
+            self.assertEqual(list(iter_pdus(framed, length_prefix)), self.expected)
+
+    def test_lazy_views(self):
+        decoder = PDUStreamDecoder(lazy=True)
+        views = self.feed_chunks(decoder, self.stream, [7] * (len(self.stream) // 7))
+        self.assertEqual([view['iid_list'] for view in views], [pdu['iid_list'] for pdu in self.expected])
+        self.assertEqual([view['msg_id'] for view in views], [1, 2, 3, 4, 5])
+
+    def test_invalid_length_prefix(self):
+        with self.assertRaises(ValueError):
+            PDUStreamDecoder(3)
+
+    def test_pdu_end(self):
+        for pdu in self.pdus:
+            self.assertEqual(pdu_end(pdu), len(pdu))
+            self.assertIsNone(pdu_end(pdu[:-1]))
+
+    def test_truncated_buffer(self):
+        with self.assertRaises(ValueError):
+            list(iter_pdus(self.stream[:-1]))
+
+    def test_capture_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for length_prefix in (0, 2, 4):
+                path = os.path.join(directory, f"capture{length_prefix}.bin")
+                write_capture_file(path, self.pdus, length_prefix)
+                self.assertEqual(list(iter_capture_file(path, length_prefix)), self.expected)
+            empty = os.path.join(directory, "empty.bin")
+            write_capture_file(empty, [])
+            self.assertEqual(list(iter_capture_file(empty)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()